@@ -0,0 +1,138 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import os
+import stat
+import json
+import pickle
+import hashlib
+from openram import debug
+from openram.gdsMill.gdsMill import gdsPrimitives
+from openram.gdsMill.gdsMill import vlsiLayout
+from openram.gdsMill.gdsMill import gds2reader
+
+
+class layout_unpickler(pickle.Unpickler):
+    """
+    An unpickler that only makes layout objects and numpy arrays, so
+    entries can't run other code when they are loaded.
+    """
+
+    # Modules of the numpy functions that make arrays
+    numpy_modules = ["numpy", "numpy.core.numeric", "numpy.core.multiarray",
+                     "numpy._core.numeric", "numpy._core.multiarray"]
+    numpy_names = ["dtype", "ndarray", "_frombuffer", "_reconstruct", "scalar"]
+
+    def find_class(self, module, name):
+        if module in self.numpy_modules and name in self.numpy_names:
+            return super().find_class(module, name)
+        if module == gdsPrimitives.__name__ and name.startswith("Gds"):
+            return getattr(gdsPrimitives, name)
+        if module == vlsiLayout.__name__ and name == "VlsiLayout":
+            return vlsiLayout.VlsiLayout
+        raise pickle.UnpicklingError("{0}.{1} is not a layout class".format(module, name))
+
+
+class gds_cache:
+    """
+    This class is a persistent cache of parsed GDS files on the disk. Each
+    entry is a pickled layout with its pins. Entries are keyed by the
+    technology, the file path, the hash of the file contents, the reading
+    parameters, the gdsMill sources, and the cache version, so changed files
+    and layout classes never load stale entries. Entries are replaced
+    atomically so that concurrent processes of a user can share the cache.
+    The directory must only be writable by its owner, who must be the
+    current user.
+    """
+
+    # Increase this when an entry changes without changing the gdsMill
+    # sources (e.g. the layout is changed after it is read)
+    version = 2
+
+    # Modules that define the layout classes and how they are read
+    source_modules = [gdsPrimitives, vlsiLayout, gds2reader]
+    # Hash of the sources of the modules
+    source_hash = None
+
+    def __init__(self, path):
+
+        # Directory of the cache entries
+        self.path = path
+        os.makedirs(self.path, mode=0o700, exist_ok=True)
+        path_stat = os.stat(self.path)
+        if path_stat.st_uid != os.getuid() or path_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            debug.error("The GDS cache {} must be a private directory of the current user.".format(self.path), -1)
+
+
+    @classmethod
+    def get_source_hash(cls):
+        """ Return the hash of the sources of the layout classes. """
+
+        if cls.source_hash is None:
+            source_hash = hashlib.sha256()
+            for module in cls.source_modules:
+                with open(module.__file__, "rb") as f:
+                    source_hash.update(f.read())
+            cls.source_hash = source_hash.hexdigest()
+        return cls.source_hash
+
+
+    def get_key(self, tech_name, gds_filename, units, special_purposes, cell_name=None):
+        """
+        Return the key of a GDS file read with the given parameters. The
+        cell name is given if only its structures are read from a library.
+        """
+
+        gds_filename = os.path.realpath(gds_filename)
+        with open(gds_filename, "rb") as f:
+            content_hash = hashlib.sha256(f.read()).hexdigest()
+        content = [self.version,
+                   self.get_source_hash(),
+                   tech_name,
+                   gds_filename,
+                   content_hash,
+                   list(units),
+                   sorted([str(k), v] for k, v in special_purposes.items()),
+                   cell_name]
+        data = json.dumps(content, separators=(",", ":"))
+        return hashlib.sha256(data.encode()).hexdigest()
+
+
+    def get_file_name(self, key):
+        """ Return the file name of an entry. """
+
+        return os.path.join(self.path, key + ".pkl")
+
+
+    def load(self, key):
+        """ Return the layout of an entry or None if it isn't cached. """
+
+        file_name = self.get_file_name(key)
+        try:
+            with open(file_name, "rb") as f:
+                layout = layout_unpickler(f).load()
+            if not isinstance(layout, vlsiLayout.VlsiLayout):
+                raise pickle.UnpicklingError("not a layout")
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # Ignore entries that can't be loaded, they will be replaced
+            debug.warning("Could not load the GDS cache entry {0}: {1}".format(file_name, e))
+            return None
+        debug.info(3, "Loaded layout from the cache {}".format(file_name))
+        return layout
+
+
+    def store(self, key, layout):
+        """ Save a layout as an entry. """
+
+        file_name = self.get_file_name(key)
+        temp_name = "{}.{}.tmp".format(file_name, os.getpid())
+        with open(temp_name, "wb") as f:
+            pickle.dump(layout, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_name, file_name)
+        debug.info(3, "Saved layout to the cache {}".format(file_name))
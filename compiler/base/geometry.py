@@ -242,6 +242,10 @@ class instance(geometry):
         # (it will only be written the first time though)
         self.mod.gds_write_file(self.gds)
         # now write an instance of my module/structure
+        self.gds_write_reference(new_layout)
+
+    def gds_write_reference(self, new_layout):
+        """Writes a reference to the module of this instance"""
         new_layout.addInstance(self.gds,
                                self.mod.cell_name,
                                offsetInMicrons=self.offset,
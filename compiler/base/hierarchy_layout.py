@@ -22,7 +22,7 @@ from openram.sram_factory import factory
 from openram import OPTS
 from .vector import vector
 from .pin_layout import pin_layout
-from .utils import round_to_grid
+from .utils import round_to_grid, read_gds_layout
 from . import geometry
 
 try:
@@ -64,8 +64,10 @@ class layout():
         self.pin_names = {}
         # Holds name->pin_layout map for all pins
         self.pin_map = {}
-        # List of modules we have already visited
-        self.visited = []
+        # Set of modules we have already visited
+        self.visited = set()
+        # Name and GDS structure of this module from the last GDS write
+        self.gds_structure = None
 
         self.gds_read()
 
@@ -1405,9 +1407,7 @@ class layout():
         # open the gds file if it exists or else create a blank layout
         if os.path.isfile(self.gds_file):
             debug.info(3, "opening {}".format(self.gds_file))
-            self.gds = gdsMill.VlsiLayout(units=GDS["unit"])
-            reader = gdsMill.Gds2reader(self.gds)
-            reader.loadFromFile(self.gds_file, special_purposes)
+            self.gds = read_gds_layout(self.gds_file, GDS["unit"], self.cell_name)
         else:
             debug.info(3, "Creating layout structure {}".format(self.name))
             self.gds = gdsMill.VlsiLayout(name=self.name, units=GDS["unit"])
@@ -1423,15 +1423,62 @@ class layout():
 
     def clear_visited(self):
         """ Recursively clear the visited flag """
-        self.visited = []
+        self.visited = set()
 
     def gds_write_file(self, gds_layout):
         """Recursive GDS write function"""
         # Visited means that we already prepared self.gds for this subtree
         if self.name in self.visited:
             return
+        if OPTS.gds_array_refs:
+            self.gds_write_instances(gds_layout)
+        else:
+            for i in self.insts:
+                i.gds_write_file(gds_layout)
+        self.gds_write_shapes(gds_layout)
+
+        self.visited.add(self.name)
+
+    def gds_write_stream(self, writer, written):
+        """
+        Recursive GDS write function that writes each structure to the
+        writer's open stream once all of its submodules are written.
+        """
+        if self.name in written:
+            return
+        written.add(self.name)
+
+        if self.is_library_cell:
+            # Library cells are already in memory, so write all of their
+            # structures
+            self.gds_write_file(self.gds)
+            for (structure_name, structure) in self.gds.structures.items():
+                if structure_name not in writer.structureNames:
+                    writer.writeStructure(structure_name, structure)
+            return
+
         for i in self.insts:
-            i.gds_write_file(gds_layout)
+            i.mod.gds_write_stream(writer, written)
+
+        # Reuse the structure from an earlier write like the submodules
+        # in self.gds were reused before
+        if self.gds_structure is None:
+            # Temporary layout that only holds the structure of this module
+            gds_layout = gdsMill.VlsiLayout(name=self.name, units=GDS["unit"])
+            if OPTS.gds_array_refs:
+                self.gds_write_instances(gds_layout, write_mods=False)
+            else:
+                for i in self.insts:
+                    i.gds_write_reference(gds_layout)
+            self.gds_write_shapes(gds_layout)
+            self.gds_structure = (gds_layout.rootStructureName,
+                                  gds_layout.structures[gds_layout.rootStructureName])
+        (structure_name, structure) = self.gds_structure
+        if structure_name not in writer.structureNames:
+            writer.writeStructure(structure_name, structure)
+
+    def gds_write_shapes(self, gds_layout):
+        """ Write the objects, pins and boundary of this module """
         for i in self.objs:
             i.gds_write_file(gds_layout)
         for pin_name in self.pin_map.keys():
@@ -1465,31 +1512,83 @@ class layout():
                                   center=False)
                 debug.info(4, "Adding {0} boundary {1}".format(self.name, boundary))
 
-        self.visited.append(self.name)
+    def gds_write_instances(self, gds_layout, write_mods=True):
+        """
+        Write the instances to GDS and write each regular array
+        of the same module and orientation as an array reference.
+        Only the references are written if write_mods is False.
+        """
+        groups = {}
+        for inst in self.insts:
+            key = (inst.mod.name, inst.mirror, inst.rotate)
+            groups.setdefault(key, []).append(inst)
+
+        written = set()
+        for inst in self.insts:
+            key = (inst.mod.name, inst.mirror, inst.rotate)
+            if key in written:
+                continue
+            group = groups[key]
+            lattice = self.get_instance_lattice(group, gds_layout)
+            if lattice:
+                written.add(key)
+                (offset, columns, rows, pitch) = lattice
+                debug.info(4, "writing array of {0}x{1} {2}".format(columns, rows, inst.mod.name))
+                if write_mods:
+                    inst.mod.gds_write_file(inst.gds)
+                gds_layout.addArrayInstance(inst.gds,
+                                            inst.mod.cell_name,
+                                            offsetInMicrons=offset,
+                                            columns=columns,
+                                            rows=rows,
+                                            pitchInMicrons=pitch,
+                                            mirror=inst.mirror,
+                                            rotate=inst.rotate)
+            elif write_mods:
+                inst.gds_write_file(gds_layout)
+            else:
+                inst.gds_write_reference(gds_layout)
+
+    def get_instance_lattice(self, insts, gds_layout):
+        """
+        Return the offset, columns, rows and pitch of the instances if they
+        fill a regular lattice in layout units. Otherwise, return None.
+        """
+        if len(insts) < 2:
+            return None
+        xs = sorted(set(x.offset.x for x in insts))
+        ys = sorted(set(x.offset.y for x in insts))
+        columns = len(xs)
+        rows = len(ys)
+        points = set((x.offset.x, x.offset.y) for x in insts)
+        if len(insts) != columns * rows or len(points) != len(insts):
+            return None
+        pitch = []
+        for values in [xs, ys]:
+            step = values[1] - values[0] if len(values) > 1 else 0
+            start = gds_layout.userUnits(values[0])
+            unit_step = gds_layout.userUnits(step)
+            for i, value in enumerate(values):
+                if gds_layout.userUnits(value) != start + i * unit_step:
+                    return None
+            pitch.append(step)
+        return (vector(xs[0], ys[0]), columns, rows, pitch)
 
     def gds_write(self, gds_name):
         """Write the entire gds of the object to the file."""
         debug.info(3, "Writing to {}".format(gds_name))
 
-        # If we already wrote a GDS, we need to reset and traverse it again in
-        # case we made changes.
-        if not self.is_library_cell and self.visited:
-            debug.info(3, "Creating layout structure {}".format(self.name))
-            self.gds = gdsMill.VlsiLayout(name=self.name, units=GDS["unit"])
-
-        writer = gdsMill.Gds2writer(self.gds)
-        # MRG: 3/2/18 We don't want to clear the visited flag since
-        # this would result in duplicates of all instances being placed in self.gds
-        # which may have been previously processed!
+        # The header of the library comes from this module's layout
+        writer = gdsMill.Gds2writer(self.gds, mergeStructures=OPTS.gds_merge_structures)
         # MRG: 10/4/18 We need to clear if we make changes and write a second GDS!
         self.clear_visited()
+        self.gds_structure = None
 
-        # recursively create all the remaining objects
-        self.gds_write_file(self.gds)
-
-        # populates the xyTree data structure for gds
-        # self.gds.prepareForWrite()
-        writer.writeToFile(gds_name)
+        # Write each structure as soon as its submodules are written instead
+        # of collecting the whole hierarchy in self.gds first
+        writer.openStream(gds_name)
+        self.gds_write_stream(writer, set())
+        writer.closeStream()
         debug.info(3, "Done writing to {}".format(gds_name))
 
     def get_boundary(self):
@@ -7,6 +7,7 @@
 #
 import math
 from openram import debug
+from openram import tech
 from openram.tech import GDS, drc
 from openram.tech import layer, layer_indices
 from .vector import vector
@@ -405,22 +406,17 @@ class pin_layout:
 
         # Try to use a global pin purpose if it exists,
         # otherwise, use the regular purpose
-        try:
-            from openram.tech import pin_purpose as global_pin_purpose
-            pin_purpose = global_pin_purpose
-        except ImportError:
-            pass
-
-        try:
-            from openram.tech import label_purpose
-            try:
-                from openram.tech import layer_override_purpose
-                if pin_layer_num in layer_override_purpose:
-                    layer_num = layer_override_purpose[pin_layer_num][0]
-                    label_purpose = layer_override_purpose[pin_layer_num][1]
-            except:
-                pass
-        except ImportError:
+        # NOTE: Look up the optional tech attributes instead of importing
+        # them since failed imports are slow for every pin
+        pin_purpose = getattr(tech, "pin_purpose", pin_purpose)
+
+        if hasattr(tech, "label_purpose"):
+            label_purpose = tech.label_purpose
+            layer_override_purpose = getattr(tech, "layer_override_purpose", {})
+            if pin_layer_num in layer_override_purpose:
+                layer_num = layer_override_purpose[pin_layer_num][0]
+                label_purpose = layer_override_purpose[pin_layer_num][1]
+        else:
             label_purpose = purpose
 
         newLayout.addBox(layerNumber=layer_num,
@@ -13,6 +13,7 @@ from openram.gdsMill import gdsMill
 from openram import OPTS
 from .vector import vector
 from .pin_layout import pin_layout
+from .gds_cache import gds_cache
 try:
     from openram.tech import special_purposes
 except ImportError:
@@ -61,7 +62,7 @@ def auto_measure_libcell(pin_list, name, units, lpp):
     """
     cell_gds = OPTS.openram_tech + "gds_lib/" + str(name) + ".gds"
 
-    cell_vlsi = _get_gds_reader(units, cell_gds)
+    cell_vlsi = _get_gds_reader(units, cell_gds, str(name))
 
     # FIXME: This duplicates a lot of functionality of get_gds_size and
     # get_gds_pins, it should probably just call those functions?
@@ -77,19 +78,49 @@ def auto_measure_libcell(pin_list, name, units, lpp):
     return cell
 
 
+def read_gds_layout(gds_filename, units, cell_name=None):
+    """
+    Read a GDS file into a new layout. If the file is a library with more
+    than one structure, only decode the structure of the cell name and its
+    hierarchy. If the GDS cache is enabled, load the parsed layout from it
+    or save the layout to it.
+    """
+    cache = None
+    if OPTS.gds_cache_path is not None:
+        cache = gds_cache(OPTS.gds_cache_path)
+        key = cache.get_key(OPTS.tech_name, gds_filename, units, special_purposes, cell_name)
+        cell_vlsi = cache.load(key)
+        if cell_vlsi is not None:
+            return cell_vlsi
+
+    cell_vlsi = gdsMill.VlsiLayout(units=units)
+    reader = gdsMill.Gds2reader(cell_vlsi)
+    structure_names = []
+    if cell_name is not None:
+        # Structure names in the file may be padded
+        structure_names = [x[0] for x in reader.readIndex(gds_filename)]
+    cell_structure_names = [x for x in structure_names if x.rstrip("\x00") == cell_name]
+    if len(structure_names) > 1 and cell_structure_names:
+        debug.info(3, "Loading {0} from library {1}".format(cell_name, gds_filename))
+        reader.loadStructure(gds_filename, cell_structure_names[0], special_purposes)
+    else:
+        reader.loadFromFile(gds_filename, special_purposes)
+    if cache is not None:
+        cache.store(key, cell_vlsi)
+    return cell_vlsi
+
+
 _GDS_READER_CACHE = {}
 
 
-def _get_gds_reader(units, gds_filename):
+def _get_gds_reader(units, gds_filename, name=None):
     gds_absname = os.path.realpath(gds_filename)
-    k = (units, gds_absname)
+    k = (units, gds_absname, name)
     try:
         return _GDS_READER_CACHE[k]
     except KeyError:
         debug.info(4, "Creating VLSI layout from {}".format(gds_absname))
-        cell_vlsi = gdsMill.VlsiLayout(units=units)
-        reader = gdsMill.Gds2reader(cell_vlsi)
-        reader.loadFromFile(gds_absname, special_purposes)
+        cell_vlsi = read_gds_layout(gds_absname, units, name)
 
         _GDS_READER_CACHE[k] = cell_vlsi
         return cell_vlsi
@@ -107,7 +138,7 @@ def get_gds_size(name, gds_filename, units, lpp):
     try:
         return _GDS_SIZE_CACHE[k]
     except KeyError:
-        cell_vlsi = _get_gds_reader(units, gds_filename)
+        cell_vlsi = _get_gds_reader(units, gds_filename, name)
 
         measure_result = cell_vlsi.getLayoutBorder(lpp)
         if not measure_result:
@@ -142,7 +173,7 @@ def get_gds_pins(pin_names, name, gds_filename, units):
     try:
         return dict(_GDS_PINS_CACHE[k])
     except KeyError:
-        cell_vlsi = _get_gds_reader(units, gds_filename)
+        cell_vlsi = _get_gds_reader(units, gds_filename, name)
 
         cell = {}
         for pin_name in pin_names:
@@ -17,35 +17,99 @@ def relative_compare(value1, value2, error_tolerance=0.001):
     return (abs(value1 - value2) / abs(max(value1, value2)) <= error_tolerance)
 
 
-def parse_spice_list(filename, key):
-    """Parses a hspice output.lis file for a key value"""
+def set_simulation_dir(temp_path):
+    """
+    Simulate in another scratch directory so that the simulator files of
+    concurrent worker processes don't overwrite each other.
+    """
+    OPTS.openram_temp = temp_path
+    os.makedirs(OPTS.openram_temp, exist_ok=True)
+    if OPTS.spice_name == "ngspice":
+        os.environ["NGSPICE_INPUT_DIR"] = "{0}".format(OPTS.openram_temp)
 
-    lower_key = key.lower()
+
+# The contents and measures of the last parsed spice output file. They are
+# parsed again when the file changes. The key is only the file name when
+# the output came from the simulation cache.
+spice_output_cache = {}
+
+# A measure is a name followed by "=" and a number
+spice_measure_pattern = re.compile(r"([^\s=]+)\s*=\s*(-?\d+.?\d*[e]?[-+]?[0-9]*\S*)(?=\s)")
+
+
+def get_spice_output_file(filename):
+    """Returns the output file of the spice simulator with the measures"""
 
     if OPTS.spice_name == "xa" :
         # customsim has a different output file name
-        full_filename="{0}xa.meas".format(OPTS.openram_temp)
+        return "{0}xa.meas".format(OPTS.openram_temp)
     elif OPTS.spice_name == "spectre":
-        full_filename = os.path.join(OPTS.openram_temp, "delay_stim.measure")
+        return os.path.join(OPTS.openram_temp, "delay_stim.measure")
     elif OPTS.spice_name in ["Xyce", "xyce"]:
-        full_filename = os.path.join(OPTS.openram_temp, "spice_stdout.log")
+        return os.path.join(OPTS.openram_temp, "spice_stdout.log")
     else:
         # ngspice/hspice using a .lis file
-        full_filename = "{0}{1}.lis".format(OPTS.openram_temp, filename)
+        return "{0}{1}.lis".format(OPTS.openram_temp, filename)
+
+
+def parse_spice_output(filename):
+    """
+    Reads a spice output file once and returns its lower case contents and
+    a dict of all of its measures. The first value of a measure is used.
+    """
+
+    full_filename = get_spice_output_file(filename)
+    if spice_output_cache.get("key") == full_filename:
+        return spice_output_cache["contents"], spice_output_cache["measures"]
 
     try:
-        f = open(full_filename, "r")
-    except IOError:
+        stat = os.stat(full_filename)
+    except OSError:
         debug.error("Unable to open spice output file: {0}".format(full_filename),1)
         debug.archive()
 
-    contents = f.read().lower()
-    f.close()
-    # val = re.search(r"{0}\s*=\s*(-?\d+.?\d*\S*)\s+.*".format(key), contents)
-    val = re.search(r"{0}\s*=\s*(-?\d+.?\d*[e]?[-+]?[0-9]*\S*)\s+.*".format(lower_key), contents)
-    if val != None:
-        debug.info(4, "Key = " + lower_key + " Val = " + val.group(1))
-        return convert_to_float(val.group(1))
+    file_key = (full_filename, stat.st_mtime_ns, stat.st_size)
+    if spice_output_cache.get("key") == file_key:
+        return spice_output_cache["contents"], spice_output_cache["measures"]
+
+    with open(full_filename, "r") as f:
+        contents = f.read().lower()
+    measures = {}
+    for match in spice_measure_pattern.finditer(contents):
+        measures.setdefault(match.group(1), match.group(2))
+    debug.info(4, "Parsed {0} measures from {1}".format(len(measures), full_filename))
+
+    spice_output_cache.clear()
+    spice_output_cache.update(key=file_key, contents=contents, measures=measures)
+    return contents, measures
+
+
+def set_spice_output(filename, contents, measures):
+    """
+    Use the output contents and measures of a cached simulation instead of
+    the spice output file until the next simulation.
+    """
+
+    spice_output_cache.clear()
+    spice_output_cache.update(key=get_spice_output_file(filename), contents=contents, measures=measures)
+
+
+def parse_spice_list(filename, key):
+    """Parses a hspice output.lis file for a key value"""
+
+    lower_key = key.lower()
+
+    (contents, measures) = parse_spice_output(filename)
+    value = measures.get(lower_key)
+    if value == None:
+        # Keys that aren't a whole measure name are searched in the file
+        # val = re.search(r"{0}\s*=\s*(-?\d+.?\d*\S*)\s+.*".format(key), contents)
+        val = re.search(r"{0}\s*=\s*(-?\d+.?\d*[e]?[-+]?[0-9]*\S*)\s+.*".format(lower_key), contents)
+        if val != None:
+            value = val.group(1)
+    if value != None:
+        debug.info(4, "Key = " + lower_key + " Val = " + value)
+        return convert_to_float(value)
     else:
         return "Failed"
 
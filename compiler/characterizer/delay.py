@@ -7,6 +7,7 @@
 #
 import math
 import shutil
+import multiprocessing
 from openram import debug
 from openram import tech
 from openram import OPTS
@@ -19,6 +20,33 @@ from os import path
 import re
 
 
+# Delay object, scratch directory, and simulation parameters used by the
+# worker processes. They are set before the workers are forked so that they
+# don't have to be pickled.
+worker_state = None
+
+
+def simulate_worker_period(index):
+    """ Run the delay simulation of a period in a worker process. """
+
+    delay_object, temp_path, periods = worker_state
+    set_simulation_dir("{0}period{1}/".format(temp_path, index))
+    delay_object.output_path = OPTS.openram_temp
+    delay_object.period = periods[index]
+    return delay_object.run_delay_simulation()
+
+
+def simulate_worker_load_slew(index):
+    """ Simulate a load and slew pair in a worker process. """
+
+    delay_object, temp_path, load_slews = worker_state
+    set_simulation_dir("{0}load_slew{1}/".format(temp_path, index))
+    delay_object.output_path = OPTS.openram_temp
+    load, slew = load_slews[index]
+    delay_results = delay_object.simulate_load_slew(load, slew)
+    return delay_results, getattr(delay_object, "path_delays", None)
+
+
 class delay(simulation):
     """
     Functions to measure the delay and power of an SRAM at a given address and
@@ -736,9 +764,9 @@ class delay(simulation):
         debug.check(port in self.read_ports, "Characterizer requires a read port to determine a period.")
 
         feasible_period = float(tech.spice["feasible_period"])
-        time_out = 9
+        num_points = self.get_period_search_points()
+        time_out = 8
         while True:
-            time_out -= 1
             if (time_out <= 0):
                 debug.error("Timed out, could not find a feasible period.", 2)
 
@@ -747,14 +775,21 @@ class delay(simulation):
             # Set target read port for simulation
             self.targ_read_ports = [port]
 
-            debug.info(1, "Trying feasible period: {0}ns on Port {1}".format(feasible_period, port))
-            self.period = feasible_period
-            (success, results)=self.run_delay_simulation()
+            # Keep doubling the period for the periods simulated at the same time
+            periods = [feasible_period * 2**i for i in range(min(num_points, time_out))]
+            time_out -= len(periods)
+            for period in periods:
+                debug.info(1, "Trying feasible period: {0}ns on Port {1}".format(period, port))
+            all_results = self.simulate_periods(periods)
 
             # Clear these target ports after simulation
             self.targ_write_ports = []
             self.targ_read_ports = []
 
+            # Use the shortest period that works
+            for (feasible_period, (success, results)) in zip(periods, all_results):
+                if success:
+                    break
             if not success:
                 feasible_period = 2 * feasible_period
                 continue
@@ -1081,7 +1116,12 @@ class delay(simulation):
         # lb_period = 0.0
         # target_period = 0.5 * (ub_period + lb_period)
 
-        # Binary search algorithm to find the min period (max frequency) of input port
+        # K-section search algorithm to find the min period (max frequency) of input port. It is a binary
+        # search unless multiple periods are simulated at the same time.
+        num_points = self.get_period_search_points()
+        # Start with the given target period
+        target_periods = self.get_section_periods(lb_period, ub_period, num_points)
+        target_periods = sorted(set([target_period] + target_periods))[:num_points]
         time_out = 25
         # Write ports are assumed non-critical to timing, so the first available is used
         self.targ_write_ports = [self.write_ports[0]]
@@ -1091,25 +1131,33 @@ class delay(simulation):
             if (time_out <= 0):
                 debug.error("Timed out, could not converge on minimum period.", 2)
 
-            self.period = target_period
-            debug.info(1, "MinPeriod Search Port {3}: {0}ns (ub: {1} lb: {2})".format(target_period,
+            debug.info(1, "MinPeriod Search Port {3}: {0}ns (ub: {1} lb: {2})".format(", ".join(str(x) for x in target_periods),
                                                                                       ub_period,
                                                                                       lb_period,
                                                                                       port))
 
-            if self.try_period(feasible_delays):
-                ub_period = target_period
-            else:
+            # The shortest period that works is the new upper bound and the period below it is the new lower bound
+            all_results = self.simulate_periods(target_periods)
+            for (target_period, (success, results)) in zip(target_periods, all_results):
+                self.period = target_period
+                if self.check_period(feasible_delays, success, results):
+                    ub_period = target_period
+                    break
                 lb_period = target_period
 
             if relative_compare(ub_period, lb_period, error_tolerance=0.05):
                 # ub_period is always feasible.
                 return ub_period
 
-            # Update target
-            target_period = 0.5 * (ub_period + lb_period)
+            # Update targets
+            target_periods = self.get_section_periods(lb_period, ub_period, num_points)
             # key=input("press return to continue")
 
+    def get_section_periods(self, lb_period, ub_period, num_points):
+        """ Returns the periods that split the bounds into num_points + 1 equal sections """
+
+        return [((num_points + 1 - i) * lb_period + i * ub_period) / (num_points + 1) for i in range(1, num_points + 1)]
+
     def try_period(self, feasible_delays):
         """
         This tries to simulate a period and checks if the result
@@ -1118,6 +1166,14 @@ class delay(simulation):
 
         # Run Delay simulation but Power results not used.
         (success, results) = self.run_delay_simulation()
+        return self.check_period(feasible_delays, success, results)
+
+    def check_period(self, feasible_delays, success, results):
+        """
+        Checks the delay simulation results of the current period. If the
+        simulation worked and the delay is within 5% still, it returns True.
+        """
+
         if not success:
             return False
 
@@ -1352,12 +1408,12 @@ class delay(simulation):
         # Set the target simulation ports to all available ports. This make sims slower but failed sims exit anyways.
         self.targ_read_ports = self.read_ports
         self.targ_write_ports = self.write_ports
-        for load, slew in load_slews:
-            self.set_load_slew(load, slew)
-            # Find the delay, dynamic power, and leakage power of the trimmed array.
-            (success, delay_results) = self.run_delay_simulation()
-            debug.check(success, "Couldn't run a simulation. slew={0} load={1}\n".format(self.slew, self.load))
-            debug.info(1, "Simulation Passed: Port {0} slew={1} load={2}".format("All", self.slew, self.load))
+        context = self.get_worker_context(len(load_slews))
+        if context is None:
+            all_delay_results = [self.simulate_load_slew(load, slew) for load, slew in load_slews]
+        else:
+            all_delay_results = self.simulate_loads_and_slews_parallel(context, load_slews)
+        for delay_results in all_delay_results:
             # The results has a dict for every port but dicts can be empty (e.g. ports were not targeted).
             for port in self.all_ports:
                 for mname, value in delay_results[port].items():
@@ -1369,6 +1425,75 @@ class delay(simulation):
                         measure_data[port][mname].append(value)
         return measure_data
 
+    def simulate_loads_and_slews_parallel(self, context, load_slews):
+        """
+        Simulate the load and slew pairs in worker processes. Each simulation
+        uses its own scratch directory. Return the delay results in the order
+        of the pairs.
+        """
+
+        debug.info(1, "Simulating {0} loads and slews in parallel".format(len(load_slews)))
+        results = self.run_workers(context, simulate_worker_load_slew, load_slews)
+        # Leave the state of the last simulation like the serial flow
+        self.set_load_slew(*load_slews[-1])
+        if results[-1][1] is not None:
+            self.path_delays = results[-1][1]
+        return [delay_results for delay_results, path_delays in results]
+
+    def get_worker_context(self, num_jobs):
+        """ Returns the context of the worker processes or None if the jobs run in this process """
+
+        if OPTS.num_sim_jobs > 1 and num_jobs > 1:
+            try:
+                return multiprocessing.get_context("fork")
+            except ValueError:
+                debug.warning("Simulating in parallel isn't supported on this platform.")
+        return None
+
+    def run_workers(self, context, worker, jobs):
+        """ Runs a worker function for each job in worker processes and returns the results in order """
+
+        global worker_state
+        worker_state = (self, OPTS.openram_temp, jobs)
+        try:
+            with context.Pool(min(OPTS.num_sim_jobs, len(jobs))) as pool:
+                return pool.map(worker, range(len(jobs)), chunksize=1)
+        finally:
+            worker_state = None
+
+    def get_period_search_points(self):
+        """ Returns the number of periods to simulate at the same time in the period searches """
+
+        if OPTS.parallel_period_search and self.get_worker_context(OPTS.num_sim_jobs) is not None:
+            return OPTS.num_sim_jobs
+        return 1
+
+    def simulate_periods(self, periods):
+        """
+        Runs the delay simulation of the target ports at each period. The
+        periods are simulated in worker processes if there are several.
+        Returns the success and results of each simulation.
+        """
+
+        context = self.get_worker_context(len(periods))
+        if context is None:
+            all_results = []
+            for period in periods:
+                self.period = period
+                all_results.append(self.run_delay_simulation())
+            return all_results
+        return self.run_workers(context, simulate_worker_period, periods)
+
+    def simulate_load_slew(self, load, slew):
+        """Simulate an output load and input slew pair of all ports"""
+
+        self.set_load_slew(load, slew)
+        # Find the delay, dynamic power, and leakage power of the trimmed array.
+        (success, delay_results) = self.run_delay_simulation()
+        debug.check(success, "Couldn't run a simulation. slew={0} load={1}\n".format(self.slew, self.load))
+        debug.info(1, "Simulation Passed: Port {0} slew={1} load={2}".format("All", self.slew, self.load))
+        return delay_results
+
     def get_delay_lists(self, value_dict):
         """Returns dicts for path measures of bitline and sen paths"""
         sen_name_list = []
@@ -6,8 +6,10 @@
 # All rights reserved.
 #
 import os, sys, re
+import io
 import time
 import datetime
+import multiprocessing
 import numpy as np
 from openram import debug
 from openram import tech
@@ -17,6 +19,23 @@ from .setup_hold import *
 from .delay import *
 from .charutils import *
 
+# Lib object, scratch directory, and simulation threads used by the worker
+# processes. They are set before the workers are forked so that they don't
+# have to be pickled.
+worker_state = None
+
+
+def characterize_worker_corner(index):
+    """ Characterize a corner in a worker process. """
+
+    lib_object, temp_path, sim_threads = worker_state
+    set_simulation_dir("{0}corner{1}/".format(temp_path, index))
+    OPTS.num_sim_threads = sim_threads
+    # The corners already use the workers, so simulate the loads and slews
+    # in this process
+    OPTS.num_sim_jobs = 1
+    return lib_object.characterize_corner(index)
+
 
 class lib:
     """ lib file generation."""
@@ -153,22 +172,73 @@ class lib:
     def characterize_corners(self):
         """ Characterize the list of corners. """
         debug.info(1,"Characterizing corners: " + str(self.corners))
-        is_first_corner = True
-        for (self.corner,lib_name) in zip(self.corners,self.lib_files):
-            run_start = time.time()
-            debug.info(1,"Corner: " + str(self.corner))
-            (self.process, self.voltage, self.temperature) = self.corner
-            self.lib = open(lib_name, "w")
-            debug.info(1,"Writing to {0}".format(lib_name))
-            self.corner_name = lib_name.replace(self.out_dir,"").replace(".lib","")
-            self.characterize()
-            self.lib.close()
-            if self.pred_time == None:
-                total_time = time.time()-run_start
-            else:
-                total_time = self.pred_time
-            self.parse_info(self.corner,lib_name, is_first_corner, total_time)
-            is_first_corner = False
+        context = None
+        if OPTS.num_threads > 1 and len(self.corners) > 1:
+            try:
+                context = multiprocessing.get_context("fork")
+            except ValueError:
+                debug.warning("Characterizing corners in parallel isn't supported on this platform.")
+        if context is None:
+            corner_infos = [self.characterize_corner(i) for i in range(len(self.corners))]
+        else:
+            corner_infos = self.characterize_corners_parallel(context)
+        self.write_datasheet_info(corner_infos)
+
+    def characterize_corners_parallel(self, context):
+        """
+        Characterize the corners in worker processes. Each worker writes the
+        lib file of its corner. Return the datasheet information of each
+        corner in the order of the corners.
+        """
+        # The FFs are only characterized at the first corner like the serial
+        # flow, so do it once before forking
+        self.corner = self.corners[0]
+        (self.process, self.voltage, self.temperature) = self.corner
+        self.compute_setup_hold()
+
+        num_workers = min(OPTS.num_threads, len(self.corners))
+        # Share the threads between the simulations that run at the same time
+        sim_threads = max(1, min(OPTS.num_sim_threads, OPTS.num_threads // num_workers))
+        debug.info(1,"Characterizing {0} corners with {1} workers".format(len(self.corners), num_workers))
+
+        global worker_state
+        worker_state = (self, OPTS.openram_temp, sim_threads)
+        try:
+            with context.Pool(num_workers) as pool:
+                return pool.map(characterize_worker_corner, range(len(self.corners)), chunksize=1)
+        finally:
+            worker_state = None
+
+    def characterize_corner(self, index):
+        """ Characterize a corner and write its lib file. Return its datasheet information. """
+        run_start = time.time()
+        self.corner = self.corners[index]
+        lib_name = self.lib_files[index]
+        debug.info(1,"Corner: " + str(self.corner))
+        (self.process, self.voltage, self.temperature) = self.corner
+        self.lib = open(lib_name, "w")
+        debug.info(1,"Writing to {0}".format(lib_name))
+        self.corner_name = lib_name.replace(self.out_dir,"").replace(".lib","")
+        self.characterize()
+        self.lib.close()
+        if self.pred_time == None:
+            total_time = time.time()-run_start
+        else:
+            total_time = self.pred_time
+        datasheet = io.StringIO()
+        self.parse_info(datasheet, self.corner, lib_name, total_time)
+        return datasheet.getvalue()
+
+    def write_datasheet_info(self, corner_infos):
+        """ Writes the datasheet information of the corners to datasheet.info """
+        if OPTS.output_datasheet_info:
+            datasheet_path = OPTS.output_path
+        else:
+            datasheet_path = OPTS.openram_temp
+        # Open for write and truncate to not conflict with a previous run using the same name
+        with open(datasheet_path +'/datasheet.info', 'w') as datasheet:
+            for corner_info in corner_infos:
+                datasheet.write(corner_info)
 
     def characterize(self):
         """ Characterize the current corner. """
@@ -680,18 +750,8 @@ class lib:
                 self.times = self.sh.analyze(self.slews,self.slews)
 
 
-    def parse_info(self,corner,lib_name, is_first_corner, time):
-        """ Copies important characterization data to datasheet.info to be added to datasheet """
-        if OPTS.output_datasheet_info:
-            datasheet_path = OPTS.output_path
-        else:
-            datasheet_path = OPTS.openram_temp
-        # Open for write and truncate to not conflict with a previous run using the same name
-        if is_first_corner:
-            datasheet = open(datasheet_path +'/datasheet.info', 'w')
-        else:
-            datasheet = open(datasheet_path +'/datasheet.info', 'a+')
-
+    def parse_info(self, datasheet, corner, lib_name, time):
+        """ Copies important characterization data of a corner to the datasheet information """
         self.write_inp_params_datasheet(datasheet, corner, lib_name)
         self.write_signal_from_ports(datasheet,
                                 "din{1}[{0}:0]".format(self.sram.word_size - 1, '{}'),
@@ -755,7 +815,6 @@ class lib:
         self.write_model_params(datasheet, time)
 
         datasheet.write("END\n")
-        datasheet.close()
 
     def write_inp_params_datasheet(self, datasheet, corner, lib_name):
 
@@ -0,0 +1,203 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import os
+import json
+import hashlib
+from openram import debug
+from openram import OPTS
+
+
+class sim_cache:
+    """
+    This class is a persistent cache of the outputs of spice simulations on
+    the disk. Each entry has the lower case output text and its parsed
+    measures, so keys that aren't whole measure names are found like in the
+    output file. Entries are keyed by the stimulus deck with the contents of the
+    files it includes, the simulator and its executable, and the simulation
+    options. Paths in the deck aren't part of the key, so runs in other
+    temporary directories share the entries. The least recently used entries
+    are removed when the cache is larger than its size limit.
+    """
+
+    # Increase this when the simulation flow changes the measures or the
+    # format of the entries changes
+    version = 2
+
+    # Statements that include other files
+    include_statements = [".include", ".inc", ".lib", "include"]
+
+    # Hashes of the included files by their path, modification time, and size
+    file_hashes = {}
+
+    def __init__(self, path, max_size=None):
+
+        # Directory of the cache entries
+        self.path = path
+        # Maximum size of the entries in bytes (no limit if None)
+        self.max_size = max_size
+        os.makedirs(self.path, exist_ok=True)
+
+
+    def get_key(self, stim_file):
+        """ Return the key of simulating a stimulus deck. """
+
+        exe_id = None
+        if OPTS.spice_exe and os.path.isfile(OPTS.spice_exe):
+            # Use the file of the simulator to find new versions
+            stat = os.stat(OPTS.spice_exe)
+            exe_id = [os.path.realpath(OPTS.spice_exe), stat.st_size, stat.st_mtime_ns]
+        content = [self.version,
+                   OPTS.spice_name,
+                   exe_id,
+                   OPTS.use_pex,
+                   self.get_deck_hash(stim_file, [])[0]]
+        data = json.dumps(content, separators=(",", ":"))
+        return hashlib.sha256(data.encode()).hexdigest()
+
+
+    def get_deck_hash(self, file_name, parents):
+        """
+        Return the hash of a deck where the included files are replaced by
+        their hashes. The parents are the decks that include this one. Also
+        return whether the hash is the same for other parents.
+        """
+
+        file_name = os.path.realpath(file_name)
+        stat = os.stat(file_name)
+        file_key = (file_name, stat.st_mtime_ns, stat.st_size)
+        if file_key in self.file_hashes:
+            return (self.file_hashes[file_key], True)
+
+        deck_hash = hashlib.sha256()
+        same_hash = True
+        with open(file_name, "r", errors="replace") as f:
+            for line in f:
+                tokens = line.split()
+                if len(tokens) > 1 and tokens[0].lower() in self.include_statements:
+                    (include_name, text) = self.find_include_file(tokens[1], os.path.dirname(file_name))
+                    if include_name == file_name:
+                        # Libraries can include sections of themselves
+                        include_hash = "self"
+                    elif include_name in parents:
+                        include_hash = "parent{}".format(parents.index(include_name))
+                        same_hash = False
+                    elif include_name is not None:
+                        (include_hash, same_include_hash) = self.get_deck_hash(include_name, parents + [file_name])
+                        same_hash = same_hash and same_include_hash
+                    if include_name is not None:
+                        line = " ".join([tokens[0], include_hash + text] + tokens[2:]) + "\n"
+                deck_hash.update(line.replace(OPTS.openram_temp, "").encode())
+        deck_hash = deck_hash.hexdigest()
+        # The decks in the temporary directory change between simulations
+        if same_hash and not file_name.startswith(os.path.realpath(OPTS.openram_temp)):
+            self.file_hashes[file_key] = deck_hash
+        return (deck_hash, same_hash)
+
+
+    def find_include_file(self, name, path):
+        """
+        Return the included file of a statement or None if it isn't a file.
+        The include can be followed by other text without a space, so text
+        is removed from the end until a file is found. Also return the
+        removed text.
+        """
+
+        name = os.path.join(path, name.strip("\"'"))
+        text = ""
+        while not os.path.isfile(name):
+            (name, extension) = os.path.splitext(name)
+            if not extension:
+                return (None, "")
+            text = extension + text
+        return (os.path.realpath(name), text)
+
+
+    def get_file_name(self, key):
+        """ Return the file name of an entry. """
+
+        return os.path.join(self.path, key + ".json")
+
+
+    def load(self, key):
+        """ Return the output of an entry or None if it isn't cached. """
+
+        file_name = self.get_file_name(key)
+        try:
+            with open(file_name, "r") as f:
+                entry = json.load(f)
+            if not isinstance(entry.get("contents"), str) or not isinstance(entry.get("measures"), dict):
+                raise ValueError("missing the output")
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # Ignore entries that can't be loaded, they will be replaced
+            debug.warning("Could not load the simulation cache entry {0}: {1}".format(file_name, e))
+            return None
+        # Mark the entry as recently used
+        os.utime(file_name)
+        debug.info(3, "Loaded the output from the cache {}".format(file_name))
+        return entry
+
+
+    def store(self, key, entry):
+        """ Save the output of a simulation as an entry. """
+
+        file_name = self.get_file_name(key)
+        temp_name = "{}.{}.tmp".format(file_name, os.getpid())
+        with open(temp_name, "w") as f:
+            json.dump(entry, f)
+        os.replace(temp_name, file_name)
+        debug.info(3, "Saved the output to the cache {}".format(file_name))
+        self.prune()
+
+
+    def entries(self):
+        """
+        Return the key, size, and last use time of the entries from the
+        least to the most recently used.
+        """
+
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((entry.name[:-len(".json")], stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda x: x[2])
+
+
+    def prune(self):
+        """ Remove the least recently used entries that exceed the size limit. """
+
+        if self.max_size is None:
+            return
+        entries = self.entries()
+        total_size = sum(x[1] for x in entries)
+        removed = []
+        for (key, size, last_used) in entries:
+            if total_size <= self.max_size:
+                break
+            removed.append(key)
+            total_size -= size
+        if removed:
+            debug.info(2, "Removing {} simulation cache entries over the size limit".format(len(removed)))
+            self.purge(removed)
+
+
+    def purge(self, keys=None):
+        """ Remove the entries with the given keys or all of the entries. """
+
+        if keys is None:
+            keys = [x[0] for x in self.entries()]
+        for key in keys:
+            try:
+                os.remove(self.get_file_name(key))
+            except FileNotFoundError:
+                pass
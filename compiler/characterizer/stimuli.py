@@ -17,6 +17,8 @@ import numpy as np
 from openram import debug
 from openram import tech
 from openram import OPTS
+from .charutils import spice_output_cache, parse_spice_output, set_spice_output
+from .sim_cache import sim_cache
 
 
 class stimuli():
@@ -345,6 +347,20 @@ class stimuli():
         start_time = datetime.datetime.now()
         debug.check(OPTS.spice_exe != "", "No spice simulator has been found.")
 
+        # Use the output of the same simulation if it was cached
+        cache = None
+        if OPTS.sim_cache_path is not None:
+            max_size = None
+            if OPTS.sim_cache_size is not None:
+                max_size = OPTS.sim_cache_size * 1024 * 1024
+            cache = sim_cache(OPTS.sim_cache_path, max_size)
+            key = cache.get_key(temp_stim)
+            entry = cache.load(key)
+            if entry is not None:
+                set_spice_output("timing", entry["contents"], entry["measures"])
+                debug.info(2, "*** Spice: cached output of {}".format(temp_stim))
+                return
+
         if OPTS.spice_name == "xa":
             # Output the xa configurations here. FIXME: Move this to write it once.
             xa_cfg = open("{}xa.cfg".format(OPTS.openram_temp), "w")
@@ -416,6 +432,8 @@ class stimuli():
 
         spice_stdout.close()
         spice_stderr.close()
+        # The measures are parsed again from the new output
+        spice_output_cache.clear()
 
         if (proc.returncode > valid_retcode):
             debug.error("Spice simulation error: " + cmd, -1)
@@ -423,3 +441,6 @@ class stimuli():
             end_time = datetime.datetime.now()
             delta_time = round((end_time - start_time).total_seconds(), 1)
             debug.info(2, "*** Spice: {} seconds".format(delta_time))
+            if cache is not None:
+                (contents, measures) = parse_spice_output("timing")
+                cache.store(key, {"contents": contents, "measures": measures})
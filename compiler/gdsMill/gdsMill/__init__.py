@@ -10,4 +10,5 @@ from .gds2writer import *
 from .vlsiLayout import *
 from .gdsStreamer import *
 from .gdsPrimitives import *
+from .gdsReals import *
 
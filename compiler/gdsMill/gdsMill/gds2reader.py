@@ -1,6 +1,16 @@
 #!/usr/bin/env python
+import os
+import json
+import mmap
 import struct
+import numpy as np
 from .gdsPrimitives import *
+from .gdsReals import *
+
+unpackRecordLength = struct.Struct(">H").unpack_from
+unpackRecordHeader = struct.Struct(">HH").unpack_from
+#change this when the format of the structure index changes
+indexVersion = 1
 
 class Gds2reader:
     """Class to read in a file in GDSII format and populate a layout class with it"""
@@ -8,10 +18,18 @@ class Gds2reader:
     global offset
     offset=0
 
-    def __init__(self,layoutObject,debugToTerminal = 0):
+    def __init__(self,layoutObject,debugToTerminal = 0,useMmap = True):
         self.fileHandle = None
         self.layoutObject = layoutObject
         self.debugToTerminal=debugToTerminal
+        #memory-map the file and decode records from it instead of reading
+        #them one by one from the file handle
+        self.useMmap = useMmap
+        self.fileData = None
+        self.fileLength = 0
+        self.filePosition = 0
+        #key and structures of the last index so that a file isn't scanned twice
+        self.lastIndex = None
 
           #do we dump debug data to the screen
 
@@ -25,37 +43,8 @@ class Gds2reader:
         return string
 
     def ieeeDoubleFromIbmData(self,ibmData):
-       #the GDS double is in IBM 370 format like this:
-       #(1)sign (7)exponent (56)mantissa
-       #exponent is excess 64, mantissa has no implied 1
-       #a normal IEEE double is like this:
-       #(1)sign (11)exponent (52)mantissa
-       data = struct.unpack('>q',ibmData)[0]
-       sign = (data >> 63)&0x01
-       exponent = (data >> 56) & 0x7f
-       mantissa = data<<8 #chop off sign and exponent
-
-       if mantissa == 0:
-           newFloat = 0.0
-       else:
-           exponent = ((exponent-64)*4)+1023 #convert to double exponent
-           #re normalize
-           while mantissa & 0x8000000000000000 == 0:
-               mantissa<<=1
-               exponent-=1
-           mantissa<<=1  #remove the assumed high bit
-           exponent-=1
-           #check for underflow error  -- should handle these properly!
-           if(exponent<=0):
-               print("Underflow Error")
-           elif(exponent == 2047):
-               print("Overflow Error")
-           #re assemble
-           newFloat=(sign<<63)|(exponent<<52)|((mantissa>>12)&0xfffffffffffff)
-           asciiDouble = struct.pack('>q',newFloat)
-           #convert back to double
-           newFloat = struct.unpack('>d',asciiDouble)[0]
-       return newFloat
+        #the GDS double is in IBM 370 format, see gdsReals
+        return ieeeDoubleFromIbmData(ibmData)
 
     def ieeeFloatCheck(self,aFloat):
         asciiDouble = struct.pack('>d',aFloat)
@@ -71,7 +60,35 @@ class Gds2reader:
         newFloat = struct.unpack('>d',asciiDouble)[0]
         print("Check:"+str(newFloat))
 
+    def mapFile(self,fileName):
+        """Memory-map the file to read the records from it without copying"""
+        with open(fileName,"rb") as fileHandle:
+            try:
+                self.fileData = mmap.mmap(fileHandle.fileno(),0,access=mmap.ACCESS_READ)
+            except (ValueError,OSError):
+                #empty files or special files can't be mapped
+                self.fileData = None
+                return False
+        self.fileLength = len(self.fileData)
+        self.filePosition = 0
+        return True
+
+    def unmapFile(self):
+        self.fileData.close()
+        self.fileData = None
+
     def readNextRecord(self):
+        if self.fileData is not None:
+            #decode the record header in place and return the rest of the record
+            position = self.filePosition
+            if position+2 > self.fileLength:
+                return
+            recordLength = unpackRecordLength(self.fileData,position)[0]
+            #zero length means the padding after the end of the library
+            if recordLength < 2:
+                return
+            self.filePosition = position+recordLength
+            return self.fileData[position+2:position+recordLength]
         global offset
         recordLengthAscii = self.fileHandle.read(2) #first 2 bytes tell us the length of the record
         if len(recordLengthAscii)==0:
@@ -164,8 +181,7 @@ class Gds2reader:
                 if(self.debugToTerminal==1):
                     print("Mask: "+mask)
             elif(idBits==b'\x03\x05'):  #this is also wrong b/c python doesn't natively have an 8 byte float
-                userUnits=self.ieeeDoubleFromIbmData(record[2:10])
-                dbUnits=self.ieeeDoubleFromIbmData(record[10:18])
+                (userUnits,dbUnits)=ieeeDoublesFromIbmData(record[2:18]).tolist()
                 self.layoutObject.info["units"] = (userUnits,dbUnits)
                 if(self.debugToTerminal==1):
                     print("Units: 1 user unit="+str(userUnits)+" database units, 1 database unit="+str(dbUnits)+" meters.")
@@ -174,6 +190,26 @@ class Gds2reader:
             print("End of GDSII Header Found")
         return 1
 
+    def readCoordinates(self,record):
+        #XY records are packed as 4 byte signed X and Y values
+        if self.fileData is not None:
+            #decode all values at once, numpy only pays off for long records
+            count = (len(record)-2)//4
+            if count > 64:
+                values = np.frombuffer(record,dtype='>i4',offset=2,count=count).tolist()
+            else:
+                values = struct.unpack_from(">{}i".format(count),record,2)
+            return list(zip(values[0::2],values[1::2]))
+        coordinates=[]
+        numDataPoints = len(record)-2
+        for index in range(2,numDataPoints+2,8):  #incorporate the 2 byte offset
+            x=struct.unpack(">i",record[index:index+4])[0]
+            y=struct.unpack(">i",record[index+4:index+8])[0]
+            coordinates.append((x,y))
+            if(self.debugToTerminal==1):
+                print("\t\t\tXY Point: "+str(x)+","+str(y))
+        return coordinates
+
     def readBoundary(self):
         ##reads in a boundary type structure = a filled polygon
         if(self.debugToTerminal==1):
@@ -205,14 +241,7 @@ class Gds2reader:
                 if(self.debugToTerminal==1):
                     print("\t\tPurpose Layer: "+str(purposeLayer))
             elif(idBits==b'\x10\x03'):  #XY Data Points
-                numDataPoints = len(record)-2  #packed as XY coordinates 4 bytes each
-                thisBoundary.coordinates=[]
-                for index in range(2,numDataPoints+2,8):  #incorporate the 2 byte offset
-                    x=struct.unpack(">i",record[index:index+4])[0]
-                    y=struct.unpack(">i",record[index+4:index+8])[0]
-                    thisBoundary.coordinates+=[(x,y)]
-                    if(self.debugToTerminal==1):
-                        print("\t\t\tXY Point: "+str(x)+","+str(y))
+                thisBoundary.coordinates=self.readCoordinates(record)
             elif(idBits==b'\x11\x00'):  #End Of Element
                 if(self.debugToTerminal==1):
                     print("\t\tEndBoundary")
@@ -265,14 +294,7 @@ class Gds2reader:
                 if(self.debugToTerminal==1):
                     print("\t\t\tPath Width: "+str(pathWidth))
             elif(idBits==b'\x10\x03'):  #XY Data Points
-                numDataPoints = len(record)-2  #packed nas XY coordinates 4 bytes each
-                thisPath.coordinates=[]
-                for index in range(2,numDataPoints+2,8):  #incorporate the 2 byte offset
-                    x=struct.unpack(">i",record[index:index+4])[0]
-                    y=struct.unpack(">i",record[index+4:index+8])[0]
-                    thisPath.coordinates+=[(x,y)]
-                    if(self.debugToTerminal==1):
-                        print("\t\t\tXY Point: "+str(x)+","+str(y))
+                thisPath.coordinates=self.readCoordinates(record)
             elif(idBits==b'\x11\x00'):  #End Of Element
                 if(self.debugToTerminal==1):
                     print("\t\tEndPath")
@@ -313,12 +335,12 @@ class Gds2reader:
                     print( "\t\t\tRotate:"+str(rotateFlag))
                     print("\t\t\tMagnify:"+str(magnifyFlag))
             elif(idBits==b'\x1B\x05'):  #Magnify
-                magFactor=self.ieeeDoubleFromIbmData(record[2:10])
+                magFactor=ieeeDoubleFromIbmData(record[2:10])
                 thisSref.magFactor=magFactor
                 if(self.debugToTerminal==1):
                     print("\t\t\tMagnification:"+str(magFactor))
             elif(idBits==b'\x1C\x05'):  #Rotate Angle
-                rotateAngle=self.ieeeDoubleFromIbmData(record[2:10])
+                rotateAngle=ieeeDoubleFromIbmData(record[2:10])
                 thisSref.rotateAngle=rotateAngle
                 if(self.debugToTerminal==1):
                     print("\t\t\tRotate Angle (CCW):"+str(rotateAngle))
@@ -354,8 +376,8 @@ class Gds2reader:
                 if(self.debugToTerminal==1):
                     print("\t\tPLEX: "+str(plex))
             elif(idBits==b'\x12\x06'):  #Reference Name
-                aName = record[2::]
-                thisAref.aName=aName
+                aName = self.stripNonASCII(record[2::])
+                thisAref.aName=aName.rstrip()
                 if(self.debugToTerminal==1):
                     print("\t\tReference Name:"+aName)
             elif(idBits==b'\x1A\x01'):  #Transformation
@@ -369,26 +391,25 @@ class Gds2reader:
                     print("\t\t\tRotate:"+str(rotateFlag))
                     print("\t\t\tMagnify:"+str(magnifyFlag))
             elif(idBits==b'\x1B\x05'):  #Magnify
-                magFactor=self.ieeeDoubleFromIbmData(record[2:10])
+                magFactor=ieeeDoubleFromIbmData(record[2:10])
                 thisAref.magFactor=magFactor
                 if(self.debugToTerminal==1):
                     print("\t\t\tMagnification:"+str(magFactor))
             elif(idBits==b'\x1C\x05'):  #Rotate Angle
-                rotateAngle=self.ieeeDoubleFromIbmData(record[2:10])
+                rotateAngle=ieeeDoubleFromIbmData(record[2:10])
                 thisAref.rotateAngle=rotateAngle
                 if(self.debugToTerminal==1):
                     print("\t\t\tRotate Angle (CCW):"+str(rotateAngle))
+            elif(idBits==b'\x13\x02'):  #Columns and Rows
+                columns = struct.unpack(">h",record[2:4])[0]
+                rows = struct.unpack(">h",record[4:6])[0]
+                thisAref.columns=columns
+                thisAref.rows=rows
+                if(self.debugToTerminal==1):
+                    print("\t\t\tColumns: "+str(columns)+" Rows: "+str(rows))
             elif(idBits==b'\x10\x03'):  #XY Data Points
-                index=2
-                topLeftX=struct.unpack(">i",record[index:index+4])[0]
-                topLeftY=struct.unpack(">i",record[index+4:index+8])[0]
-                rightMostX=struct.unpack(">i",record[index+8:index+12])[0]
-                bottomMostY=struct.unpack(">i",record[index+12:index+16])[0]
-                thisAref.coordinates=[(topLeftX,topLeftY),(rightMostX,topLeftY),(topLeftX,bottomMostY)]
-                if(self.debugToTerminal==1):
-                    print("\t\t\tTop Left Point: "+str(topLeftX)+","+str(topLeftY))
-                    print("\t\t\t\tArray Width: "+str(rightMostX-topLeftX))
-                    print("\t\t\t\tArray Height: "+str(topLeftY-bottomMostY))
+                #the origin, the origin displaced by all columns and by all rows
+                thisAref.coordinates=self.readCoordinates(record)
             elif(idBits==b'\x11\x00'):  #End Of Element
                 if(self.debugToTerminal==1):
                     print("\t\t\tEndAref")
@@ -436,12 +457,12 @@ class Gds2reader:
                     print("\t\t\tRotate:"+str(rotateFlag))
                     print("\t\t\tMagnify:"+str(magnifyFlag))
             elif(idBits==b'\x1B\x05'):  #Magnify
-                magFactor=self.ieeeDoubleFromIbmData(record[2:10])
+                magFactor=ieeeDoubleFromIbmData(record[2:10])
                 thisText.magFactor=magFactor
                 if(self.debugToTerminal==1):
                     print("\t\t\tMagnification:"+str(magFactor))
             elif(idBits==b'\x1C\x05'):  #Rotate Angle
-                rotateAngle=self.ieeeDoubleFromIbmData(record[2:10])
+                rotateAngle=ieeeDoubleFromIbmData(record[2:10])
                 thisText.rotateAngle=rotateAngle
                 if(self.debugToTerminal==1):
                     print("\t\t\tRotate Angle (CCW):"+str(rotateAngle))
@@ -531,14 +552,7 @@ class Gds2reader:
                 if(self.debugToTerminal==1):
                     print("\t\tNode Type: "+str(nodeType))
             elif(idBits==b'\x10\x03'):  #XY Data Points
-                numDataPoints = len(record)-2  #packed as XY coordinates 4 bytes each
-                thisNode.coordinates=[]
-                for index in range(2,numDataPoints+2,8):  #incorporate the 2 byte offset
-                    x=struct.unpack(">i",record[index:index+4])[0]
-                    y=struct.unpack(">i",record[index+4:index+8])[0]
-                    thisNode.coordinates+=[(x,y)]
-                    if(self.debugToTerminal==1):
-                        print("\t\t\tXY Point: "+str(x)+","+str(y))
+                thisNode.coordinates=self.readCoordinates(record)
             elif(idBits==b'\x11\x00'):  #End Of Element
                 if(self.debugToTerminal==1):
                     print("\t\t\tEndNode")
@@ -582,14 +596,7 @@ class Gds2reader:
                 if(self.debugToTerminal==1):
                     print("\t\tBox Value: "+str(boxValue))
             elif(idBits==b'\x10\x03'):  #XY Data Points that form a closed box
-                numDataPoints = len(record)-2  #packed as XY coordinates 4 bytes each
-                thisBox.coordinates=[]
-                for index in range(2,numDataPoints+2,8):  #incorporate the 2 byte offset
-                    x=struct.unpack(">i",record[index:index+4])[0]
-                    y=struct.unpack(">i",record[index+4:index+8])[0]
-                    thisBox.coordinates+=[(x,y)]
-                    if(self.debugToTerminal==1):
-                        print("\t\t\tXY Point: "+str(x)+","+str(y))
+                thisBox.coordinates=self.readCoordinates(record)
             elif(idBits==b'\x11\x00'):  #End Of Element
                 if(self.debugToTerminal==1):
                     print("\t\t\tEndBox")
@@ -634,19 +641,19 @@ class Gds2reader:
                 if(self.debugToTerminal==1):
                     print("\tStructure Name: "+structName)
             elif(idBits==b'\x08\x00'):
-                thisStructure.boundaries+=[self.readBoundary()]
+                thisStructure.boundaries.append(self.readBoundary())
             elif(idBits==b'\x09\x00'):
-                thisStructure.paths+=[self.readPath()]
+                thisStructure.paths.append(self.readPath())
             elif(idBits==b'\x0A\x00'):
-                thisStructure.srefs+=[self.readSref()]
+                thisStructure.srefs.append(self.readSref())
             elif(idBits==b'\x0B\x00'):
-                thisStructure.arefs+=[self.readAref()]
+                thisStructure.arefs.append(self.readAref())
             elif(idBits==b'\x0C\x00'):
-                thisStructure.texts+=[self.readText()]
+                thisStructure.texts.append(self.readText())
             elif(idBits==b'\x15\x00'):
-                thisStructure.nodes+=[self.readNode()]
+                thisStructure.nodes.append(self.readNode())
             elif(idBits==b'\x2E\x02'):
-                thisStructure.boxes+=[self.readBox()]
+                thisStructure.boxes.append(self.readBox())
         if(self.debugToTerminal==1):
             print("\tEnd of Structure.")
         self.layoutObject.structures[structName]=thisStructure #add this structure to the layout object
@@ -670,167 +677,144 @@ class Gds2reader:
             print("There was an error parsing the GDS header.  Aborting...")
 
     def loadFromFile(self, fileName, special_purposes={}):
-        self.fileHandle = open(fileName,"rb")
-        self.readGds2()
-        self.fileHandle.close()
+        #the debug output needs the file offsets of the stream reader
+        if self.useMmap and self.debugToTerminal!=1 and self.mapFile(fileName):
+            self.readGds2()
+            self.unmapFile()
+        else:
+            #fall back to reading the records from the file handle
+            self.fileHandle = open(fileName,"rb")
+            self.readGds2()
+            self.fileHandle.close()
         self.layoutObject.initialize(special_purposes)
 
-##############################################
-
-    def findStruct(self,fileName,findStructName):
-	#print("find struct")
-        self.fileHandle = open(fileName,"rb")
-        self.debugToTerminal=0
-        if(self.readHeader()):  #did the header read ok?
-            record = self.findStruct_readNextStruct(findStructName)
-            while(record == 1):
-                record = self.findStruct_readNextStruct(findStructName)
-            #now we have fallen out of the while, which means we are out of structures
-            #so test for end of library
+    def scanStructures(self):
+        #find the byte range and the references of every structure without
+        #decoding their elements
+        data = self.fileData
+        dataLength = self.fileLength
+        structures = []
+        position = 0
+        while position+4 <= dataLength:
+            recordLength,recordType = unpackRecordHeader(data,position)
+            if recordLength < 4:
+                break
+            if recordType==0x0502:  #begin structure
+                start = position
+                references = []
+            elif recordType==0x0606:  #structure name
+                structName = self.stripNonASCII(data[position+4:position+recordLength])
+            elif recordType==0x1206:  #reference name of an sref or aref
+                sName = self.stripNonASCII(data[position+4:position+recordLength]).rstrip()
+                if sName not in references:
+                    references.append(sName)
+            elif recordType==0x0700:  #end structure
+                structures.append([structName,start,position+recordLength,references])
+            position += recordLength
+        return structures
+
+    def readIndex(self,fileName,cacheIndex = False):
+        """Return the list of [name, start, end, references] of the structures in the file.
+        If cacheIndex is set, the index is saved next to the file and reused until the
+        file changes, so the directory of the file must be writable."""
+        fileStat = os.stat(fileName)
+        fileKey = [indexVersion,fileStat.st_mtime_ns,fileStat.st_size]
+        if self.lastIndex is not None and self.lastIndex[0]==[os.path.realpath(fileName)]+fileKey:
+            return self.lastIndex[1]
+        indexName = fileName + ".idx"
+        if cacheIndex:
+            try:
+                with open(indexName,"r") as indexFile:
+                    index = json.load(indexFile)
+                if index["key"]==fileKey:
+                    self.lastIndex = ([os.path.realpath(fileName)]+fileKey,index["structures"])
+                    return index["structures"]
+            except (OSError,ValueError,KeyError,TypeError):
+                pass
+        if self.fileData is not None:
+            structures = self.scanStructures()
+        elif self.mapFile(fileName):
+            structures = self.scanStructures()
+            self.unmapFile()
+        else:
+            structures = []
+        if cacheIndex:
+            #the index is only a cache so it doesn't matter if it can't be saved
+            try:
+                tempName = "{}.{}.tmp".format(indexName,os.getpid())
+                with open(tempName,"w") as indexFile:
+                    json.dump({"key":fileKey,"structures":structures},indexFile)
+                os.replace(tempName,indexName)
+            except OSError:
+                pass
+        self.lastIndex = ([os.path.realpath(fileName)]+fileKey,structures)
+        return structures
+
+    def readStructures(self,fileName,structNames,cacheIndex = False):
+        #decode only the given structures and the structures they reference
+        if not self.mapFile(fileName):
+            print("There was an error mapping the GDS file.  Aborting...")
+            return 0
+        structures = self.readIndex(fileName,cacheIndex)
+        references = {x[0]:x[3] for x in structures}
+        wanted = set()
+        toVisit = [x for x in structNames if x in references]
+        while toVisit:
+            structName = toVisit.pop()
+            if structName in wanted:
+                continue
+            wanted.add(structName)
+            toVisit.extend(x for x in references[structName] if x in references)
+        self.filePosition = 0
+        result = self.readHeader()
+        if result==1:
+            #keep the file order so that the layers are found in the same order
+            for structName,start,end,structReferences in structures:
+                if structName in wanted:
+                    self.filePosition = start
+                    self.readNextStructure()
         else:
             print("There was an error parsing the GDS header.  Aborting...")
-        self.fileHandle.close()
-	#print("End the search of",findStructName)
-        #self.layoutObject.initialize()
-        return record
+        self.unmapFile()
+        return result==1
+
+    def loadStructure(self, fileName, structName, special_purposes={}, cacheIndex = False):
+        """Load only one structure and its hierarchy from a library.
+        Other structures in the file are never decoded."""
+        if not self.readStructures(fileName,[structName],cacheIndex):
+            return 0
+        if structName not in self.layoutObject.structures:
+            print("Could not find structure {} in GDS file.".format(structName))
+            return 0
+        self.layoutObject.initialize(special_purposes)
+        return 1
 
-    def findStruct_readNextStruct(self,findStructName):
-        self.debugToTerminal=0
-        thisStructure = GdsStructure()
-        record = self.readNextRecord()
-        idBits = record[0:2]
-        if(idBits==('\x05','\x02') and len(record)==26):
-            createYear = struct.unpack(">h",record[2]+record[3])[0]
-            createMonth = struct.unpack(">h",record[4]+record[5])[0]
-            createDay = struct.unpack(">h",record[6]+record[7])[0]
-            createHour = struct.unpack(">h",record[8]+record[9])[0]
-            createMinute = struct.unpack(">h",record[10]+record[11])[0]
-            createSecond = struct.unpack(">h",record[12]+record[13])[0]
-            modYear = struct.unpack(">h",record[14]+record[15])[0]
-            modMonth = struct.unpack(">h",record[16]+record[17])[0]
-            modDay = struct.unpack(">h",record[18]+record[19])[0]
-            modHour = struct.unpack(">h",record[20]+record[21])[0]
-            modMinute = struct.unpack(">h",record[22]+record[23])[0]
-            modSecond = struct.unpack(">h",record[24]+record[25])[0]
-            thisStructure.createDate=(createYear,createMonth,createDay,createHour,createMinute,createSecond)
-            thisStructure.modDate=(modYear,modMonth,modDay,modHour,modMinute,modSecond)
-        else:
-            #means we have hit the last structure, so return the record
-            #to whoever called us to do something with it
-            return record
-        wantedStruct=0
-        while 1:
-            record = self.readNextRecord()
-            idBits = record[0:2]
-            if idBits==('\x07','\x00'): break; #we've reached the end of the structure
-            elif(idBits==('\x06','\x06')):
-                structName = self.stripNonASCII(record[2::]) #(record[2:1] + record[1::]).rstrip()
-                thisStructure.name = structName
-                if(findStructName==thisStructure.name):
-                    wantedStruct=1
-                if(self.debugToTerminal==1):
-                    print("\tStructure Name: "+structName)
-            elif(idBits==('\x08','\x00')):
-                thisStructure.boundaries+=[self.readBoundary()]
-            elif(idBits==('\x09','\x00')):
-                thisStructure.paths+=[self.readPath()]
-            elif(idBits==('\x0A','\x00')):
-                thisStructure.srefs+=[self.readSref()]
-            elif(idBits==('\x0B','\x00')):
-                thisStructure.arefs+=[self.readAref()]
-            elif(idBits==('\x0C','\x00')):
-                thisStructure.texts+=[self.readText()]
-            elif(idBits==('\x15','\x00')):
-                thisStructure.nodes+=[self.readNode()]
-            elif(idBits==('\x2E','\x02')):
-                thisStructure.boxes+=[self.readBox()]
-        if(self.debugToTerminal==1):
-            print("\tEnd of Structure.")
-        self.layoutObject.structures[structName]=thisStructure #add this structure to the layout object
-        if(wantedStruct == 0):
-            return 1
-        else:
-	    #print("\tDone with collectting bound. Return")
-            return [0,thisStructure.boundaries]
+##############################################
 
-    def findLabel(self,fileName,findLabelName):
-	#print("find Label")
-        self.fileHandle = open(fileName,"rb")
+    def findStruct(self,fileName,findStructName):
+        #decode only the wanted structure and return its boundaries
         self.debugToTerminal=0
-        if(self.readHeader()):  #did the header read ok?
-            record = self.findLabel_readNextStruct(findLabelName)
-            while(record == 1):
-                record = self.findLabel_readNextStruct(findLabelName)
-            #now we have fallen out of the while, which means we are out of structures
-            #so test for end of library
-        else:
-            print("There was an error parsing the GDS header.  Aborting...")
-        self.fileHandle.close()
-	#print("End the search of",findStructName)
-        #self.layoutObject.initialize()
-        return record
+        self.readStructures(fileName,[findStructName])
+        if findStructName not in self.layoutObject.structures:
+            return
+        return [0,self.layoutObject.structures[findStructName].boundaries]
 
-    def findLabel_readNextStruct(self,findLabelName):
+    def findLabel(self,fileName,findLabelName):
+        #decode the structures in order until one of them has the label
         self.debugToTerminal=0
-        thisStructure = GdsStructure()
-        record = self.readNextRecord()
-        idBits = record[0:2]
-        if(idBits==('\x05','\x02') and len(record)==26):
-            createYear = struct.unpack(">h",record[2]+record[3])[0]
-            createMonth = struct.unpack(">h",record[4]+record[5])[0]
-            createDay = struct.unpack(">h",record[6]+record[7])[0]
-            createHour = struct.unpack(">h",record[8]+record[9])[0]
-            createMinute = struct.unpack(">h",record[10]+record[11])[0]
-            createSecond = struct.unpack(">h",record[12]+record[13])[0]
-            modYear = struct.unpack(">h",record[14]+record[15])[0]
-            modMonth = struct.unpack(">h",record[16]+record[17])[0]
-            modDay = struct.unpack(">h",record[18]+record[19])[0]
-            modHour = struct.unpack(">h",record[20]+record[21])[0]
-            modMinute = struct.unpack(">h",record[22]+record[23])[0]
-            modSecond = struct.unpack(">h",record[24]+record[25])[0]
-            thisStructure.createDate=(createYear,createMonth,createDay,createHour,createMinute,createSecond)
-            thisStructure.modDate=(modYear,modMonth,modDay,modHour,modMinute,modSecond)
-        else:
-            #means we have hit the last structure, so return the record
-            #to whoever called us to do something with it
-            return record
-        wantedLabel=0
-        wantedtexts=[GdsText()]
-        while 1:
-            record = self.readNextRecord()
-            idBits = record[0:2]
-            if idBits==('\x07','\x00'): break; #we've reached the end of the structure
-            elif(idBits==('\x06','\x06')):
-                structName = self.stripNonASCII(record[2::]) #(record[2:1] + record[1::]).rstrip()
-                thisStructure.name = structName
-                if(self.debugToTerminal==1):
-                    print("\tStructure Name: "+structName)
-            elif(idBits==('\x08','\x00')):
-                thisStructure.boundaries+=[self.readBoundary()]
-            elif(idBits==('\x09','\x00')):
-                thisStructure.paths+=[self.readPath()]
-            elif(idBits==('\x0A','\x00')):
-                thisStructure.srefs+=[self.readSref()]
-            elif(idBits==('\x0B','\x00')):
-                thisStructure.arefs+=[self.readAref()]
-            elif(idBits==('\x0C','\x00')):
-                label=self.readText()
-		#Be careful: label.textString contains one space string in it. Delete that one before use it
+        if not self.mapFile(fileName):
+            return
+        result = None
+        for structName,start,end,references in self.readIndex(fileName):
+            self.filePosition = start
+            self.readNextStructure()
+            wantedtexts=[GdsText()]
+            for label in self.layoutObject.structures[structName].texts:
+                #Be careful: label.textString contains one space string in it. Delete that one before use it
                 if( findLabelName == label.textString[0:(len(label.textString)-1)] ):
-                    wantedLabel=1
-                    wantedtexts+=[label]
-                thisStructure.texts+=[label]
-                if(self.debugToTerminal == 1):
-                    print(label.textString[0:(len(label.textString)-1)],findLabelName,( findLabelName == label.textString[0:(len(label.textString)-1)] ))
-            elif(idBits==('\x15','\x00')):
-                thisStructure.nodes+=[self.readNode()]
-            elif(idBits==('\x2E','\x02')):
-                thisStructure.boxes+=[self.readBox()]
-        if(self.debugToTerminal==1):
-            print("\tEnd of Structure.")
-        self.layoutObject.structures[structName]=thisStructure #add this structure to the layout object
-        if(wantedLabel == 0):
-            return 1
-        else:
-            #print("\tDone with collectting bound. Return")
-            return [0,wantedtexts]
+                    wantedtexts.append(label)
+            if len(wantedtexts) > 1:
+                result = [0,wantedtexts]
+                break
+        self.unmapFile()
+        return result
@@ -1,15 +1,32 @@
 #!/usr/bin/env python
 import struct
+import hashlib
+import numpy as np
 from .gdsPrimitives import *
+from .gdsReals import *
+
+packRecordLength = struct.Struct(">h").pack
+unpackRecordHeader = struct.Struct(">HH").unpack_from
 
 class Gds2writer:
     """Class to take a populated layout class and write it to a file in GDSII format"""
     ## Based on info from http://www.rulabinsky.com/cavd/text/chapc.html
 
-    def __init__(self,layoutObject):
+    def __init__(self,layoutObject,bufferSize = 1<<22,mergeStructures = False):
         self.fileHandle = 0
         self.layoutObject = layoutObject
         self.debugToTerminal=0  #do we dump debug data to the screen
+        #records are collected in a buffer which is written to the file when
+        #it gets larger than this many bytes, zero writes each record directly
+        self.bufferSize = bufferSize
+        self.buffer = None
+        #names of the structures written to an open stream
+        self.structureNames = None
+        #structures with the same elements as a written structure are not
+        #written and their references point to the written structure instead
+        self.mergeStructures = mergeStructures
+        self.structureHashes = dict()
+        self.structureAliases = dict()
 
     def print64AsBinary(self,number):
         #debugging method for binary inspection
@@ -18,65 +35,11 @@ class Gds2writer:
         print("\n")
 
     def ieeeDoubleFromIbmData(self,ibmData):
-        #the GDS double is in IBM 370 format like this:
-        #(1)sign (7)exponent (56)mantissa
-        #exponent is excess 64, mantissa has no implied 1
-        #a normal IEEE double is like this:
-        #(1)sign (11)exponent (52)mantissa
-        data = struct.unpack('>q',ibmData)[0]
-        sign = (data >> 63)&0x01
-        exponent = (data >> 56) & 0x7f
-        mantissa = data<<8 #chop off sign and exponent
-
-        if mantissa == 0:
-            newFloat = 0.0
-        else:
-            exponent = ((exponent-64)*4)+1023 #convert to double exponent
-            #re normalize
-            while mantissa & 0x8000000000000000 == 0:
-                mantissa<<=1
-                exponent-=1
-            mantissa<<=1  #remove the assumed high bit
-            exponent-=1
-            #check for underflow error  -- should handle these properly!
-            if(exponent<=0):
-                print("Underflow Error")
-            elif(exponent == 2047):
-                print("Overflow Error")
-            #re assemble
-            newFloat=(sign<<63)|(exponent<<52)|((mantissa>>12)&0xfffffffffffff)
-            asciiDouble = struct.pack('>q',newFloat)
-            #convert back to double
-            newFloat = struct.unpack('>d',asciiDouble)[0]
-        return newFloat
+        #the GDS double is in IBM 370 format, see gdsReals
+        return ieeeDoubleFromIbmData(ibmData)
 
     def ibmDataFromIeeeDouble(self,ieeeDouble):
-        asciiDouble = struct.pack('>d',ieeeDouble)
-        data = struct.unpack('>q',asciiDouble)[0]
-        sign = (data >> 63) & 0x01
-        exponent = ((data >> 52) & 0x7ff)-1023
-        mantissa = data << 12 #chop off sign and exponent
-        if(ieeeDouble == 0):
-            mantissa = 0
-            exponent = 0
-            sign = 0
-        else:
-            #add back the assumed digit
-            mantissa >>= 1
-            mantissa = mantissa|0x8000000000000000
-            exponent += 1
-            #convert the exponent
-            #need to do this in a loop to prevent sign extension!
-            for index in range (0,-exponent&3):
-                mantissa >>= 1
-                mantissa = mantissa & 0x7fffffffffffffff
-
-            exponent = (exponent+3) >> 2
-            exponent+=64
-
-        newFloat =(sign<<63)|(exponent<<56)|((mantissa>>8)&0xffffffffffffff)
-        asciiDouble = struct.pack('>q',newFloat)
-        return asciiDouble
+        return ibmDataFromIeeeDouble(ieeeDouble)
 
     def ieeeFloatCheck(self,aFloat):
         #debugging method for float construction
@@ -93,8 +56,31 @@ class Gds2writer:
 
     def writeRecord(self,record):
         recordLength = len(record)+2  #make sure to include this in the length
-        recordLengthAscii=struct.pack(">h",recordLength)
-        self.fileHandle.write(recordLengthAscii+record)
+        recordLengthAscii=packRecordLength(recordLength)
+        if self.buffer is not None:
+            self.buffer += recordLengthAscii
+            self.buffer += record
+        else:
+            self.fileHandle.write(recordLengthAscii+record)
+
+    def flushBuffer(self):
+        if self.buffer:
+            self.fileHandle.write(self.buffer)
+            self.buffer = bytearray()
+
+    def packCoordinates(self,coordinates):
+        #XY records are packed as 4 byte signed X and Y values
+        count = len(coordinates)
+        if count > 32:
+            #pack long coordinate lists as an array
+            values = np.array([(coordinate[0],coordinate[1]) for coordinate in coordinates])
+            if values.dtype.kind == 'f':
+                #truncate towards zero like int()
+                values = np.trunc(values)
+            if values.min() < -2**31 or values.max() >= 2**31:
+                raise struct.error("XY coordinate out of range")
+            return values.astype('>i4').tobytes()
+        return struct.pack(">{}i".format(2*count),*[int(value) for coordinate in coordinates for value in (coordinate[0],coordinate[1])])
 
     def writeHeader(self):
         ##  Header
@@ -159,8 +145,10 @@ class Gds2writer:
             self.writeRecord(idBits+mask)
         if("units" in self.layoutObject.info):
             idBits=b'\x03\x05'
-            userUnits=self.ibmDataFromIeeeDouble(self.layoutObject.info["units"][0])
-            dbUnits=self.ibmDataFromIeeeDouble((self.layoutObject.info["units"][0]*1e-6/self.layoutObject.info["units"][1])*self.layoutObject.info["units"][1])
+            units=ibmDataFromIeeeDoubles([self.layoutObject.info["units"][0],
+                                          (self.layoutObject.info["units"][0]*1e-6/self.layoutObject.info["units"][1])*self.layoutObject.info["units"][1]])
+            userUnits=units[0:8]
+            dbUnits=units[8:16]
 
             #User Units are hardcoded, since the floating point implementation of gdsMill is not adequate,
 		#resulting in a different value being written in output stream.  Hardcoded to sram compiler's outputed gds units.
@@ -206,13 +194,7 @@ class Gds2writer:
             self.writeRecord(idBits+dataType)
         if(thisBoundary.coordinates!=""):
             idBits=b'\x10\x03' # XY Data Points
-            coordinateRecord = idBits
-            for coordinate in thisBoundary.coordinates:
-                x=struct.pack(">i",int(coordinate[0]))
-                y=struct.pack(">i",int(coordinate[1]))
-                coordinateRecord+=x
-                coordinateRecord+=y
-            self.writeRecord(coordinateRecord)
+            self.writeRecord(idBits+self.packCoordinates(thisBoundary.coordinates))
         idBits=b'\x11\x00' #End Of Element
         coordinateRecord = idBits
         self.writeRecord(coordinateRecord)
@@ -250,13 +232,7 @@ class Gds2writer:
             self.writeRecord(idBits+pathWidth)
         if(thisPath.coordinates):
             idBits=b'\x10\x03' #XY Data Points
-            coordinateRecord = idBits
-            for coordinate in thisPath.coordinates:
-                x=struct.pack(">i",int(coordinate[0]))
-                y=struct.pack(">i",int(coordinate[1]))
-                coordinateRecord+=x
-                coordinateRecord+=y
-            self.writeRecord(coordinateRecord)
+            self.writeRecord(idBits+self.packCoordinates(thisPath.coordinates))
         idBits=b'\x11\x00' #End Of Element
         coordinateRecord = idBits
         self.writeRecord(coordinateRecord)
@@ -274,10 +250,9 @@ class Gds2writer:
             self.writeRecord(idBits+plex)
         if(thisSref.sName!=""):
             idBits=b'\x12\x06'
-            if (len(thisSref.sName) % 2 != 0):
-                sName = thisSref.sName+"\0"
-            else:
-                sName = thisSref.sName
+            sName = self.structureAliases.get(thisSref.sName.rstrip("\x00"),thisSref.sName)
+            if (len(sName) % 2 != 0):
+                sName = sName+"\0"
             self.writeRecord(idBits+sName.encode())
         if(thisSref.transFlags!=""):
             idBits=b'\x1A\x01'
@@ -293,22 +268,15 @@ class Gds2writer:
             self.writeRecord(idBits+transFlags)
         if(thisSref.magFactor!=""):
             idBits=b'\x1B\x05'
-            magFactor=self.ibmDataFromIeeeDouble(thisSref.magFactor)
+            magFactor=ibmDataFromIeeeDouble(thisSref.magFactor)
             self.writeRecord(idBits+magFactor)
         if(thisSref.rotateAngle!=""):
             idBits=b'\x1C\x05'
-            rotateAngle=self.ibmDataFromIeeeDouble(thisSref.rotateAngle)
+            rotateAngle=ibmDataFromIeeeDouble(thisSref.rotateAngle)
             self.writeRecord(idBits+rotateAngle)
         if(thisSref.coordinates!=""):
             idBits=b'\x10\x03' #XY Data Points
-            coordinateRecord = idBits
-            coordinate = thisSref.coordinates
-            x=struct.pack(">i",int(coordinate[0]))
-            y=struct.pack(">i",int(coordinate[1]))
-            coordinateRecord+=x
-            coordinateRecord+=y
-	    #print(thisSref.coordinates)
-            self.writeRecord(coordinateRecord)
+            self.writeRecord(idBits+self.packCoordinates([thisSref.coordinates]))
         idBits=b'\x11\x00' #End Of Element
         coordinateRecord = idBits
         self.writeRecord(coordinateRecord)
@@ -326,11 +294,10 @@ class Gds2writer:
             self.writeRecord(idBits+plex)
         if(thisAref.aName):
             idBits=b'\x12\x06'
-            if (len(thisAref.aName) % 2 != 0):
-                aName = thisAref.aName+"\0"
-            else:
-                aName = thisAref.aName
-            self.writeRecord(idBits+aName)
+            aName = self.structureAliases.get(thisAref.aName.rstrip("\x00"),thisAref.aName)
+            if (len(aName) % 2 != 0):
+                aName = aName+"\0"
+            self.writeRecord(idBits+aName.encode())
         if(thisAref.transFlags):
             idBits=b'\x1A\x01'
             mirrorFlag = int(thisAref.transFlags[0])<<15
@@ -345,21 +312,19 @@ class Gds2writer:
             self.writeRecord(idBits+transFlags)
         if(thisAref.magFactor!=""):
             idBits=b'\x1B\x05'
-            magFactor=self.ibmDataFromIeeeDouble(thisAref.magFactor)
+            magFactor=ibmDataFromIeeeDouble(thisAref.magFactor)
             self.writeRecord(idBits+magFactor)
         if(thisAref.rotateAngle!=""):
             idBits=b'\x1C\x05'
-            rotateAngle=self.ibmDataFromIeeeDouble(thisAref.rotateAngle)
+            rotateAngle=ibmDataFromIeeeDouble(thisAref.rotateAngle)
             self.writeRecord(idBits+rotateAngle)
+        if(thisAref.columns!=""):
+            idBits=b'\x13\x02' #Columns and Rows
+            colRow = struct.pack(">hh",thisAref.columns,thisAref.rows)
+            self.writeRecord(idBits+colRow)
         if(thisAref.coordinates):
             idBits=b'\x10\x03' #XY Data Points
-            coordinateRecord = idBits
-            for coordinate in thisAref.coordinates:
-                x=struct.pack(">i",coordinate[0])
-                y=struct.pack(">i",coordinate[1])
-                coordinateRecord+=x
-                coordinateRecord+=y
-            self.writeRecord(coordinateRecord)
+            self.writeRecord(idBits+self.packCoordinates(thisAref.coordinates))
         idBits=b'\x11\x00' #End Of Element
         coordinateRecord = idBits
         self.writeRecord(coordinateRecord)
@@ -396,11 +361,11 @@ class Gds2writer:
             self.writeRecord(idBits+transFlags)
         if(thisText.magFactor!=""):
             idBits=b'\x1B\x05'
-            magFactor=self.ibmDataFromIeeeDouble(thisText.magFactor)
+            magFactor=ibmDataFromIeeeDouble(thisText.magFactor)
             self.writeRecord(idBits+magFactor)
         if(thisText.rotateAngle!=""):
             idBits=b'\x1C\x05'
-            rotateAngle=self.ibmDataFromIeeeDouble(thisText.rotateAngle)
+            rotateAngle=ibmDataFromIeeeDouble(thisText.rotateAngle)
             self.writeRecord(idBits+rotateAngle)
         if(thisText.pathType !=""):
             idBits=b'\x21\x02'  #Path type
@@ -419,13 +384,7 @@ class Gds2writer:
             self.writeRecord(idBits+transFlags)
         if(thisText.coordinates!=""):
             idBits=b'\x10\x03' #XY Data Points
-            coordinateRecord = idBits
-            for coordinate in thisText.coordinates:
-                x=struct.pack(">i",int(coordinate[0]))
-                y=struct.pack(">i",int(coordinate[1]))
-                coordinateRecord+=x
-                coordinateRecord+=y
-            self.writeRecord(coordinateRecord)
+            self.writeRecord(idBits+self.packCoordinates(thisText.coordinates))
         if(thisText.textString):
             idBits=b'\x19\x06'
             textString = thisText.textString
@@ -454,15 +413,9 @@ class Gds2writer:
             idBits=b'\x2A\x02'
             nodeType = struct.pack(">h",thisNode.nodeType)
             self.writeRecord(idBits+nodeType)
-        if(thisText.coordinates!=""):
+        if(thisNode.coordinates!=""):
             idBits=b'\x10\x03' #XY Data Points
-            coordinateRecord = idBits
-            for coordinate in thisText.coordinates:
-                x=struct.pack(">i",int(coordinate[0]))
-                y=struct.pack(">i",int(coordinate[1]))
-                coordinateRecord+=x
-                coordinateRecord+=y
-            self.writeRecord(coordinateRecord)
+            self.writeRecord(idBits+self.packCoordinates(thisNode.coordinates))
 
         idBits=b'\x11\x00' #End Of Element
         coordinateRecord = idBits
@@ -493,21 +446,25 @@ class Gds2writer:
             self.writeRecord(idBits+boxValue)
         if(thisBox.coordinates!=""):
             idBits=b'\x10\x03' #XY Data Points
-            coordinateRecord = idBits
-            for coordinate in thisBox.coordinates:
-                x=struct.pack(">i",int(coordinate[0]))
-                y=struct.pack(">i",int(coordinate[1]))
-                coordinateRecord+=x
-                coordinateRecord+=y
-            self.writeRecord(coordinateRecord)
+            self.writeRecord(idBits+self.packCoordinates(thisBox.coordinates))
 
         idBits=b'\x11\x00' #End Of Element
         coordinateRecord = idBits
         self.writeRecord(coordinateRecord)
 
     def writeNextStructure(self,structureName):
+        self.writeStructure(structureName,self.layoutObject.structures[structureName])
+
+    def writeStructure(self,structureName,thisStructure):
+        #remember the names of the structures in an open stream
+        if self.structureNames is not None:
+            self.structureNames.add(structureName)
+        elements = None
+        if self.mergeStructures:
+            elements = self.packElements(thisStructure)
+            if self.mergeStructure(structureName,elements):
+                return
         #first put in the structure head
-        thisStructure = self.layoutObject.structures[structureName]
         idBits=b'\x05\x02'
         createYear = struct.pack(">h",thisStructure.createDate[0])
         createMonth = struct.pack(">h",thisStructure.createDate[1])
@@ -531,7 +488,20 @@ class Gds2writer:
             structureName = structureName + '\x00'
         self.writeRecord(idBits+structureName.encode())
         #now go through all the structure elements and write them in
+        if elements is None:
+            self.writeElements(thisStructure)
+        elif self.buffer is not None:
+            self.buffer += elements
+        else:
+            self.fileHandle.write(elements)
+        #put in the structure tail
+        idBits=b'\x07\x00'
+        self.writeRecord(idBits)
+        #write the buffer out in large chunks
+        if self.buffer is not None and len(self.buffer) >= self.bufferSize:
+            self.flushBuffer()
 
+    def writeElements(self,thisStructure):
         for boundary in thisStructure.boundaries:
             self.writeBoundary(boundary)
         for path in thisStructure.paths:
@@ -546,20 +516,97 @@ class Gds2writer:
             self.writeNode(node)
         for box in thisStructure.boxes:
             self.writeBox(box)
-        #put in the structure tail
-        idBits=b'\x07\x00'
-        self.writeRecord(idBits)
+
+    def packElements(self,thisStructure):
+        #collect the element records of a structure instead of writing them
+        buffer = self.buffer
+        self.buffer = bytearray()
+        self.writeElements(thisStructure)
+        elements = self.buffer
+        self.buffer = buffer
+        return elements
+
+    def mergeStructure(self,structureName,elements):
+        #return True if a structure with the same elements, in any order,
+        #was already written and refer to that structure from now on
+        name = structureName.rstrip("\x00")
+        if name == getattr(self.layoutObject,"rootStructureName","").rstrip("\x00"):
+            #never drop the top structure
+            return False
+        chunks = []
+        start = 0
+        position = 0
+        while position < len(elements):
+            (recordLength,recordType) = unpackRecordHeader(elements,position)
+            position += recordLength
+            if recordType == 0x1100:  #end of element
+                chunks.append(bytes(elements[start:position]))
+                start = position
+        key = hashlib.sha256(b"".join(sorted(chunks))).digest()
+        if key in self.structureHashes:
+            self.structureAliases[name] = self.structureHashes[key]
+            return True
+        self.structureHashes[key] = name
+        return False
+
+    def getStructureOrder(self):
+        #order the structures so that the referenced structures come first
+        structures = self.layoutObject.structures
+        names = dict((name.rstrip("\x00"),name) for name in structures)
+        order = []
+        visited = set()
+        def visit(structureName):
+            visited.add(structureName)
+            thisStructure = structures[structureName]
+            for reference in [x.sName for x in thisStructure.srefs]+[x.aName for x in thisStructure.arefs]:
+                referenceName = names.get(reference.rstrip("\x00"))
+                if referenceName is not None and referenceName not in visited:
+                    visit(referenceName)
+            order.append(structureName)
+        for structureName in structures:
+            if structureName not in visited:
+                visit(structureName)
+        return order
 
     def writeGds2(self):
         self.writeHeader();  #first, put the header in
         #go through each structure in the layout and write it to the file
-        for structureName in self.layoutObject.structures:
+        #merged structures are replaced before they are referenced
+        if self.mergeStructures:
+            structureNames = self.getStructureOrder()
+        else:
+            structureNames = self.layoutObject.structures
+        for structureName in structureNames:
             self.writeNextStructure(structureName)
         #at the end, put in the END LIB record
         idBits=b'\x04\x00'
         self.writeRecord(idBits)
 
+    def openStream(self,fileName):
+        #start a library whose structures are written one at a time
+        #with writeStructure, the header comes from the layout object
+        self.fileHandle = open(fileName,"wb")
+        if self.bufferSize > 0:
+            self.buffer = bytearray()
+        self.structureNames = set()
+        self.writeHeader()
+
+    def closeStream(self):
+        #at the end, put in the END LIB record
+        idBits=b'\x04\x00'
+        self.writeRecord(idBits)
+        if self.buffer is not None:
+            self.flushBuffer()
+            self.buffer = None
+        self.structureNames = None
+        self.fileHandle.close()
+
     def writeToFile(self,fileName):
         self.fileHandle = open(fileName,"wb")
+        if self.bufferSize > 0:
+            self.buffer = bytearray()
         self.writeGds2()
+        if self.buffer is not None:
+            self.flushBuffer()
+            self.buffer = None
         self.fileHandle.close()
@@ -136,6 +136,9 @@ class GdsAref:
         self.transFlags=[0,0,0]
         self.magFactor=""
         self.rotateAngle=""
+        self.columns=""
+        self.rows=""
+        #the origin, the origin displaced by all columns and by all rows
         self.coordinates=""
 
         
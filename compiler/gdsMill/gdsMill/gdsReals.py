@@ -0,0 +1,72 @@
+import math
+import struct
+import numpy as np
+
+#GDS reals are 8 byte IBM 370 doubles like this:
+#(1)sign (7)exponent (56)mantissa
+#exponent is excess 64 in powers of 16, mantissa has no implied 1
+#a normal IEEE double is like this:
+#(1)sign (11)exponent (52)mantissa
+unpackIbmData = struct.Struct(">Q").unpack
+packIbmData = struct.Struct(">Q").pack
+ibmMantissaMask = 0x00ffffffffffffff
+#bits of an IEEE mantissa including the implied 1
+ieeeMantissaBits = 53
+
+def ieeeDoubleFromIbmData(ibmData):
+    """Convert an 8 byte IBM real to a float, truncating the mantissa to 53 bits"""
+    data = unpackIbmData(ibmData)[0]
+    mantissa = data & ibmMantissaMask
+    if mantissa == 0:
+        return 0.0
+    exponent = (data >> 56) & 0x7f
+    #drop the mantissa bits that don't fit in a double
+    extraBits = mantissa.bit_length() - ieeeMantissaBits
+    if extraBits > 0:
+        mantissa = (mantissa >> extraBits) << extraBits
+    newFloat = math.ldexp(mantissa, ((exponent-64)*4)-56)
+    if data >> 63:
+        return -newFloat
+    return newFloat
+
+def ibmDataFromIeeeDouble(ieeeDouble):
+    """Convert a float to an 8 byte IBM real"""
+    if ieeeDouble == 0:
+        return bytes(8)
+    data = unpackIbmData(struct.pack(">d",ieeeDouble))[0]
+    sign = data >> 63
+    #exponent of the mantissa in [0.5,1) like frexp
+    exponent = ((data >> 52) & 0x7ff)-1022
+    #add back the assumed digit and make room for the base 16 shift
+    mantissa = ((data & 0xfffffffffffff) | 0x10000000000000) << 3
+    mantissa >>= (-exponent) & 3
+    exponent = ((exponent+3) >> 2)+64
+    return packIbmData((sign << 63)|(exponent << 56)|mantissa)
+
+def ieeeDoublesFromIbmData(ibmData):
+    """Convert a buffer of 8 byte IBM reals to an array of floats"""
+    data = np.frombuffer(ibmData,dtype=">u8").astype(np.uint64)
+    mantissa = data & np.uint64(ibmMantissaMask)
+    exponent = ((data >> np.uint64(56)) & np.uint64(0x7f)).astype(np.int64)
+    #drop the mantissa bits that don't fit in a double
+    extraBits = np.zeros(len(data),dtype=np.uint64)
+    for bits in range(ieeeMantissaBits,56):
+        extraBits += (mantissa >= np.uint64(1 << bits)).astype(np.uint64)
+    mantissa = (mantissa >> extraBits) << extraBits
+    newFloats = np.ldexp(mantissa.astype(np.float64),((exponent-64)*4)-56)
+    return np.where(data >> np.uint64(63),-newFloats,newFloats)
+
+def ibmDataFromIeeeDoubles(ieeeDoubles):
+    """Convert an array of floats to a buffer of 8 byte IBM reals"""
+    values = np.asarray(ieeeDoubles,dtype=np.float64).reshape(-1)
+    data = values.view(np.uint64)
+    sign = data >> np.uint64(63)
+    #exponent of the mantissa in [0.5,1) like frexp
+    exponent = ((data >> np.uint64(52)) & np.uint64(0x7ff)).astype(np.int64)-1022
+    #add back the assumed digit and make room for the base 16 shift
+    mantissa = ((data & np.uint64(0xfffffffffffff)) | np.uint64(0x10000000000000)) << np.uint64(3)
+    mantissa >>= ((-exponent) & 3).astype(np.uint64)
+    exponent = ((exponent+3) >> 2)+64
+    newData = (sign << np.uint64(63))|(exponent.astype(np.uint64) << np.uint64(56))|mantissa
+    newData[values == 0] = 0
+    return newData.astype(">u8").tobytes()
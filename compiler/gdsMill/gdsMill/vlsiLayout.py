@@ -67,6 +67,11 @@ class VlsiLayout:
         # Multiple labels may be disconnected.
         self.pins = {}
 
+        # Shapes of each structure on a layer-purpose pair before transforms
+        self.shapeCache = {}
+        # Instances of the xyTree grouped by structure with their transforms
+        self.treeGroups = None
+
     def rotatedCoordinates(self,coordinatesToRotate,rotateAngle):
         # helper method to rotate a list of coordinates
         angle=math.radians(float(0))
@@ -115,6 +120,17 @@ class VlsiLayout:
                     new_sref_name = self.padText(prefix + base_sref_name)
                 sref.sName = new_sref_name
                 #print("SREF: {0} -> {1}".format(base_sref_name, new_sref_name))
+            for aref in new_structures[new_name].arefs:
+                if aref.aName[-1] == "\x00":
+                    base_aref_name = aref.aName[0:-1]
+                else:
+                    base_aref_name = aref.aName
+                # Don't do library cells
+                if prefix_name and base_aref_name.startswith(prefix_name):
+                    new_aref_name = aref.aName
+                else:
+                    new_aref_name = self.padText(prefix + base_aref_name)
+                aref.aName = new_aref_name
         self.structures = new_structures
 
     def rename(self,newName):
@@ -185,6 +201,9 @@ class VlsiLayout:
                 for sref in self.structures[name].srefs: #go through each reference
                     if sref.sName in structureNames: #and compare to our list
                         structureNames.remove(sref.sName)
+            for aref in self.structures[name].arefs: #arrays reference structures too
+                if aref.aName in structureNames:
+                    structureNames.remove(aref.aName)
 
         debug.check(len(structureNames)==1,"Multiple possible root structures in the layout: {}".format(str(structureNames)))
         self.rootStructureName = structureNames[0]
@@ -196,42 +215,20 @@ class VlsiLayout:
         if startingStructureName == None:
             startingStructureName = self.rootStructureName
 
-        # set up the rotation matrix
-        if(rotateAngle == None or rotateAngle == ""):
-            angle = 0
-        else:
-            # MRG: Added negative to make CCW rotate 8/29/18
-            angle = math.radians(float(rotateAngle))
-        mRotate = np.array([[math.cos(angle), -math.sin(angle), 0.0],
-                            [math.sin(angle), math.cos(angle), 0.0],
-                            [0.0, 0.0, 1.0]])
-        # set up the translation matrix
-        translateX = float(coordinates[0])
-        translateY = float(coordinates[1])
-        mTranslate = np.array([[1.0, 0.0, translateX],
-                               [0.0, 1.0, translateY],
-                               [0.0, 0.0, 1.0]])
-        # set up the scale matrix (handles mirror X)
-        scaleX = 1.0
-        if (transFlags[0]):
-            scaleY = -1.0
-        else:
-            scaleY = 1.0
-        mScale = np.array([[scaleX, 0.0, 0.0],
-                           [0.0, scaleY, 0.0],
-                           [0.0, 0.0, 1.0]])
         # we need to keep track of all transforms in the hierarchy
         # when we add an element to the xy tree, we apply all transforms from the bottom up
-        transformPath.append((mRotate,mScale,mTranslate))
+        transformPath.append(getTransformMatrices(rotateAngle, transFlags, coordinates))
         if delegateFunction != None:
             delegateFunction(startingStructureName, transformPath)
         # starting with a particular structure, we will recursively traverse the tree
         # ********might have to set the recursion level deeper for big layouts!
         try:
-            if(len(self.structures[startingStructureName].srefs)>0): #does this structure reference any others?
+            references = getStructureReferences(self.structures[startingStructureName])
+            if(len(references)>0): #does this structure reference any others?
                 # if so, go through each and call this function again
                 # if not, return back to the caller (caller can be this function)
-                for sref in self.structures[startingStructureName].srefs:
+                # array references are expanded into one reference per element
+                for sref in references:
                     # here, we are going to modify the sref coordinates based on the parent objects rotation
                     self.traverseTheHierarchy(startingStructureName = sref.sName,
                                               delegateFunction = delegateFunction,
@@ -242,7 +239,6 @@ class VlsiLayout:
         except KeyError:
             debug.error("Could not find structure {} in GDS file.".format(startingStructureName),-1)
 
-            # MUST HANDLE AREFs HERE AS WELL
         # when we return, drop the last transform from the transformPath
         del transformPath[-1]
         return
@@ -260,26 +256,9 @@ class VlsiLayout:
                 self.processLabelPins((layerNumber, None))
 
     def populateCoordinateMap(self):
+        self.treeGroups = None
         def addToXyTree(startingStructureName = None,transformPath = None):
-            uVector = np.array([[1.0],[0.0],[0.0]]) #start with normal basis vectors
-            vVector = np.array([[0.0],[1.0],[0.0]])
-            origin = np.array([[0.0],[0.0],[1.0]]) #and an origin (Z component is 1.0 to indicate position instead of vector)
-            #make a copy of all the transforms and reverse it
-            reverseTransformPath = transformPath[:]
-            if len(reverseTransformPath) > 1:
-                reverseTransformPath.reverse()
-            #now go through each transform and apply them to our basis and origin in succession
-            for transform in reverseTransformPath:
-                origin = np.dot(transform[0], origin)  #rotate
-                uVector = np.dot(transform[0], uVector)  #rotate
-                vVector = np.dot(transform[0], vVector)  #rotate
-                origin = np.dot(transform[1], origin)  #scale
-                uVector = np.dot(transform[1], uVector)  #scale
-                vVector = np.dot(transform[1], vVector)  #scale
-                origin = np.dot(transform[2], origin)  #translate
-                #we don't need to do a translation on the basis vectors
-                #uVector = transform[2] * uVector  #translate
-                #vVector = transform[2] * vVector  #translate
+            (origin, uVector, vVector) = getCoordinateSpace(transformPath)
             #populate the xyTree with each structureName and coordinate space
             self.xyTree.append((startingStructureName,origin,uVector,vVector))
         self.traverseTheHierarchy(delegateFunction = addToXyTree)
@@ -366,35 +345,53 @@ class VlsiLayout:
         layoutToAddSref = GdsSref()
         layoutToAddSref.sName = StructureName
         layoutToAddSref.coordinates = offsetInLayoutUnits
-
-        if mirror or rotate:
-
-            layoutToAddSref.transFlags = [0,0,0]
-            # transFlags = (mirror around x-axis, magnification, rotation)
-            # If magnification or rotation is true, it is the flags are then
-            # followed by an amount in the record
-            if mirror=="R90":
-                rotate = 90.0
-            if mirror=="R180":
-                rotate = 180.0
-            if mirror=="R270":
-                rotate = 270.0
-            if rotate:
-                #layoutToAddSref.transFlags[2] = 1
-                layoutToAddSref.rotateAngle = rotate
-            if mirror == "x" or mirror == "MX":
-                layoutToAddSref.transFlags[0] = 1
-            if mirror == "y" or mirror == "MY": #NOTE: "MY" option will override specified rotate angle
-                layoutToAddSref.transFlags[0] = 1
-                #layoutToAddSref.transFlags[2] = 1
-                layoutToAddSref.rotateAngle = 180.0
-            if mirror == "xy" or mirror == "XY": #NOTE: "XY" option will override specified rotate angle
-                #layoutToAddSref.transFlags[2] = 1
-                layoutToAddSref.rotateAngle = 180.0
+        self.setReferenceTransform(layoutToAddSref, mirror, rotate)
 
         #add the sref to the root structure
         self.structures[self.rootStructureName].srefs.append(layoutToAddSref)
 
+    def addArrayInstance(self,layoutToAdd,nameOfLayout,offsetInMicrons,columns,rows,pitchInMicrons,mirror=None,rotate=None):
+        """
+        Method to insert an array of one layout into another.
+        Elements are placed at the offset plus multiples of the column and
+        row pitch and all of them have the same mirror and rotation.
+        """
+        offsetInLayoutUnits = (self.userUnits(offsetInMicrons[0]),self.userUnits(offsetInMicrons[1]))
+        pitchInLayoutUnits = (self.userUnits(pitchInMicrons[0]),self.userUnits(pitchInMicrons[1]))
+        #library structure names may be padded
+        StructureFound = any(nameOfLayout in structure for structure in layoutToAdd.structures)
+        debug.check(StructureFound,"Could not find layout to instantiate {}".format(nameOfLayout))
+
+        if layoutToAdd != self:
+            #first, we need to combine the structure dictionaries from both layouts
+            for structure in layoutToAdd.structures:
+                if structure not in self.structures:
+                    self.structures[structure]=layoutToAdd.structures[structure]
+            #also combine the "layers in use" list
+            for layerNumber in layoutToAdd.layerNumbersInUse:
+                if layerNumber not in self.layerNumbersInUse:
+                    self.layerNumbersInUse.append(layerNumber)
+
+        layoutToAddAref = GdsAref()
+        layoutToAddAref.aName = nameOfLayout
+        layoutToAddAref.columns = columns
+        layoutToAddAref.rows = rows
+        #the array is defined by its origin and the origin displaced by all columns and by all rows
+        layoutToAddAref.coordinates = [offsetInLayoutUnits,
+                                       (offsetInLayoutUnits[0]+columns*pitchInLayoutUnits[0],offsetInLayoutUnits[1]),
+                                       (offsetInLayoutUnits[0],offsetInLayoutUnits[1]+rows*pitchInLayoutUnits[1])]
+        self.setReferenceTransform(layoutToAddAref, mirror, rotate)
+
+        #add the aref to the root structure
+        self.structures[self.rootStructureName].arefs.append(layoutToAddAref)
+
+    def setReferenceTransform(self,reference,mirror,rotate):
+        """
+        Set the transform flags and the rotation of a structure reference.
+        """
+        if mirror or rotate:
+            (reference.rotateAngle, reference.transFlags) = getReferenceTransform(mirror, rotate)
+
     def addBox(self,layerNumber=0, purposeNumber=0, offsetInMicrons=(0,0), width=1.0, height=1.0,center=False):
         """
         Method to add a box to a layout
@@ -763,6 +760,8 @@ class VlsiLayout:
         # Get all of the shapes on the layer at all levels
         # and transform them to the current level
         shapes = self.getAllShapes(lpp)
+        # Index the shapes to only check the ones near each label
+        shapeGrid = None
 
         for label in labels:
             label_coordinate = label.coordinates[0]
@@ -786,9 +785,10 @@ class VlsiLayout:
 
             except:
                 pass
-            for boundary in shapes:
-                if self.labelInRectangle(user_coordinate, boundary):
-                    pin_shapes.append((lpp, boundary))
+            if shapeGrid is None or shapeGrid.shapes is not shapes:
+                shapeGrid = RectangleGrid(shapes)
+            for index in shapeGrid.findEnclosing(user_coordinate):
+                pin_shapes.append((lpp, shapes[index]))
 
             try:
                 self.pins[label_text]
@@ -813,27 +813,71 @@ class VlsiLayout:
 
         return blockages
 
-    def getAllShapes(self, lpp):
+    def getAllShapes(self, lpp, asArray=False):
         """
         Return all shapes on a given layer in [llx, lly, urx, ury]
         format and user units for rectangles
         and [coordinate 1, coordinate 2,...] format and user
         units for polygons.
+        If asArray is set, return an array of the rectangles
+        and a list of (x, y) point arrays of the polygons instead.
         """
         boundaries = set()
-        for TreeUnit in self.xyTree:
-            # print(TreeUnit[0])
-            boundaries.update(self.getShapesInStructure(lpp, TreeUnit))
+        for shapes in self.getTransformedShapes(lpp):
+            boundaries.update(shapes)
 
         # Convert to user units
-        user_boundaries = []
-        for boundary in boundaries:
-            boundaries_list = []
-            for i in range(0, len(boundary)):
-                boundaries_list.append(boundary[i]*self.units[0])
-            user_boundaries.append(boundaries_list)
+        unit = self.units[0]
+        user_boundaries = [[x*unit for x in boundary] for boundary in boundaries]
+        if asArray:
+            return shapesToArrays(user_boundaries)
         return user_boundaries
 
+    def getStructureShapes(self, structureName, lpp):
+        """
+        Return the shapes of a structure on a given layer
+        before any transforms. They are computed once for
+        every structure and layer.
+        """
+        boundaries = self.structures[structureName].boundaries
+        key = (structureName, lppKey(lpp))
+        try:
+            (cachedBoundaries, cachedCount, shapes) = self.shapeCache[key]
+            # Shapes are only appended to structures
+            if cachedBoundaries is boundaries and cachedCount == len(boundaries):
+                return shapes
+        except KeyError:
+            pass
+        shapes = getLocalShapes(boundaries, lpp)
+        self.shapeCache[key] = (boundaries, len(boundaries), shapes)
+        return shapes
+
+    def getTreeGroups(self):
+        """
+        Group the instances in the xyTree by structure.
+        Return a list of structure names, xyTree indices and
+        transforms for transformShapes.
+        """
+        if self.treeGroups is None or self.treeGroups[0] != len(self.xyTree):
+            self.treeGroups = (len(self.xyTree), groupTreeTransforms(self.xyTree, str))
+        return self.treeGroups[1]
+
+    def getTransformedShapes(self, lpp):
+        """
+        Return the shapes on a given layer for every
+        instance in the xyTree like getShapesInStructure.
+        All instances of a structure are transformed at once.
+        """
+        treeShapes = [[]] * len(self.xyTree)
+        for (structureName, indices, transforms) in self.getTreeGroups():
+            shapes = self.getStructureShapes(structureName, lpp)
+            if not shapes[2]:
+                continue
+            for index, instanceShapes in zip(indices, transformShapes(shapes, transforms)):
+                treeShapes[index] = instanceShapes
+        return treeShapes
+
+
     def getShapesInStructure(self, lpp, structure):
         """
         Go through all the shapes in a structure and
@@ -948,6 +992,75 @@ class VlsiLayout:
             return False
 
 
+class RectangleGrid:
+    """
+    Uniform grid of buckets over the shapes to find the shapes
+    that enclose a point without checking all of them.
+    Shapes are checked like labelInRectangle, which uses
+    their first four values as [leftx, bottomy, rightx, topy].
+    """
+
+    def __init__(self, shapes, maxCells=16):
+        self.shapes = shapes
+        self.rects = np.array([x[0:4] for x in shapes], dtype=float).reshape(-1, 4)
+        count = len(self.rects)
+        self.cells = max(1, int(math.sqrt(count)))
+        self.bucketCells = np.zeros(0, dtype=int)
+        self.bucketShapes = np.zeros(0, dtype=int)
+        self.large = np.zeros(0, dtype=int)
+        if count == 0:
+            return
+        # Bounds of the shapes in case the first corner isn't the lower left
+        lower = np.minimum(self.rects[:, 0:2], self.rects[:, 2:4])
+        upper = np.maximum(self.rects[:, 0:2], self.rects[:, 2:4])
+        self.origin = lower.min(axis=0)
+        self.cellSize = np.maximum((upper.max(axis=0) - self.origin) / self.cells, 1e-12)
+        lowerCells = self.getCells(lower)
+        upperCells = self.getCells(upper)
+        spans = upperCells - lowerCells + 1
+        cellCounts = spans[:, 0] * spans[:, 1]
+        # Large shapes would fill too many buckets so they are always checked
+        isLarge = cellCounts > maxCells
+        self.large = np.nonzero(isLarge)[0]
+        small = np.nonzero(~isLarge)[0]
+        # Add each small shape to all of the buckets that it overlaps
+        repeats = cellCounts[small]
+        shapeIds = np.repeat(small, repeats)
+        offsets = np.arange(len(shapeIds)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        widths = spans[shapeIds, 0]
+        cellX = lowerCells[shapeIds, 0] + offsets % widths
+        cellY = lowerCells[shapeIds, 1] + offsets // widths
+        bucketCells = cellX * self.cells + cellY
+        order = np.lexsort((shapeIds, bucketCells))
+        self.bucketCells = bucketCells[order]
+        self.bucketShapes = shapeIds[order]
+
+    def getCells(self, points):
+        """
+        Return the grid cells of the points.
+        """
+        cells = np.floor((points - self.origin) / self.cellSize).astype(int)
+        return np.clip(cells, 0, self.cells - 1)
+
+    def findEnclosing(self, coordinate):
+        """
+        Return the indices of the shapes that enclose the coordinate
+        in the order of the shapes.
+        """
+        if len(self.rects) == 0:
+            return []
+        point = np.array(coordinate[0:2], dtype=float)
+        (cellX, cellY) = self.getCells(point)
+        cell = cellX * self.cells + cellY
+        start = np.searchsorted(self.bucketCells, cell, side="left")
+        end = np.searchsorted(self.bucketCells, cell, side="right")
+        candidates = np.concatenate((self.bucketShapes[start:end], self.large))
+        rects = self.rects[candidates]
+        enclosing = (point[0] >= rects[:, 0]) & (point[0] <= rects[:, 2]) & \
+                    (point[1] >= rects[:, 1]) & (point[1] <= rects[:, 3])
+        return np.sort(candidates[enclosing]).tolist()
+
+
 def sameLPP(lpp1, lpp2):
     """
     Check if the layers and purposes are the same.
@@ -969,6 +1082,238 @@ def sameLPP(lpp1, lpp2):
     return lpp1[0] == lpp2[0] and lpp1[1] == lpp2[1]
 
 
+def getReferenceTransform(mirror, rotate):
+    """
+    Return the rotation angle and transform flags of a
+    structure reference with the given mirror and rotation.
+    """
+    rotateAngle = ""
+    # transFlags = (mirror around x-axis, magnification, rotation)
+    # If magnification or rotation is true, it is the flags are then
+    # followed by an amount in the record
+    transFlags = [0,0,0]
+    if mirror=="R90":
+        rotate = 90.0
+    if mirror=="R180":
+        rotate = 180.0
+    if mirror=="R270":
+        rotate = 270.0
+    if rotate:
+        #transFlags[2] = 1
+        rotateAngle = rotate
+    if mirror == "x" or mirror == "MX":
+        transFlags[0] = 1
+    if mirror == "y" or mirror == "MY": #NOTE: "MY" option will override specified rotate angle
+        transFlags[0] = 1
+        #transFlags[2] = 1
+        rotateAngle = 180.0
+    if mirror == "xy" or mirror == "XY": #NOTE: "XY" option will override specified rotate angle
+        #transFlags[2] = 1
+        rotateAngle = 180.0
+    return (rotateAngle, transFlags)
+
+
+def getTransformMatrices(rotateAngle, transFlags, coordinates):
+    """
+    Return the rotation, scale and translation matrices
+    of a structure reference.
+    """
+    # set up the rotation matrix
+    if(rotateAngle == None or rotateAngle == ""):
+        angle = 0
+    else:
+        # MRG: Added negative to make CCW rotate 8/29/18
+        angle = math.radians(float(rotateAngle))
+    mRotate = np.array([[math.cos(angle), -math.sin(angle), 0.0],
+                        [math.sin(angle), math.cos(angle), 0.0],
+                        [0.0, 0.0, 1.0]])
+    # set up the translation matrix
+    translateX = float(coordinates[0])
+    translateY = float(coordinates[1])
+    mTranslate = np.array([[1.0, 0.0, translateX],
+                           [0.0, 1.0, translateY],
+                           [0.0, 0.0, 1.0]])
+    # set up the scale matrix (handles mirror X)
+    scaleX = 1.0
+    if (transFlags[0]):
+        scaleY = -1.0
+    else:
+        scaleY = 1.0
+    mScale = np.array([[scaleX, 0.0, 0.0],
+                       [0.0, scaleY, 0.0],
+                       [0.0, 0.0, 1.0]])
+    return (mRotate, mScale, mTranslate)
+
+
+def getCoordinateSpace(transformPath):
+    """
+    Apply all transforms of a path from the bottom up and
+    return the origin and basis vectors of the structure.
+    """
+    uVector = np.array([[1.0],[0.0],[0.0]]) #start with normal basis vectors
+    vVector = np.array([[0.0],[1.0],[0.0]])
+    origin = np.array([[0.0],[0.0],[1.0]]) #and an origin (Z component is 1.0 to indicate position instead of vector)
+    #now go through each transform and apply them to our basis and origin in succession
+    for transform in reversed(transformPath):
+        origin = np.dot(transform[0], origin)  #rotate
+        uVector = np.dot(transform[0], uVector)  #rotate
+        vVector = np.dot(transform[0], vVector)  #rotate
+        origin = np.dot(transform[1], origin)  #scale
+        uVector = np.dot(transform[1], uVector)  #scale
+        vVector = np.dot(transform[1], vVector)  #scale
+        origin = np.dot(transform[2], origin)  #translate
+        #we don't need to do a translation on the basis vectors
+    return (origin, uVector, vVector)
+
+
+def groupTreeTransforms(xyTree, key):
+    """
+    Group the instances of an xyTree by the key of their
+    structure. Return a list of the structure, xyTree indices
+    and transforms for transformShapes of every group.
+    """
+    groups = {}
+    for index, (structure, origin, uVector, vVector) in enumerate(xyTree):
+        (indices, transforms) = groups.setdefault(key(structure), (structure, [], []))[1:]
+        indices.append(index)
+        transforms.append((uVector[0][0], uVector[1][0],
+                           vVector[0][0], vVector[1][0],
+                           origin[0][0], origin[1][0]))
+    return [(structure, indices, np.array(transforms, dtype=float))
+            for (structure, indices, transforms) in groups.values()]
+
+
+def getStructureReferences(structure):
+    """
+    Return the structure references of a structure with the
+    array references expanded into one reference per element.
+    """
+    if not structure.arefs:
+        return structure.srefs
+    references = list(structure.srefs)
+    for aref in structure.arefs:
+        references.extend(getArrayElements(aref))
+    return references
+
+
+def getArrayElements(aref):
+    """
+    Return the elements of an array reference as structure
+    references, row by row.
+    """
+    def getOffset(index, distance, count):
+        # Keep integer coordinates when the pitch is an integer
+        if (index*distance) % count == 0:
+            return (index*distance)//count
+        return index*distance/count
+    (origin, columnEnd, rowEnd) = aref.coordinates[0:3]
+    elements = []
+    for row in range(aref.rows):
+        for column in range(aref.columns):
+            sref = GdsSref()
+            sref.sName = aref.aName
+            sref.transFlags = aref.transFlags
+            sref.magFactor = aref.magFactor
+            sref.rotateAngle = aref.rotateAngle
+            sref.coordinates = (origin[0] + getOffset(column, columnEnd[0]-origin[0], aref.columns)
+                                + getOffset(row, rowEnd[0]-origin[0], aref.rows),
+                                origin[1] + getOffset(column, columnEnd[1]-origin[1], aref.columns)
+                                + getOffset(row, rowEnd[1]-origin[1], aref.rows))
+            elements.append(sref)
+    return elements
+
+
+def lppKey(lpp):
+    """
+    Return a hashable key of a layer-purpose pair.
+    """
+    if isinstance(lpp[1], list):
+        return (lpp[0], tuple(lpp[1]))
+    return (lpp[0], lpp[1])
+
+
+def getLocalShapes(boundaries, lpp):
+    """
+    Return the rectangles and polygons on a given layer.
+    Rectangles are an array of [llx, lly, urx, ury] rows
+    and polygons are arrays of (x, y) points. The order is
+    a list of (isPolygon, index) in the boundary order.
+    """
+    rects = []
+    polygons = []
+    order = []
+    for boundary in boundaries:
+        if sameLPP((boundary.drawingLayer, boundary.purposeLayer), lpp):
+            if len(boundary.coordinates) != 5:
+                # if shape is a polygon (used in DFF)
+                order.append((True, len(polygons)))
+                polygons.append(np.array([(x[0], x[1]) for x in boundary.coordinates], dtype=float).reshape(-1, 2))
+            else:
+                # else shape is a rectangle
+                left_bottom = boundary.coordinates[0]
+                right_top = boundary.coordinates[2]
+                order.append((False, len(rects)))
+                rects.append((left_bottom[0], left_bottom[1], right_top[0], right_top[1]))
+    return (np.array(rects, dtype=float).reshape(-1, 4), polygons, order)
+
+
+def transformShapes(shapes, transforms):
+    """
+    Apply the transforms of the instances to the shapes of
+    getLocalShapes. Transforms are rows of
+    [u[0], u[1], v[0], v[1], origin[0], origin[1]].
+    Return a list of shape tuples for each instance that
+    are the same as getShapesInStructure.
+    """
+    (rects, polygons, order) = shapes
+    u0 = transforms[:, 0:1]
+    u1 = transforms[:, 1:2]
+    v0 = transforms[:, 2:3]
+    v1 = transforms[:, 3:4]
+    ox = transforms[:, 4:5]
+    oy = transforms[:, 5:6]
+    rectList = None
+    if len(rects):
+        # Rotate both corners like transformRectangle
+        x1 = rects[:, 0] * u0 + rects[:, 1] * v0
+        y1 = rects[:, 0] * u1 + rects[:, 1] * v1
+        x2 = rects[:, 2] * u0 + rects[:, 3] * v0
+        y2 = rects[:, 2] * u1 + rects[:, 3] * v1
+        # Pick the same corner as min() and max() do when they're equal
+        rectList = np.stack((np.where(x2 < x1, x2, x1) + ox,
+                             np.where(y2 < y1, y2, y1) + oy,
+                             np.where(x2 > x1, x2, x1) + ox,
+                             np.where(y2 > y1, y2, y1) + oy), axis=-1).tolist()
+        if not polygons:
+            return [[tuple(x) for x in instanceRects] for instanceRects in rectList]
+    polygonLists = []
+    for polygon in polygons:
+        x = polygon[:, 0] * u0 + polygon[:, 1] * v0 + ox
+        y = polygon[:, 0] * u1 + polygon[:, 1] * v1 + oy
+        polygonLists.append(np.stack((x, y), axis=-1).reshape(len(transforms), -1).tolist())
+    treeShapes = []
+    for instance in range(len(transforms)):
+        instanceShapes = []
+        for (isPolygon, index) in order:
+            if isPolygon:
+                instanceShapes.append(tuple(polygonLists[index][instance]))
+            else:
+                instanceShapes.append(tuple(rectList[instance][index]))
+        treeShapes.append(instanceShapes)
+    return treeShapes
+
+
+def shapesToArrays(shapes):
+    """
+    Split shapes in the getAllShapes format into an array of
+    [llx, lly, urx, ury] rectangles and a list of (x, y)
+    point arrays of polygons.
+    """
+    rects = np.array([x for x in shapes if len(x) == 4], dtype=float).reshape(-1, 4)
+    polygons = [np.array(x, dtype=float).reshape(-1, 2) for x in shapes if len(x) != 4]
+    return (rects, polygons)
+
+
 def boundaryArea(A):
     """
     Returns boundary area for sorting.
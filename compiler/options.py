@@ -128,6 +128,24 @@ class options(optparse.Values):
     # Whether we should do the final power routing
     route_supplies = True
     supply_pin_type = "ring"
+    # Shortest path search of the router graphs
+    # (can be "astar" or "bidirectional")
+    route_search = "astar"
+    # Heuristic of the router's A* search (can be "targets" or "bbox")
+    route_heuristic = "targets"
+    # Directory of the persistent route cache (disabled if None)
+    route_cache_path = None
+    # Maximum size of the route cache in megabytes
+    route_cache_size = 100
+    # Directory of the router profiling reports (disabled if None)
+    route_report_path = None
+    # Write regular arrays of the same instance as GDSII array references
+    gds_array_refs = False
+    # Write only one of the GDSII structures with identical contents
+    gds_merge_structures = False
+    # Private directory of the persistent cache of parsed GDSII library
+    # cells that only the current user can write (disabled if None)
+    gds_cache_path = None
     # This determines whether LVS and DRC is checked at all.
     check_lvsdrc = False
     # This determines whether LVS and DRC is checked for every submodule.
@@ -174,6 +192,16 @@ class options(optparse.Values):
     num_threads = 1
     # Number of threads to use in ngspice/hspice
     num_sim_threads = 3
+    # Number of load/slew simulations to run at the same time, each with
+    # num_sim_threads threads
+    num_sim_jobs = 1
+    # Search the minimum period by simulating num_sim_jobs periods at the
+    # same time instead of one at a time
+    parallel_period_search = False
+    # Directory of the persistent cache of spice measures (disabled if None)
+    sim_cache_path = None
+    # Maximum size of the spice measure cache in megabytes (no limit if None)
+    sim_cache_size = 1024
 
     # Some tools (e.g. Xyce) use other separators like ":"
     hier_seperator = "."
@@ -0,0 +1,158 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California, Santa Cruz
+# All rights reserved.
+#
+import math
+import numpy as np
+
+
+class bbox_tree:
+    """
+    This class represents a balanced bbox tree that is bulk-loaded with the
+    sort-tile-recursive (STR) method. The whole tree is built at once and
+    each level is kept in flat arrays so that many points or shapes can be
+    searched together without recursion.
+    """
+
+    def __init__(self, shapes, layers=None, node_size=8):
+
+        # Shapes in the tree in the given order
+        self.shapes = list(shapes)
+        # Optional layer numbers of the shapes to filter query results
+        self.layers = None
+        if layers is not None:
+            self.layers = np.array(layers, dtype=int)
+        # Maximum number of children of a tree node
+        self.node_size = node_size
+        # Tree levels from the bottom to the root. Each level has the bounds of
+        # its nodes and the ranges of their children in the level below.
+        self.levels = []
+        self.bulk_load()
+
+
+    def __len__(self):
+
+        return len(self.shapes)
+
+
+    def sort_tile(self, rects):
+        """
+        Return the STR order of the rectangles. Rectangles are sorted into
+        vertical slices by their x-centers and each slice is sorted by the
+        y-centers.
+        """
+
+        count = len(rects)
+        centers_x = rects[:, 0] + rects[:, 2]
+        centers_y = rects[:, 1] + rects[:, 3]
+        num_slices = math.ceil(math.sqrt(math.ceil(count / self.node_size)))
+        slice_size = num_slices * self.node_size
+        order = np.argsort(centers_x, kind="stable")
+        slices = np.arange(count) // slice_size
+        return order[np.lexsort((centers_y[order], slices))]
+
+
+    def bulk_load(self):
+        """ Build the tree levels from the shapes. """
+
+        rects = np.array([[ll.x, ll.y, ur.x, ur.y] for ll, ur in (x.rect for x in self.shapes)],
+                         dtype=float).reshape(-1, 4)
+        if len(rects) == 0:
+            return
+        # Leaf entries in STR order and their indices in the shape list
+        self.ids = self.sort_tile(rects)
+        self.rects = rects[self.ids]
+        bounds = self.rects
+        while True:
+            # Pack consecutive entries into parent nodes
+            starts = np.arange(0, len(bounds), self.node_size)
+            ends = np.minimum(starts + self.node_size, len(bounds))
+            node_bounds = np.column_stack((np.minimum.reduceat(bounds[:, 0], starts),
+                                           np.minimum.reduceat(bounds[:, 1], starts),
+                                           np.maximum.reduceat(bounds[:, 2], starts),
+                                           np.maximum.reduceat(bounds[:, 3], starts)))
+            if len(node_bounds) > 1:
+                order = self.sort_tile(node_bounds)
+                node_bounds, starts, ends = node_bounds[order], starts[order], ends[order]
+            self.levels.append((node_bounds, starts, ends))
+            if len(node_bounds) == 1:
+                break
+            bounds = node_bounds
+
+
+    def overlaps(self, bounds, rects):
+        """ Return which bounds overlap the rectangles at the same index. """
+
+        return (bounds[:, 0] <= rects[:, 2]) & (rects[:, 0] <= bounds[:, 2]) & \
+               (bounds[:, 1] <= rects[:, 3]) & (rects[:, 1] <= bounds[:, 3])
+
+
+    def query_rects(self, rects, layers=None):
+        """
+        Search many rectangles at once. Return the arrays of query indices and
+        shape indices of all overlaps, sorted by the query and then the shape
+        order. If the layers are given, only the shapes on the same layer as
+        the query are returned.
+        """
+
+        rects = np.array(rects, dtype=float).reshape(-1, 4)
+        query_ids = np.arange(len(rects))
+        node_ids = np.zeros(len(rects), dtype=int)
+        if len(self.shapes) == 0:
+            return query_ids[:0], node_ids[:0]
+        # Go down the tree level by level, keeping the (query, node) pairs
+        # that overlap
+        for bounds, starts, ends in reversed(self.levels):
+            mask = self.overlaps(bounds[node_ids], rects[query_ids])
+            query_ids = query_ids[mask]
+            node_ids = node_ids[mask]
+            # Replace the nodes with their children
+            counts = ends[node_ids] - starts[node_ids]
+            firsts = np.cumsum(counts) - counts
+            query_ids = np.repeat(query_ids, counts)
+            node_ids = np.repeat(starts[node_ids] - firsts, counts) + np.arange(len(query_ids))
+        # Check the leaf entries
+        mask = self.overlaps(self.rects[node_ids], rects[query_ids])
+        if layers is not None and self.layers is not None:
+            layers = np.array(layers, dtype=int).reshape(-1)
+            mask &= self.layers[self.ids[node_ids]] == layers[query_ids]
+        query_ids = query_ids[mask]
+        shape_ids = self.ids[node_ids[mask]]
+        order = np.lexsort((shape_ids, query_ids))
+        return query_ids[order], shape_ids[order]
+
+
+    def query_points(self, points, layers=None):
+        """
+        Search many points at once. Return the list of point indices and the
+        shapes that overlap them for the points that overlap any shape. Points
+        can also be given as an array of x and y values.
+        """
+
+        if not isinstance(points, np.ndarray):
+            points = np.array([[p.x, p.y] for p in points], dtype=float)
+        points = points.reshape(-1, 2)
+        query_ids, shape_ids = self.query_rects(np.hstack((points, points)), layers)
+        if len(query_ids) == 0:
+            return []
+        indices, firsts = np.unique(query_ids, return_index=True)
+        groups = np.split(shape_ids, firsts[1:])
+        return [(i, [self.shapes[j] for j in group]) for i, group in zip(indices.tolist(), groups)]
+
+
+    def query_point(self, point, layer=None):
+        """ Return the shapes in the tree that overlap the given point. """
+
+        layers = None if layer is None else [layer]
+        shape_ids = self.query_rects([point.x, point.y, point.x, point.y], layers)[1]
+        return [self.shapes[i] for i in shape_ids]
+
+
+    def query_shape(self, shape, layer=None):
+        """ Return the shapes in the tree that overlap the given shape. """
+
+        ll, ur = shape.rect
+        layers = None if layer is None else [layer]
+        shape_ids = self.query_rects([ll.x, ll.y, ur.x, ur.y], layers)[1]
+        return [self.shapes[i] for i in shape_ids]
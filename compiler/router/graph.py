@@ -4,13 +4,13 @@
 # All rights reserved.
 #
 import heapq
-from copy import deepcopy
+import numpy as np
 from openram import debug
+from openram import OPTS
 from openram.base.vector import vector
 from openram.base.vector3d import vector3d
 from openram.tech import drc
-from .bbox import bbox
-from .bbox_node import bbox_node
+from .bbox_tree import bbox_tree
 from .graph_node import graph_node
 from .graph_probe import graph_probe
 from .graph_utils import snap
@@ -25,6 +25,10 @@ class graph:
         self.router = router
         self.source_nodes = []
         self.target_nodes = []
+        # Number of nodes expanded by the last shortest path search
+        self.expanded_count = 0
+        # Statistics of the graph and its search for profiling
+        self.stats = {}
 
 
     def is_routable(self, shape):
@@ -82,7 +86,7 @@ class graph:
         probe_shape = graph_probe(p1, p2, self.router.get_lpp(p1.z))
         pll, pur = probe_shape.rect
         # Check if any blockage blocks this probe
-        for blockage in self.blockage_bbox_tree.iterate_shape(probe_shape):
+        for blockage in self.iterate_probe_blockages(probe_shape):
             bll, bur = blockage.rect
             # Not on the same layer
             if not blockage.same_lpp(blockage.lpp, probe_shape.lpp):
@@ -98,10 +102,15 @@ class graph:
         return False
 
 
-    def is_node_blocked(self, node):
-        """ Return if a node is blocked by a blockage. """
+    def is_node_blocked(self, node, blockages=None, end_shapes=None):
+        """
+        Return if a node is blocked by a blockage. The blockages that overlap
+        the node can be given if they are already known. Nodes in the safe
+        region of the end shapes aren't blocked, and the end shapes are the
+        source and target by default.
+        """
 
-        p = node.center
+        p = self.get_center(node)
         x = p.x
         y = p.y
         z = p.z
@@ -115,7 +124,11 @@ class graph:
         half_wide = self.router.half_wire
         spacing = snap(self.router.track_space + half_wide + drc["grid"])
         blocked = False
-        for blockage in self.blockage_bbox_tree.iterate_point(p):
+        if blockages is None:
+            blockages = self.iterate_point_blockages(p)
+        if end_shapes is None:
+            end_shapes = [self.source, self.target]
+        for blockage in blockages:
             ll, ur = blockage.rect
             # Not on the same layer
             if self.router.get_zindex(blockage.lpp) != z:
@@ -150,30 +163,37 @@ class graph:
             xdiff = closest(p.x, xs)
             ydiff = closest(p.y, ys)
             if xdiff == 0 and ydiff == 0:
-                if blockage in [self.source, self.target]:
+                if blockage in end_shapes:
                     return False
             elif xdiff < spacing and ydiff < spacing:
                 blocked = True
         return blocked
 
 
-    def is_via_blocked(self, nodes):
-        """ Return if a via on the given point is blocked by another via. """
+    def is_via_blocked(self, node):
+        """
+        Return if a via from the given node to the node above is blocked by
+        another via.
+        """
 
-        # If the nodes are blocked by a blockage other than a via
-        for node in nodes:
-            if self.is_node_blocked(node):
-                return True
+        # If the nodes are blocked by a blockage other than a via (blocked
+        # nodes are already marked)
+        if self.blocked[node] or self.blocked[node + 1]:
+            return True
 
         # Skip if no via is present
         if len(self.graph_vias) == 0:
             return False
 
-        # If the nodes are blocked by a via
-        x = node.center.x
-        y = node.center.y
-        z = node.center.z
-        for via in self.via_bbox_tree.iterate_point(node.center):
+        return self.is_via_point_blocked(self.get_center(node))
+
+
+    def is_via_point_blocked(self, point):
+        """ Return if a via on the given point is blocked by another via. """
+
+        x = point.x
+        y = point.y
+        for via in self.iterate_point_vias(point):
             ll, ur = via.rect
             # Not overlapping
             if ll.x > x or x > ur.x or ll.y > y or y > ur.y:
@@ -194,17 +214,17 @@ class graph:
         self.target = target
 
         # Find the region to be routed and only include objects inside that region
-        region = deepcopy(source)
-        region.bbox([target])
-        region = region.inflated_pin(spacing=self.router.track_width + self.router.track_space)
+        region = self.router.get_route_region(source, target)
         debug.info(4, "Routing region is {}".format(region.rect))
 
         # Find the blockages that are in the routing area
         self.graph_blockages = []
+        self.graph_blockage_set = set()
         self.find_graph_blockages(region)
 
         # Find the vias that are in the routing area
         self.graph_vias = []
+        self.graph_via_set = set()
         self.find_graph_vias(region)
 
         # Generate the cartesian values from shapes in the area
@@ -213,6 +233,8 @@ class graph:
         region.bbox(self.graph_blockages)
         # Find and include edge shapes to prevent DRC errors
         self.find_graph_blockages(region)
+        # Save the final routing region
+        self.region = region
         # Build the bbox tree
         self.build_bbox_trees()
         # Generate the graph nodes from cartesian values
@@ -221,21 +243,50 @@ class graph:
         self.save_end_nodes()
         debug.info(4, "Number of blockages detected in the routing region: {}".format(len(self.graph_blockages)))
         debug.info(4, "Number of vias detected in the routing region: {}".format(len(self.graph_vias)))
-        debug.info(4, "Number of nodes in the routing graph: {}".format(len(self.nodes)))
+        debug.info(4, "Number of nodes in the routing graph: {}".format(self.get_node_count()))
+
+        # Save the statistics of the graph
+        ll, ur = region.rect
+        self.stats["region_width"] = snap(ur.x - ll.x)
+        self.stats["region_height"] = snap(ur.y - ll.y)
+        self.stats["blockages"] = len(self.graph_blockages)
+        self.stats["vias"] = len(self.graph_vias)
+        self.stats["nodes"] = int(self.blocked.size)
+        self.stats["free_nodes"] = self.get_node_count()
+        self.stats["edges"] = int(np.count_nonzero(self.neighbors >= 0)) // 2
+
+
+    def iterate_point_blockages(self, point):
+        """ Iterate over blockages in the graph that overlap the given point. """
+
+        yield from self.blockage_bbox_tree.query_point(point)
+
+
+    def iterate_probe_blockages(self, probe):
+        """ Iterate over blockages in the graph that overlap the given probe. """
+
+        yield from self.blockage_bbox_tree.query_shape(probe)
+
+
+    def iterate_point_vias(self, point):
+        """ Iterate over vias in the graph that overlap the given point. """
+
+        yield from self.via_bbox_tree.query_point(point)
 
 
     def find_graph_blockages(self, region):
         """ Find blockages that overlap the routing region. """
 
-        for blockage in self.router.blockages:
+        for blockage in self.router.blockages.overlapping(region):
             # Skip if already included
-            if blockage in self.graph_blockages:
+            if blockage in self.graph_blockage_set:
                 continue
             # Set the region's lpp to current blockage's lpp so that the
             # overlaps method works
             region.lpp = blockage.lpp
             if region.overlaps(blockage):
                 self.graph_blockages.append(blockage)
+                self.graph_blockage_set.add(blockage)
         # Make sure that the source or target fake pins are included as blockage
         for shape in [self.source, self.target]:
             for blockage in self.graph_blockages:
@@ -244,49 +295,54 @@ class graph:
                     break
             else:
                 self.graph_blockages.append(shape)
+                self.graph_blockage_set.add(shape)
 
 
     def find_graph_vias(self, region):
         """ Find vias that overlap the routing region. """
 
-        for via in self.router.vias:
+        for via in self.router.vias.overlapping(region):
             # Skip if already included
-            if via in self.graph_vias:
+            if via in self.graph_via_set:
                 continue
             # Set the regions's lpp to current via's lpp so that the
             # overlaps method works
             region.lpp = via.lpp
             if region.overlaps(via):
                 self.graph_vias.append(via)
+                self.graph_via_set.add(via)
 
 
     def build_bbox_trees(self):
         """ Build bbox trees for blockages and vias in the routing region. """
 
-        # Bbox tree for blockages
-        self.blockage_bbox_tree = bbox_node(bbox(self.graph_blockages[0]))
-        for i in range(1, len(self.graph_blockages)):
-            self.blockage_bbox_tree.insert(bbox(self.graph_blockages[i]))
+        # Bbox tree for blockages, which also keeps their layers to search all
+        # graph nodes at once
+        layers = [self.router.get_zindex(x.lpp) for x in self.graph_blockages]
+        self.blockage_bbox_tree = bbox_tree(self.graph_blockages, layers)
         # Bbox tree for vias
-        if len(self.graph_vias) == 0:
-            return
-        self.via_bbox_tree = bbox_node(bbox(self.graph_vias[0]))
-        for i in range(1, len(self.graph_vias)):
-            self.via_bbox_tree.insert(bbox(self.graph_vias[i]))
+        self.via_bbox_tree = bbox_tree(self.graph_vias)
 
 
-    def generate_cartesian_values(self):
+    def generate_cartesian_values(self, blockages=None, vias=None, is_routable=None):
         """
         Generate x and y values from all the corners of the shapes in the
-        routing region.
+        routing region. Other shapes and a test for the routable shapes can be
+        given.
         """
 
+        if blockages is None:
+            blockages = self.graph_blockages
+        if vias is None:
+            vias = self.graph_vias
+        if is_routable is None:
+            is_routable = self.is_routable
         x_values = set()
         y_values = set()
 
         # Add inner values for blockages of the routed type
-        for shape in self.graph_blockages:
-            if not self.is_routable(shape):
+        for shape in blockages:
+            if not is_routable(shape):
                 continue
             # Get the safe pin values
             xs, ys = self.get_safe_pin_values(shape)
@@ -295,7 +351,7 @@ class graph:
 
         # Add corners for blockages
         offset = vector([drc["grid"]] * 2)
-        for blockage in self.graph_blockages:
+        for blockage in blockages:
             ll, ur = blockage.rect
             # Add minimum offset to the blockage corner nodes to prevent overlap
             nll = snap(ll - offset)
@@ -304,7 +360,7 @@ class graph:
             y_values.update([nll.y, nur.y])
 
         # Add center values for existing vias
-        for via in self.graph_vias:
+        for via in vias:
             p = via.center()
             x_values.add(p.x)
             y_values.add(p.y)
@@ -322,136 +378,343 @@ class graph:
         """
         Generate all graph nodes using the cartesian values and connect the
         orthogonal neighbors.
+
+        Nodes aren't created as objects. They are identified by their indices
+        in the grid of x, y, and z values, and their states are kept in
+        arrays.
         """
 
-        # Generate all nodes
-        self.nodes = []
-        for x in x_values:
-            for y in y_values:
-                for z in [0, 1]:
-                    self.nodes.append(graph_node([x, y, z]))
+        self.x_values = x_values
+        self.y_values = y_values
+        shape = (len(x_values), len(y_values), 2)
+        ids = np.arange(np.prod(shape)).reshape(shape)
 
-        # Mark nodes that will be removed
+        # Mark nodes that are blocked
+        self.blocked = np.zeros(ids.size, dtype=bool)
         self.mark_blocked_nodes()
+        free = ~self.blocked.reshape(shape)
+
+        # Connect closest nodes that aren't blocked if the probe between them
+        # isn't blocked either. Neighbors of a node are saved in this order:
+        # down, left, via, up, and right.
+        self.neighbors = np.full((ids.size, 5), -1, dtype=np.int32)
+        for axis, column in [(1, 0), (0, 1)]:
+            closest = self.find_closest_nodes(free, ids, axis)
+            for node, other in closest:
+                if not self.is_probe_blocked(self.get_center(node), self.get_center(other)):
+                    self.neighbors[node, column] = other
+                    self.neighbors[other, column + 3] = node
+        for node in ids[:, :, 0][free[:, :, 0] & free[:, :, 1]].tolist():
+            if not self.is_via_blocked(node):
+                self.neighbors[node, 2] = node + 1
+                self.neighbors[node + 1, 2] = node
+
+
+    def find_closest_nodes(self, free, ids, axis):
+        """
+        Return the pairs of node ids where the second node is the closest free
+        node before the first free node along the given axis.
+        """
 
-        # Connect closest nodes that won't be removed
-        def search(index, condition, shift):
-            """ Search and connect neighbor nodes. """
-            base_nodes = self.nodes[index:index+2]
-            found = [base_nodes[0].remove,
-                     base_nodes[1].remove]
-            while condition(index) and not all(found):
-                nodes = self.nodes[index - shift:index - shift + 2]
-                for k in range(2):
-                    if not found[k] and not nodes[k].remove:
-                        found[k] = True
-                        if not self.is_probe_blocked(base_nodes[k].center, nodes[k].center):
-                            base_nodes[k].add_neighbor(nodes[k])
-                index -= shift
-        y_len = len(y_values)
-        for i in range(0, len(self.nodes), 2):
-            search(i, lambda count: (count / 2) % y_len, 2) # Down
-            search(i, lambda count: (count / 2) >= y_len, y_len * 2) # Left
-            if not self.nodes[i].remove and \
-               not self.nodes[i + 1].remove and \
-               not self.is_via_blocked(self.nodes[i:i+2]):
-                self.nodes[i].add_neighbor(self.nodes[i + 1])
-
-        # Remove marked nodes
-        self.remove_blocked_nodes()
+        positions = np.indices(free.shape)[axis]
+        # Position of the last free node up to each node
+        last = np.maximum.accumulate(np.where(free, positions, -1), axis=axis)
+        # Shift by one so that the nodes don't find themselves
+        before = np.full(free.shape, -1)
+        src = [slice(None)] * 3
+        dst = [slice(None)] * 3
+        src[axis] = slice(None, -1)
+        dst[axis] = slice(1, None)
+        before[tuple(dst)] = last[tuple(src)]
+        mask = free & (before >= 0)
+        step = ids.strides[axis] // ids.itemsize
+        others = ids - (positions - before) * step
+        return zip(ids[mask].tolist(), others[mask].tolist())
 
 
     def mark_blocked_nodes(self):
-        """ Mark graph nodes to be removed that are blocked by a blockage. """
+        """ Mark graph nodes that are blocked by a blockage. """
+
+        # Find the blockages on the same layer as each node at once and only
+        # check the nodes that overlap a blockage
+        x_len = len(self.x_values)
+        y_len = len(self.y_values)
+        xs = np.repeat(np.array(self.x_values, dtype=float), y_len * 2)
+        ys = np.tile(np.repeat(np.array(self.y_values, dtype=float), 2), x_len)
+        zs = np.tile([0, 1], x_len * y_len)
+        points = np.column_stack((xs, ys))
+        for node, blockages in self.blockage_bbox_tree.query_points(points, zs):
+            if self.is_node_blocked(node, blockages):
+                self.blocked[node] = True
+
+
+    def get_node_count(self):
+        """ Return the number of graph nodes that aren't blocked. """
 
-        for i in range(len(self.nodes) - 1, -1, -1):
-            node = self.nodes[i]
-            if self.is_node_blocked(node):
-                node.remove = True
+        return int(np.count_nonzero(~self.blocked))
 
 
-    def remove_blocked_nodes(self):
-        """ Remove graph nodes that are marked to be removed. """
+    def get_center(self, node):
+        """ Return the center point of a node. """
 
-        for i in range(len(self.nodes) - 1, -1, -1):
-            node = self.nodes[i]
-            if node.remove:
-                node.remove_all_neighbors()
-                self.nodes.remove(node)
+        y_len = len(self.y_values)
+        return vector3d(self.x_values[node // (y_len * 2)],
+                        self.y_values[(node // 2) % y_len],
+                        node % 2)
+
+
+    def get_neighbors(self, node):
+        """
+        Return the neighbors of a node in the order of `generate_graph_nodes`.
+        Missing neighbors are -1.
+        """
+
+        return self.neighbors[node].tolist()
+
+
+    def get_nodes(self):
+        """ Return the graph nodes that aren't blocked as objects. """
+
+        return [graph_node(self.get_center(x)) for x in np.flatnonzero(~self.blocked).tolist()]
+
+
+    def get_edge_cost(self, node, other, prev_node=None):
+        """
+        Get the cost of going from a node to its neighbor. This is the same
+        as `graph_node.get_edge_cost`.
+        """
+
+        center = self.get_center(node)
+        other_center = self.get_center(other)
+        is_vertical = center.x == other_center.x
+        layer_dist = center.distance(other_center)
+        # Double the cost if the edge is in non-preferred direction
+        if is_vertical != bool(center.z):
+            layer_dist *= 4
+        # Add a constant wire cost to prevent dog-legs
+        if prev_node is not None:
+            prev_center = self.get_center(prev_node)
+            prev_direction = (center.x == prev_center.x, center.y == prev_center.y)
+            if prev_direction != (is_vertical, center.y == other_center.y):
+                layer_dist += drc["grid"]
+        via_dist = abs(center.z - other_center.z) * 2
+        return layer_dist + via_dist
 
 
     def save_end_nodes(self):
         """ Save graph nodes that are inside source and target pins. """
 
-        for node in self.nodes:
-            if self.inside_shape(node.center, self.source):
+        for node in np.flatnonzero(~self.blocked).tolist():
+            center = self.get_center(node)
+            if self.inside_shape(center, self.source):
                 self.source_nodes.append(node)
-            elif self.inside_shape(node.center, self.target):
+            elif self.inside_shape(center, self.target):
                 self.target_nodes.append(node)
 
 
-    def find_shortest_path(self):
+    def get_heuristic(self, nodes, method="targets"):
+        """
+        Return the heuristic function that estimates the distance from a node
+        to the closest of the given nodes.
+
+        The "targets" method checks all given nodes while the "bbox" method
+        only checks their bounding box, which is cheaper but less accurate.
+        Estimates are saved since they don't change during a search.
+        """
+
+        if len(nodes) == 0:
+            return lambda node: float("inf")
+        centers = [self.get_center(x) for x in nodes]
+        xs = np.array([c.x for c in centers], dtype=float)
+        ys = np.array([c.y for c in centers], dtype=float)
+        zs = np.array([c.z for c in centers], dtype=float)
+        if method == "bbox":
+            min_x, max_x = xs.min(), xs.max()
+            min_y, max_y = ys.min(), ys.max()
+            min_z, max_z = zs.min(), zs.max()
+        elif method != "targets":
+            debug.error("Invalid router heuristic {}".format(method), -1)
+        scores = {}
+
+        def h(node):
+            """ Return the estimated distance to the closest node. """
+            if node in scores:
+                return scores[node]
+            c = self.get_center(node)
+            if method == "bbox":
+                dist = max(min_x - c.x, 0, c.x - max_x) + max(min_y - c.y, 0, c.y - max_y)
+                dist += max(min_z - c.z, 0, c.z - max_z)
+            else:
+                dist = (np.abs(xs - c.x) + np.abs(ys - c.y) + np.abs(zs - c.z)).min()
+            scores[node] = float(dist)
+            return scores[node]
+
+        return h
+
+
+    def find_shortest_path(self, search=None, heuristic=None):
         """
         Find the shortest path from the source node to target node using the
-        A* algorithm.
+        A* algorithm. The search can be "astar" or "bidirectional", and the
+        heuristic can be "targets" or "bbox". They default to the router
+        options.
         """
 
+        if search is None:
+            search = OPTS.route_search
+        if heuristic is None:
+            heuristic = OPTS.route_heuristic
+        if search == "bidirectional":
+            path = self.find_bidirectional_path(heuristic)
+        elif search == "astar":
+            path = self.find_astar_path(heuristic)
+        else:
+            debug.error("Invalid router search {}".format(search), -1)
+        debug.info(4, "Number of nodes expanded by the {} search: {}".format(search, self.expanded_count))
+        self.stats["expanded"] = self.expanded_count
+        self.stats["path_nodes"] = 0 if path is None else len(path)
+        if path is None:
+            return None
+        return [graph_node(self.get_center(x)) for x in path]
+
+
+    def find_astar_path(self, heuristic):
+        """ Return the shortest path as node ids using the A* algorithm. """
+
         # Heuristic function to calculate the scores
-        def h(node):
-            """ Return the estimated distance to the closest target. """
-            min_dist = float("inf")
-            for t in self.target_nodes:
-                dist = t.center.distance(node.center) + abs(t.center.z - node.center.z)
-                if dist < min_dist:
-                    min_dist = dist
-            return min_dist
-
-        # Initialize data structures to be used for A* search
+        h = self.get_heuristic(self.target_nodes, heuristic)
+        target_set = set(self.target_nodes)
+
+        # Initialize data structures to be used for A* search. Entries of the
+        # queue aren't updated when a node gets a better score. Old entries
+        # are skipped when they are popped instead, and ties are broken by
+        # node ids.
         queue = []
         close_set = set()
         came_from = {}
         g_scores = {}
-        f_scores = {}
+        self.expanded_count = 0
 
         # Initialize score values for the source nodes
         for node in self.source_nodes:
-            g_scores[node.id] = 0
-            f_scores[node.id] = h(node)
-            heapq.heappush(queue, (f_scores[node.id], node.id, node))
+            g_scores[node] = 0
+            heapq.heappush(queue, (h(node), node))
 
         # Run the A* algorithm
         while len(queue) > 0:
             # Get the closest node from the queue
-            current = heapq.heappop(queue)[2]
+            current = heapq.heappop(queue)[1]
 
             # Skip this node if already discovered
             if current in close_set:
                 continue
             close_set.add(current)
+            self.expanded_count += 1
 
             # Check if we've reached the target
-            if current in self.target_nodes:
-                path = []
-                while current.id in came_from:
-                    path.append(current)
-                    current = came_from[current.id]
-                path.append(current)
-                path.reverse()
-                return path
+            if current in target_set:
+                return self.get_path(came_from, current)[::-1]
 
             # Get the previous node to better calculate the next costs
-            prev_node = None
-            if current.id in came_from:
-                prev_node = came_from[current.id]
+            prev_node = came_from.get(current)
 
             # Update neighbor scores
-            for node in current.neighbors:
-                tentative_score = current.get_edge_cost(node, prev_node) + g_scores[current.id]
-                if node.id not in g_scores or tentative_score < g_scores[node.id]:
-                    came_from[node.id] = current
-                    g_scores[node.id] = tentative_score
-                    f_scores[node.id] = tentative_score + h(node)
-                    heapq.heappush(queue, (f_scores[node.id], node.id, node))
+            for node in self.get_neighbors(current):
+                if node < 0:
+                    continue
+                tentative_score = self.get_edge_cost(current, node, prev_node) + g_scores[current]
+                if node not in g_scores or tentative_score < g_scores[node]:
+                    came_from[node] = current
+                    g_scores[node] = tentative_score
+                    heapq.heappush(queue, (tentative_score + h(node), node))
 
         # Return None if not connected
         return None
+
+
+    def find_bidirectional_path(self, heuristic):
+        """
+        Return the shortest path as node ids by running A* searches from both
+        the source and target nodes until they meet.
+
+        The cost of a path through a meeting node includes the wire cost of
+        turning there, which neither search has counted. The searches stop
+        when this cost isn't larger than the scores of both queues, since the
+        heuristics are consistent and any path that isn't found yet must cost
+        at least as much as both of them.
+        """
+
+        # Forward search goes to the targets and backward search goes to the
+        # sources
+        h = [self.get_heuristic(self.target_nodes, heuristic),
+             self.get_heuristic(self.source_nodes, heuristic)]
+        queues = [[], []]
+        close_sets = [set(), set()]
+        came_froms = [{}, {}]
+        g_scores = [{}, {}]
+        self.expanded_count = 0
+        for side, nodes in enumerate([self.source_nodes, self.target_nodes]):
+            for node in nodes:
+                g_scores[side][node] = 0
+                heapq.heappush(queues[side], (h[side](node), node))
+
+        # Cost of the best path found so far and the node where the searches
+        # met
+        best_score = float("inf")
+        meet_node = None
+        side = 0
+        while len(queues[0]) > 0 and len(queues[1]) > 0:
+            # Stop if neither search can find a better path
+            if best_score <= min(queues[0][0][0], queues[1][0][0]):
+                break
+            # Expand the searches in turns
+            queue = queues[side]
+            other = 1 - side
+            current = heapq.heappop(queue)[1]
+            if current not in close_sets[side]:
+                close_sets[side].add(current)
+                self.expanded_count += 1
+                came_from = came_froms[side]
+                scores = g_scores[side]
+                prev_node = came_from.get(current)
+                for node in self.get_neighbors(current):
+                    if node < 0:
+                        continue
+                    tentative_score = self.get_edge_cost(current, node, prev_node) + scores[current]
+                    if node not in scores or tentative_score < scores[node]:
+                        came_from[node] = current
+                        scores[node] = tentative_score
+                        heapq.heappush(queue, (tentative_score + h[side](node), node))
+                        # Save the path if the other search has reached here
+                        if node in g_scores[other]:
+                            score = tentative_score + g_scores[other][node]
+                            if node in came_froms[other]:
+                                score += self.get_turn_cost(current, node, came_froms[other][node])
+                            if score < best_score:
+                                best_score = score
+                                meet_node = node
+            side = other
+
+        # Return None if not connected
+        if meet_node is None:
+            return None
+        return self.get_path(came_froms[0], meet_node)[::-1] + self.get_path(came_froms[1], meet_node)[1:]
+
+
+    def get_turn_cost(self, prev_node, node, next_node):
+        """
+        Return the wire cost of going through a node from the previous node to
+        the next node like `get_edge_cost`.
+        """
+
+        return self.get_edge_cost(node, next_node, prev_node) - self.get_edge_cost(node, next_node)
+
+
+    def get_path(self, came_from, node):
+        """ Return the path from a node back to the start of a search. """
+
+        path = [node]
+        while node in came_from:
+            node = came_from[node]
+            path.append(node)
+        return path
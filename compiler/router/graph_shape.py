@@ -7,6 +7,7 @@ from openram.base.pin_layout import pin_layout
 from openram.base.vector import vector
 from openram.tech import drc
 from .graph_utils import snap
+from .spatial_index import spatial_index
 
 
 class graph_shape(pin_layout):
@@ -79,6 +80,9 @@ class graph_shape(pin_layout):
         """
 
         self_core = self.get_core()
+        # Only check the shapes around this shape if they are indexed
+        if isinstance(shape_list, spatial_index):
+            shape_list = shape_list.overlapping(self_core, self_core.lpp[0])
         for shape in shape_list:
             shape_core = shape.get_core()
             if shape_core.contains(self_core):
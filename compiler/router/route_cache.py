@@ -0,0 +1,91 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California, Santa Cruz
+# All rights reserved.
+#
+import os
+import json
+import hashlib
+from openram import debug
+
+
+class route_cache:
+    """
+    This class is a persistent cache of routes on the disk. Each entry is
+    keyed by the hash of everything that the routes depend on, so entries
+    never have to be invalidated. They are evicted in least recently used
+    order when the cache gets larger than the size limit.
+    """
+
+    def __init__(self, path, max_size):
+
+        # Directory of the cache entries
+        self.path = path
+        # Maximum total size of the entries in bytes
+        self.max_size = max_size
+        os.makedirs(self.path, exist_ok=True)
+
+
+    def get_key(self, content):
+        """ Return the key of the JSON-serializable content. """
+
+        data = json.dumps(content, separators=(",", ":"))
+        return hashlib.sha256(data.encode()).hexdigest()
+
+
+    def get_file_name(self, key):
+        """ Return the file name of an entry. """
+
+        return os.path.join(self.path, key + ".json")
+
+
+    def load(self, key):
+        """ Return the value of an entry or None if it isn't cached. """
+
+        file_name = self.get_file_name(key)
+        try:
+            with open(file_name, "r") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Mark the entry as recently used
+        os.utime(file_name)
+        debug.info(2, "Loaded routes from the cache {}".format(file_name))
+        return value
+
+
+    def store(self, key, value):
+        """ Save an entry and evict old entries if necessary. """
+
+        file_name = self.get_file_name(key)
+        temp_name = "{}.{}.tmp".format(file_name, os.getpid())
+        with open(temp_name, "w") as f:
+            json.dump(value, f, separators=(",", ":"))
+        os.replace(temp_name, file_name)
+        debug.info(2, "Saved routes to the cache {}".format(file_name))
+        self.evict()
+
+
+    def evict(self):
+        """ Remove least recently used entries until the cache fits. """
+
+        entries = []
+        for name in os.listdir(self.path):
+            if not name.endswith(".json"):
+                continue
+            file_name = os.path.join(self.path, name)
+            try:
+                stat = os.stat(file_name)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name, stat.st_size))
+        total_size = sum(x[2] for x in entries)
+        for _, name, size in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                continue
+            total_size -= size
+            debug.info(3, "Evicted routes from the cache {}".format(name))
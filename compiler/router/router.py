@@ -3,16 +3,45 @@
 # Copyright (c) 2016-2023 Regents of the University of California, Santa Cruz
 # All rights reserved.
 #
+import os
+import csv
+import heapq
+import json
+import multiprocessing
+import time
+from copy import deepcopy
 from openram import debug
 from openram.base.vector import vector
+from openram.base.vector3d import vector3d
 from openram.gdsMill import gdsMill
 from openram.tech import GDS
 from openram.tech import drc
 from openram.tech import layer as tech_layer
 from openram import OPTS
+from .graph import graph
+from .graph_node import graph_node
 from .graph_shape import graph_shape
 from .graph_utils import snap
+from .route_cache import route_cache
 from .router_tech import router_tech
+from .shape_extractor import shape_extractor
+from .spatial_index import spatial_index
+
+# Router and pairs used by the worker processes. They are set before the
+# workers are forked so that they don't have to be pickled.
+worker_state = None
+
+
+def find_worker_path(index):
+    """ Find the path of a pair in a worker process. """
+
+    router, pairs = worker_state
+    source, target = pairs[index]
+    g, path = router.find_path(source, target)
+    ll, ur = g.region.rect
+    if path is not None:
+        path = [(x.center.x, x.center.y, x.center.z) for x in path]
+    return path, (ll.x, ll.y, ur.x, ur.y), g.stats
 
 
 class router(router_tech):
@@ -45,12 +74,19 @@ class router(router_tech):
         self.all_pins = set()
         # This is all the blockages including the pins. The graph class handles
         # pins as blockages while considering their routability
-        self.blockages = []
+        self.blockages = spatial_index(cell_size=self.get_index_cell_size())
         # This is all the vias between routing layers
-        self.vias = []
+        self.vias = spatial_index(cell_size=self.get_index_cell_size())
         # Fake pins are imaginary pins on the side supply pins to route other
         # pins to them
         self.fake_pins = []
+        # This is the routing grid of the whole routing area if the router
+        # finds all paths on it instead of creating a graph for each pair
+        self.grid = None
+        # Number of graph nodes expanded while finding paths
+        self.expanded_count = 0
+        # Profiling records of the routes
+        self.route_stats = []
 
         # Set the offset here
         self.half_wire = snap(self.track_wire / 2)
@@ -67,6 +103,21 @@ class router(router_tech):
         self.reader.loadFromFile(self.gds_filename)
 
 
+    def prepare_layout(self):
+        """ Collect the shapes of the current layout in memory. """
+
+        # NOTE: This provides the same shapes as `prepare_gds_reader()` without
+        # writing and reading a temporary GDSII file
+        self.layout = shape_extractor(self.design)
+
+
+    def get_index_cell_size(self, num_cells=64):
+        """ Return the cell size of spatial indices for the routing area. """
+
+        ll, ur = self.bbox
+        return snap(max(ur.x - ll.x, ur.y - ll.y, self.track_width) / num_cells)
+
+
     def merge_shapes(self, merger, shape_list):
         """
         Merge shapes in the list into the merger if they are contained or
@@ -74,6 +125,10 @@ class router(router_tech):
         """
 
         merger_core = merger.get_core()
+        # Only check the shapes around the merger if they are indexed
+        if isinstance(shape_list, spatial_index):
+            self.merge_indexed_shapes(merger, shape_list)
+            return
         for shape in list(shape_list):
             shape_core = shape.get_core()
             # If merger contains the shape, remove it from the list
@@ -87,6 +142,38 @@ class router(router_tech):
                 shape_list.remove(shape)
 
 
+    def merge_indexed_shapes(self, merger, shape_index):
+        """
+        Merge shapes in the spatial index into the merger in the same order as
+        `merge_shapes`.
+        """
+
+        merger_core = merger.get_core()
+        layer = merger_core.lpp[0]
+        # Shapes are checked in insertion order. When the merger expands,
+        # shapes that come later may start to overlap it.
+        queue = [(shape_index.get_order(x), x) for x in shape_index.overlapping(merger_core, layer)]
+        heapq.heapify(queue)
+        checked = set(x[0] for x in queue)
+        while queue:
+            order, shape = heapq.heappop(queue)
+            shape_core = shape.get_core()
+            # If merger contains the shape, remove it from the index
+            if merger_core.contains(shape_core):
+                shape_index.remove(shape)
+            # If the merger aligns with the shape, expand the merger and remove
+            # the shape from the index
+            elif merger_core.aligns(shape_core):
+                merger.bbox([shape])
+                merger_core.bbox([shape_core])
+                shape_index.remove(shape)
+                for other in shape_index.overlapping(merger_core, layer):
+                    other_order = shape_index.get_order(other)
+                    if other_order > order and other_order not in checked:
+                        checked.add(other_order)
+                        heapq.heappush(queue, (other_order, other))
+
+
     def find_pins(self, pin_name):
         """ Find the pins with the given name. """
         debug.info(4, "Finding all pins for {}".format(pin_name))
@@ -169,7 +256,7 @@ class router(router_tech):
             rect = [ll, ur]
             new_shape = graph_shape("via", rect, valid_lpp)
             # Skip this via if it's contained by an existing via blockage
-            if new_shape.contained_by_any(self.vias):
+            if new_shape.contained_by_any(self.vias.overlapping(new_shape)):
                 continue
             self.vias.append(self.inflate_shape(new_shape))
 
@@ -243,6 +330,282 @@ class router(router_tech):
                                   extra_spacing=self.half_wire)
 
 
+    def get_route_region(self, source, target):
+        """ Return the initial routing region of a source and target pair. """
+
+        region = deepcopy(source)
+        region.bbox([target])
+        return region.inflated_pin(spacing=self.track_width + self.track_space)
+
+
+    def find_path(self, source, target):
+        """
+        Create the graph for a pair, or a window of the routing grid if there
+        is one, and find the shortest path on it.
+        """
+
+        if self.grid is None:
+            g = graph(self)
+        else:
+            g = self.grid
+        start_time = time.time()
+        g.create_graph(source, target)
+        g.stats["create_graph_time"] = time.time() - start_time
+        start_time = time.time()
+        path = g.find_shortest_path()
+        g.stats["find_shortest_path_time"] = time.time() - start_time
+        return g, path
+
+
+    def iterate_paths(self, pairs):
+        """
+        Find the paths of source and target pairs in the given order. Yield
+        each pair with its graph, path, and graph statistics. The caller must
+        add each path to the layout before getting the next one.
+
+        If more than one thread is allowed, pairs whose routing regions don't
+        overlap are routed together in worker processes. Their paths are
+        yielded in order and a path is found again if the shapes around it
+        were changed by the previous paths. The graph isn't yielded for the
+        paths found by the workers.
+        """
+
+        pairs = list(pairs)
+        context = None
+        if OPTS.num_threads > 1 and len(pairs) > 1:
+            try:
+                context = multiprocessing.get_context("fork")
+            except ValueError:
+                debug.warning("Routing in parallel isn't supported on this platform.")
+        if context is None:
+            batches = [[x] for x in pairs]
+        else:
+            batches = self.get_pair_batches(pairs, OPTS.num_threads * 4)
+        for batch in batches:
+            results = None
+            if context is not None and len(batch) > 1:
+                state = self.get_index_state()
+                results = self.find_paths_parallel(context, batch)
+            for i, (source, target) in enumerate(batch):
+                if results is not None:
+                    path, region, stats = results[i]
+                    if path is not None and not self.is_region_changed(region, state):
+                        self.expanded_count += stats["expanded"]
+                        stats["parallel"] = True
+                        yield source, target, None, [graph_node(vector3d(x)) for x in path], stats
+                        continue
+                    debug.info(3, "Rerouting from {} to {}.".format(source, target))
+                g, path = self.find_path(source, target)
+                self.expanded_count += g.expanded_count
+                yield source, target, g, path, g.stats
+            # The changes are only needed until the batch is done
+            self.trim_index_logs()
+
+
+    def get_pair_batches(self, pairs, max_size):
+        """
+        Split the pairs into batches of consecutive pairs whose routing
+        regions don't overlap.
+        """
+
+        batches = []
+        regions = []
+        for source, target in pairs:
+            ll, ur = self.get_route_region(source, target).rect
+            region = (ll.x, ll.y, ur.x, ur.y)
+            if not batches or len(batches[-1]) == max_size or \
+               any(self.rects_overlap(region, x) for x in regions):
+                batches.append([])
+                regions = []
+            batches[-1].append((source, target))
+            regions.append(region)
+        return batches
+
+
+    def find_paths_parallel(self, context, pairs):
+        """
+        Find the paths of pairs in worker processes using the current shapes.
+        Return the path points, the final routing region, and the graph
+        statistics for each pair.
+        """
+
+        global worker_state
+        worker_state = (self, pairs)
+        try:
+            with context.Pool(min(OPTS.num_threads, len(pairs))) as pool:
+                return pool.map(find_worker_path, range(len(pairs)), chunksize=1)
+        finally:
+            worker_state = None
+
+
+    def get_index_state(self):
+        """ Return the numbers of shapes inserted and removed so far. """
+
+        return self.blockages.get_log_state() + self.vias.get_log_state()
+
+
+    def trim_index_logs(self):
+        """
+        Drop the changes of the spatial indices that aren't needed anymore.
+        The routing grid needs the changes since its last update.
+        """
+
+        if self.grid is None:
+            state = self.get_index_state()
+        else:
+            state = self.grid.log_state
+        self.blockages.trim_log(state[0:2])
+        self.vias.trim_log(state[2:4])
+
+
+    def is_region_changed(self, region, state):
+        """
+        Return if a shape inserted or removed after the given state overlaps
+        the region.
+        """
+
+        blockage_changes = self.blockages.get_changes(state[0:2])
+        via_changes = self.vias.get_changes(state[2:4])
+        # Assume that everything changed if the logs were trimmed
+        if blockage_changes is None or via_changes is None:
+            return True
+        for shapes in blockage_changes + via_changes:
+            for shape in shapes:
+                ll, ur = shape.rect
+                if self.rects_overlap(region, (ll.x, ll.y, ur.x, ur.y)):
+                    return True
+        return False
+
+
+    def rects_overlap(self, a, b):
+        """ Return if two rectangles given as (llx, lly, urx, ury) overlap. """
+
+        return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+    def iterate_routes(self, pairs):
+        """
+        Route source and target pairs in the given order. Yield each pair with
+        the wires and vias added to the layout for it. The caller must add the
+        new shapes to the blockages and vias before getting the next route.
+
+        If the route cache is enabled and the same pairs were routed before
+        with the same shapes and parameters, the cached routes are added to the
+        layout without searching for them.
+        """
+
+        pairs = list(pairs)
+        try:
+            yield from self.iterate_new_routes(pairs)
+        finally:
+            # Write the report even if a route fails
+            self.write_route_report()
+
+
+    def iterate_new_routes(self, pairs):
+        """
+        Route source and target pairs for `iterate_routes` with the route
+        cache.
+        """
+
+        cache = None
+        if OPTS.route_cache_path is not None:
+            cache = route_cache(OPTS.route_cache_path, OPTS.route_cache_size * 1024 * 1024)
+            key = cache.get_key(self.get_cache_content(pairs))
+            routes = cache.load(key)
+            if routes is not None and len(routes) == len(pairs):
+                for (source, target), route in zip(pairs, routes):
+                    nodes = [graph_node(vector3d(x)) for x in route]
+                    start_time = time.time()
+                    new_wires, new_vias = self.add_route(nodes)
+                    self.add_route_stats(source, target, nodes, {"cached": True}, time.time() - start_time)
+                    yield source, target, new_wires, new_vias
+                return
+        routes = []
+        for source, target, g, path, stats in self.iterate_paths(pairs):
+            # If no path is found, throw an error
+            if path is None:
+                self.add_route_stats(source, target, [], stats, 0)
+                self.write_debug_gds(gds_name="{}error.gds".format(OPTS.openram_temp), g=g, source=source, target=target)
+                debug.error("Couldn't route from {} to {}.".format(source, target), -1)
+            # Create the path shapes on layout
+            start_time = time.time()
+            nodes = self.prepare_path(path)
+            routes.append([(x.center.x, x.center.y, x.center.z) for x in nodes])
+            new_wires, new_vias = self.add_route(nodes)
+            self.add_route_stats(source, target, nodes, stats, time.time() - start_time)
+            yield source, target, new_wires, new_vias
+        if cache is not None:
+            cache.store(key, routes)
+
+
+    def add_route_stats(self, source, target, nodes, stats, add_path_time):
+        """ Save the profiling record of a route. """
+
+        record = {"net": source.name,
+                  "source": str(source),
+                  "target": str(target),
+                  "cached": False,
+                  "parallel": False}
+        record.update(stats)
+        record["wire_length"] = snap(sum(nodes[i].center.distance(nodes[i + 1].center) for i in range(len(nodes) - 1)))
+        record["via_count"] = sum(nodes[i].center.z != nodes[i + 1].center.z for i in range(len(nodes) - 1))
+        record["add_path_time"] = add_path_time
+        self.route_stats.append(record)
+
+
+    def write_route_report(self):
+        """
+        Write the profiling records of the routes as JSON and CSV files if the
+        report path is given. The files are named after the design and the
+        router.
+        """
+
+        if OPTS.route_report_path is None:
+            return
+        fields = ["net", "source", "target", "cached", "parallel",
+                  "region_width", "region_height", "blockages", "vias",
+                  "nodes", "free_nodes", "edges", "expanded", "path_nodes",
+                  "wire_length", "via_count", "create_graph_time",
+                  "find_shortest_path_time", "add_path_time"]
+        os.makedirs(OPTS.route_report_path, exist_ok=True)
+        file_name = os.path.join(OPTS.route_report_path,
+                                 "{}_{}".format(self.design.name, type(self).__name__))
+        with open(file_name + ".json", "w") as f:
+            json.dump(self.route_stats, f, indent=2)
+        with open(file_name + ".csv", "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, restval="")
+            writer.writeheader()
+            writer.writerows(self.route_stats)
+        debug.info(1, "Wrote the routing report to {}.json and {}.csv".format(file_name, file_name))
+
+
+    def get_cache_content(self, pairs):
+        """
+        Return everything that the routes of the pairs depend on to find their
+        key in the route cache.
+        """
+
+        def shape_content(shape):
+            ll, ur = shape.rect
+            return [shape.name, list(shape.lpp), ll.x, ll.y, ur.x, ur.y]
+
+        ll, ur = self.bbox
+        return {
+            "router": type(self).__name__,
+            "layers": list(self.layers),
+            "pin_type": getattr(self, "pin_type", None),
+            "track": [self.track_width, self.track_wire, self.track_space],
+            "bbox": [ll.x, ll.y, ur.x, ur.y],
+            "search": [OPTS.route_search, OPTS.route_heuristic],
+            "pins": [[name, sorted(shape_content(x) for x in self.pins[name])] for name in sorted(self.pins)],
+            "fake_pins": [shape_content(x) for x in self.fake_pins],
+            "blockages": [shape_content(x) for x in self.blockages],
+            "vias": [shape_content(x) for x in self.vias],
+            "pairs": [[shape_content(x), shape_content(y)] for x, y in pairs],
+        }
+
+
     def add_path(self, path):
         """ Add the route path to the layout. """
 
@@ -328,7 +691,7 @@ class router(router_tech):
                     self.add_object_info(blockage, "blockage{}++[{}]".format(self.get_zindex(blockage.lpp), blockage.name))
                 else:
                     self.add_object_info(blockage, "blockage{}[{}]".format(self.get_zindex(blockage.lpp), blockage.name))
-            for node in g.nodes:
+            for node in g.get_nodes():
                 offset = (node.center.x, node.center.y)
                 self.design.add_label(text="n{}".format(node.center.z),
                                       layer="text",
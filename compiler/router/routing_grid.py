@@ -0,0 +1,391 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California, Santa Cruz
+# All rights reserved.
+#
+from bisect import bisect_left, bisect_right
+import numpy as np
+from openram import debug
+from .graph import graph
+from .graph_node import graph_node
+from .graph_utils import snap
+
+
+class routing_grid(graph):
+    """
+    This is the routing grid over the whole routing area of a router. It is
+    built once before routing and updated after each route, and source and
+    target pairs are routed on windows of it.
+
+    The grid has the lines of all shapes. A window has the lines of the shapes
+    around a pair, so it has the same nodes as the graph that would be created
+    for the pair. The states of the nodes and via points, and the probes
+    between the nodes, are found when a search first needs them. They are kept
+    for the next pairs of the same net. When the router inserts or removes
+    shapes after a route, the lines of the new shapes are added and only the
+    states around the shapes are forgotten. The changes are read from the logs
+    of the router's spatial indices.
+    """
+
+    def __init__(self, router):
+
+        graph.__init__(self, router)
+
+        self.source = None
+        self.target = None
+        # Net of the known states
+        self.net = None
+        # Values of the grid lines and their indices
+        self.x_values = []
+        self.y_values = []
+        self.x_indices = {}
+        self.y_indices = {}
+        self.shape = (0, 0, 2)
+        # States of the nodes for the net and of the via points: -1 if
+        # unknown, 0 if free, and 1 if blocked
+        self.states = np.full(0, -1, dtype=np.int8)
+        self.via_states = np.full(0, -1, dtype=np.int8)
+        # Probes that were sent on each grid line for the net, keyed by the
+        # axis, value, and layer of the line
+        self.probes = {}
+        # Centers of the nodes that were used
+        self.centers = {}
+
+        # Generate the grid lines from the shapes of the whole routing area
+        pins = [x for pins in router.pins.values() for x in pins]
+        self.add_lines(list(router.blockages) + pins, list(router.vias))
+        # Log state of the router's spatial indices when the grid was updated
+        self.log_state = router.get_index_state()
+        debug.info(3, "Number of nodes in the routing grid: {}".format(self.states.size))
+
+
+    def is_net_shape(self, shape):
+        """ Return if a shape is routable for any net. """
+
+        return shape.name in self.router.pins
+
+
+    def iterate_point_blockages(self, point):
+        """ Iterate over blockages that overlap the given point. """
+
+        yield from self.router.blockages.overlapping_point(point, ordered=False)
+
+
+    def iterate_probe_blockages(self, probe):
+        """ Iterate over blockages that overlap the given probe. """
+
+        yield from self.router.blockages.overlapping(probe, probe.lpp[0], ordered=False)
+
+
+    def iterate_point_vias(self, point):
+        """ Iterate over vias that overlap the given point. """
+
+        yield from self.router.vias.overlapping_point(point, ordered=False)
+
+
+    def add_lines(self, blockages, vias):
+        """ Add the grid lines of the given shapes. """
+
+        self.add_values(*self.generate_cartesian_values(blockages, vias, self.is_net_shape))
+
+
+    def add_values(self, x_values, y_values):
+        """
+        Add grid lines with the given values if they aren't in the grid. The
+        known states are moved to the new node indices.
+        """
+
+        new_x = [x for x in x_values if x not in self.x_indices]
+        new_y = [y for y in y_values if y not in self.y_indices]
+        if not new_x and not new_y:
+            return
+        old_x = self.x_values
+        old_y = self.y_values
+        self.x_values = sorted(old_x + new_x)
+        self.y_values = sorted(old_y + new_y)
+        self.x_indices = {x: i for i, x in enumerate(self.x_values)}
+        self.y_indices = {y: i for i, y in enumerate(self.y_values)}
+        self.shape = (len(self.x_values), len(self.y_values), 2)
+        states = np.full(self.shape, -1, dtype=np.int8)
+        via_states = np.full(self.shape[:2], -1, dtype=np.int8)
+        if old_x and old_y:
+            index = np.ix_([self.x_indices[x] for x in old_x], [self.y_indices[y] for y in old_y])
+            states[index] = self.states.reshape(len(old_x), len(old_y), 2)
+            via_states[index] = self.via_states.reshape(len(old_x), len(old_y))
+        self.states = states.reshape(-1)
+        self.via_states = via_states.reshape(-1)
+        self.centers = {}
+
+
+    def set_net(self, net):
+        """ Forget the states that depend on the net if it is another net. """
+
+        if net != self.net:
+            self.net = net
+            self.states.fill(-1)
+            self.probes = {}
+
+
+    def update(self):
+        """
+        Add the grid lines of the shapes that were inserted since the last
+        update and forget the states around the inserted and removed shapes.
+        """
+
+        state = self.router.get_index_state()
+        if state == self.log_state:
+            return
+        blockage_changes = self.router.blockages.get_changes(self.log_state[0:2])
+        via_changes = self.router.vias.get_changes(self.log_state[2:4])
+        self.log_state = state
+        # Forget everything if the logs were trimmed
+        if blockage_changes is None or via_changes is None:
+            self.add_lines(list(self.router.blockages), list(self.router.vias))
+            self.states.fill(-1)
+            self.via_states.fill(-1)
+            self.probes = {}
+            return
+        self.add_lines(blockage_changes[0], via_changes[0])
+        states = self.states.reshape(self.shape)
+        for shape in blockage_changes[0] + blockage_changes[1]:
+            x_start, x_end, y_start, y_end = self.get_index_range(*shape.rect)
+            states[x_start:x_end, y_start:y_end] = -1
+            # Probes that cross the shape may start far away from it, so
+            # forget all probes on the lines through the shape
+            for z in range(2):
+                for x in self.x_values[x_start:x_end]:
+                    self.probes.pop((0, x, z), None)
+                for y in self.y_values[y_start:y_end]:
+                    self.probes.pop((1, y, z), None)
+        via_states = self.via_states.reshape(self.shape[:2])
+        for shape in via_changes[0] + via_changes[1]:
+            x_start, x_end, y_start, y_end = self.get_index_range(*shape.rect)
+            via_states[x_start:x_end, y_start:y_end] = -1
+
+
+    def get_index_range(self, ll, ur):
+        """
+        Return the ranges of the grid line indices that are inside the
+        rectangle.
+        """
+
+        return (bisect_left(self.x_values, ll.x),
+                bisect_right(self.x_values, ur.x),
+                bisect_left(self.y_values, ll.y),
+                bisect_right(self.y_values, ur.y))
+
+
+    def get_node(self, x_index, y_index, z):
+        """ Return the node at the given grid line indices and layer. """
+
+        return (x_index * self.shape[1] + y_index) * 2 + z
+
+
+    def get_center(self, node):
+        """ Return the center point of a node. """
+
+        center = self.centers.get(node)
+        if center is None:
+            center = graph.get_center(self, node)
+            self.centers[node] = center
+        return center
+
+
+    def create_graph(self, source, target):
+        """
+        Prepare the window of the grid for a source and target pair. Node
+        states and edges aren't found here but when the search needs them.
+        """
+        debug.info(3, "Creating the grid window for source '{}' and target '{}'.".format(source, target))
+
+        # Save source and target information
+        self.source = source
+        self.target = target
+        self.stats = {}
+        self.expanded_count = 0
+
+        # Apply the changes of the previous routes
+        self.set_net(source.name)
+        self.update()
+
+        # Find the region to be routed and the shapes inside it in the same
+        # way as graphs
+        region = self.router.get_route_region(source, target)
+        debug.info(4, "Routing region is {}".format(region.rect))
+        self.graph_blockages = []
+        self.graph_blockage_set = set()
+        self.find_graph_blockages(region)
+        self.graph_vias = []
+        self.graph_via_set = set()
+        self.find_graph_vias(region)
+
+        # The window has the grid lines of the shapes in the area
+        x_values, y_values = self.generate_cartesian_values()
+        self.add_values(x_values, y_values)
+        self.window_x = [self.x_indices[x] for x in x_values]
+        self.window_y = [self.y_indices[y] for y in y_values]
+        self.window_positions = [{x: i for i, x in enumerate(self.window_y)},
+                                 {x: i for i, x in enumerate(self.window_x)}]
+        # Adjust the routing region to include "edge" shapes
+        region.bbox(self.graph_blockages)
+        self.find_graph_blockages(region)
+        self.region = region
+
+        # Fake source or target pins are blockages only for this pair
+        self.extra_blockages = [x for x in self.graph_blockages if not self.router.blockages.contains_shape(x)]
+        self.save_end_nodes()
+
+        # Save the statistics of the window
+        ll, ur = region.rect
+        self.stats["region_width"] = snap(ur.x - ll.x)
+        self.stats["region_height"] = snap(ur.y - ll.y)
+        self.stats["blockages"] = len(self.graph_blockages)
+        self.stats["vias"] = len(self.graph_vias)
+        self.stats["nodes"] = len(self.window_x) * len(self.window_y) * 2
+
+
+    def iterate_window_nodes(self, shape=None):
+        """
+        Iterate over the nodes in the window, or only the nodes inside the
+        given shape.
+        """
+
+        window_x = self.window_x
+        window_y = self.window_y
+        layers = range(2)
+        if shape is not None:
+            x_start, x_end, y_start, y_end = self.get_index_range(*shape.rect)
+            window_x = window_x[bisect_left(window_x, x_start):bisect_left(window_x, x_end)]
+            window_y = window_y[bisect_left(window_y, y_start):bisect_left(window_y, y_end)]
+            layers = [self.router.get_zindex(shape.lpp)]
+        for x_index in window_x:
+            for y_index in window_y:
+                for z in layers:
+                    yield self.get_node(x_index, y_index, z)
+
+
+    def save_end_nodes(self):
+        """
+        Save the free nodes that are inside the source and target pins. Nodes
+        in these pins may have different states for this pair since they can
+        be in the safe region of the source or target, so their states for
+        this pair are saved separately.
+        """
+
+        self.source_nodes = []
+        self.target_nodes = []
+        # States of the nodes that are different for this pair
+        self.pair_states = {}
+        # Nodes inside both pins are source nodes
+        checked = set()
+        for shape, nodes in [(self.source, self.source_nodes), (self.target, self.target_nodes)]:
+            for node in self.iterate_window_nodes(shape):
+                if node in checked:
+                    continue
+                checked.add(node)
+                p = self.get_center(node)
+                blockages = list(self.iterate_point_blockages(p))
+                blockages.extend(x for x in self.extra_blockages if self.inside_shape(p, x))
+                free = not self.is_node_blocked(node, blockages)
+                if free != self.is_free(node):
+                    self.pair_states[node] = free
+                if free:
+                    nodes.append(node)
+
+
+    def is_free(self, node):
+        """ Return if a node isn't blocked for the net. """
+
+        state = self.states.item(node)
+        if state < 0:
+            state = int(self.is_node_blocked(node, end_shapes=[]))
+            self.states[node] = state
+        return state == 0
+
+
+    def is_pair_free(self, node):
+        """ Return if a node isn't blocked for the current pair. """
+
+        if node in self.pair_states:
+            return self.pair_states[node]
+        return self.is_free(node)
+
+
+    def is_edge_blocked(self, node, other):
+        """
+        Return if the probe from a node to another node on the same grid line
+        is blocked.
+        """
+
+        p1 = self.get_center(node)
+        p2 = self.get_center(other)
+        if p1.x == p2.x:
+            key = (0, p1.x, p1.z)
+            span = (min(p1.y, p2.y), max(p1.y, p2.y))
+        else:
+            key = (1, p1.y, p1.z)
+            span = (min(p1.x, p2.x), max(p1.x, p2.x))
+        probes = self.probes.setdefault(key, {})
+        blocked = probes.get(span)
+        if blocked is None:
+            blocked = self.is_probe_blocked(p1, p2)
+            probes[span] = blocked
+        return blocked
+
+
+    def is_via_blocked(self, node):
+        """
+        Return if a via from the given node to the other layer is blocked.
+        """
+
+        if not self.is_pair_free(node) or not self.is_pair_free(node ^ 1):
+            return True
+        point = node // 2
+        state = self.via_states.item(point)
+        if state < 0:
+            state = int(self.is_via_point_blocked(self.get_center(node)))
+            self.via_states[point] = state
+        return state == 1
+
+
+    def get_neighbors(self, node):
+        """
+        Return the neighbors of a node in the window in the order of
+        `generate_graph_nodes`. Each neighbor is the closest free node on the
+        window's grid lines if the probe to it isn't blocked.
+        """
+
+        indices = [(node // 2) % self.shape[1], node // (self.shape[1] * 2)]
+        neighbors = [-1] * 5
+        for column in [0, 1, 3, 4]:
+            # Down and up neighbors are on the y axis and left and right
+            # neighbors are on the x axis
+            axis = column % 3
+            lines = self.window_y if axis == 0 else self.window_x
+            step = -1 if column < 3 else 1
+            position = self.window_positions[axis][indices[axis]] + step
+            while 0 <= position < len(lines):
+                if axis == 0:
+                    other = self.get_node(indices[1], lines[position], node % 2)
+                else:
+                    other = self.get_node(lines[position], indices[0], node % 2)
+                if self.is_pair_free(other):
+                    if not self.is_edge_blocked(node, other):
+                        neighbors[column] = other
+                    break
+                position += step
+        if not self.is_via_blocked(node):
+            neighbors[2] = node ^ 1
+        return neighbors
+
+
+    def get_nodes(self):
+        """ Return the free nodes in the window as objects. """
+
+        return [graph_node(self.get_center(x)) for x in self.iterate_window_nodes() if self.is_pair_free(x)]
+
+
+    def get_node_count(self):
+        """ Return the number of nodes in the window. """
+
+        return self.stats["nodes"]
@@ -0,0 +1,255 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California, Santa Cruz
+# All rights reserved.
+#
+from openram import debug
+from openram.gdsMill import gdsMill
+from openram.tech import GDS
+
+
+class shape_extractor:
+    """
+    This class collects the shapes of a `hierarchy_layout` object in memory
+    so that routers don't have to write and read back a temporary GDSII file.
+
+    It walks the instances, objects, and pins of the design hierarchy with the
+    same transforms that gdsMill uses for SREFs and provides the subset of the
+    `VlsiLayout` API that the routers use: `getAllShapes` and
+    `getAllPinShapes`.
+    """
+
+    def __init__(self, design):
+
+        # This is the `hierarchy_layout` object
+        self.design = design
+        # Helper layout used to convert coordinates and transform shapes
+        # exactly like gdsMill does
+        self.gds = gdsMill.VlsiLayout(units=GDS["unit"])
+        self.units = self.gds.units
+        # Flattened hierarchy in the same form as `VlsiLayout.xyTree` except
+        # that structures are referred by their list of boundaries
+        self.xyTree = []
+        # Structures of the dynamic modules, keyed by module name
+        self.structures = {}
+        # Shapes of each structure on a layer-purpose pair before transforms
+        self.shape_cache = {}
+        # Instances of the xyTree grouped by structure with their transforms
+        self.tree_groups = None
+        # Top-level labels in the order that gdsMill processes them, populated
+        # when a pin is asked for
+        self.labels = None
+        # Shapes and their index on the layers of the labels
+        self.label_shapes = {}
+        # Shapes of the labels that were asked for
+        self.pins = {}
+
+        self.populate_coordinate_map()
+
+
+    def populate_coordinate_map(self):
+        """ Flatten the design hierarchy into the xyTree. """
+
+        self.add_module(self.design, [], 0, [0, 0, 0], (0, 0))
+
+
+    def add_module(self, mod, transform_path, rotate_angle, trans_flags, coordinates):
+        """ Add a module and all its instances to the xyTree. """
+
+        transform_path.append(gdsMill.getTransformMatrices(rotate_angle, trans_flags, coordinates))
+        structure = self.get_module_structure(mod)
+        self.add_tree_unit(structure.boundaries, transform_path)
+        # Library cells are read from GDSII and may have their own hierarchy
+        if mod.is_library_cell:
+            for sref in gdsMill.getStructureReferences(structure):
+                self.add_gds_structure(mod.gds, sref, transform_path)
+        # Visited cells already have their instances in the GDSII structure
+        if not (mod.is_library_cell and mod.name in mod.visited):
+            for inst in mod.insts:
+                (rotate_angle, trans_flags) = gdsMill.getReferenceTransform(inst.mirror, inst.rotate)
+                coordinates = (self.gds.userUnits(inst.offset[0]),
+                               self.gds.userUnits(inst.offset[1]))
+                self.add_module(inst.mod, transform_path, rotate_angle, trans_flags, coordinates)
+        del transform_path[-1]
+
+
+    def add_gds_structure(self, layout, sref, transform_path):
+        """ Add a structure of a library cell to the xyTree. """
+
+        transform_path.append(gdsMill.getTransformMatrices(sref.rotateAngle, sref.transFlags, sref.coordinates))
+        structure = self.find_structure(layout, sref.sName)
+        self.add_tree_unit(structure.boundaries, transform_path)
+        for child in gdsMill.getStructureReferences(structure):
+            self.add_gds_structure(layout, child, transform_path)
+        del transform_path[-1]
+
+
+    def find_structure(self, layout, name):
+        """ Find a structure in a layout whether its name is padded or not. """
+
+        for key in [name, layout.padText(name), name.rstrip("\x00")]:
+            if key in layout.structures:
+                return layout.structures[key]
+        debug.error("Could not find structure {} in GDS file.".format(name), -1)
+
+
+    def get_module_structure(self, mod):
+        """
+        Return the structure of a module containing its own shapes and pins.
+        """
+
+        if mod.name in self.structures:
+            return self.structures[mod.name]
+
+        if mod.is_library_cell:
+            # Library cells start with the shapes in their GDSII file
+            structure = mod.gds.structures[mod.gds.rootStructureName]
+            if mod.name not in mod.visited:
+                structure = self.copy_structure(structure)
+                self.write_shapes(mod, structure)
+        else:
+            structure = gdsMill.GdsStructure()
+            structure.name = mod.cell_name
+            self.write_shapes(mod, structure)
+
+        self.structures[mod.name] = structure
+        return structure
+
+
+    def copy_structure(self, structure):
+        """ Copy the lists of a structure so that new shapes can be added. """
+
+        new_structure = gdsMill.GdsStructure()
+        new_structure.name = structure.name
+        new_structure.boundaries = list(structure.boundaries)
+        new_structure.srefs = list(structure.srefs)
+        new_structure.arefs = list(structure.arefs)
+        new_structure.texts = list(structure.texts)
+        return new_structure
+
+
+    def write_shapes(self, mod, structure):
+        """
+        Write the objects and pins of a module into the given structure in the
+        same order as `hierarchy_layout.gds_write_file`.
+        """
+
+        # Temporary layout whose root structure is the given structure
+        layout = gdsMill.VlsiLayout(units=self.units)
+        layout.rootStructureName = structure.name
+        layout.structures[structure.name] = structure
+        for obj in mod.objs:
+            obj.gds_write_file(layout)
+        for pin_name in mod.pin_map.keys():
+            for pin in mod.pin_map[pin_name]:
+                pin.gds_write_file(layout)
+
+
+    def add_tree_unit(self, boundaries, transform_path):
+        """
+        Add the coordinate space of the structure to the xyTree like
+        `VlsiLayout.populateCoordinateMap`.
+        """
+
+        (origin, u, v) = gdsMill.getCoordinateSpace(transform_path)
+        self.xyTree.append((boundaries, origin, u, v))
+
+
+    def get_structure_shapes(self, boundaries, lpp):
+        """ Return the shapes of a structure on the given layer. """
+
+        key = (id(boundaries),) + gdsMill.lppKey(lpp)
+        if key not in self.shape_cache:
+            self.shape_cache[key] = gdsMill.getLocalShapes(boundaries, lpp)
+        return self.shape_cache[key]
+
+
+    def get_tree_groups(self):
+        """
+        Group the instances in the xyTree by structure and return their
+        boundaries, indices, and transforms for `gdsMill.transformShapes`.
+        """
+
+        if self.tree_groups is None:
+            self.tree_groups = gdsMill.groupTreeTransforms(self.xyTree, id)
+        return self.tree_groups
+
+
+    def getAllShapes(self, lpp):
+        """
+        Return all shapes on a given layer in [llx, lly, urx, ury] format and
+        user units for rectangles and [coordinate 1, coordinate 2,...] format
+        and user units for polygons.
+        """
+
+        # Transform all instances of a structure at once but add the shapes
+        # in the xyTree order like gdsMill
+        tree_shapes = [[]] * len(self.xyTree)
+        for (boundaries, indices, transforms) in self.get_tree_groups():
+            shapes = self.get_structure_shapes(boundaries, lpp)
+            if not shapes[2]:
+                continue
+            for index, instance_shapes in zip(indices, gdsMill.transformShapes(shapes, transforms)):
+                tree_shapes[index] = instance_shapes
+        boundaries = set()
+        for shapes in tree_shapes:
+            boundaries.update(shapes)
+
+        # Convert to user units
+        return [[x * self.units[0] for x in boundary] for boundary in boundaries]
+
+
+    def get_labels(self):
+        """
+        Return the text labels at the top level in the order that gdsMill
+        processes them, which is by layer in the order the layers are found
+        in a GDSII file, starting with the top-level shapes.
+        """
+
+        if self.labels is None:
+            structure = self.get_module_structure(self.design)
+            layers = []
+            for shape in structure.boundaries + structure.texts:
+                if shape.drawingLayer not in layers:
+                    layers.append(shape.drawingLayer)
+            self.labels = [x for layer_number in layers for x in structure.texts if x.drawingLayer == layer_number]
+        return self.labels
+
+
+    def process_label_pins(self, pin_name):
+        """
+        Find the text labels of a pin at the top level and create a map to a
+        list of shapes that they enclose on the same layer. Only the layers
+        of these labels are flattened.
+        """
+
+        pin_lists = []
+        for label in self.get_labels():
+            if label.textString.rstrip("\x00") != pin_name:
+                continue
+            lpp = (label.drawingLayer, None)
+            if label.drawingLayer not in self.label_shapes:
+                shapes = self.getAllShapes(lpp)
+                self.label_shapes[label.drawingLayer] = (shapes, gdsMill.RectangleGrid(shapes))
+            (shapes, shape_grid) = self.label_shapes[label.drawingLayer]
+            user_coordinate = [x * self.units[0] for x in label.coordinates[0]]
+            pin_shapes = [(lpp, shapes[i]) for i in shape_grid.findEnclosing(user_coordinate)]
+            pin_lists.append(pin_shapes)
+        # Missing pins fail like the pins of a `VlsiLayout`
+        if not pin_lists:
+            raise KeyError(pin_name)
+        self.pins[pin_name] = pin_lists
+
+
+    def getAllPinShapes(self, pin_name):
+        """
+        Search for a pin label and return all the enclosing rectangles on the
+        same layer as the pin label.
+        """
+
+        if pin_name not in self.pins:
+            self.process_label_pins(pin_name)
+        shape_list = []
+        for pin_list in self.pins[pin_name]:
+            shape_list.extend(pin_list)
+        return shape_list
@@ -6,8 +6,6 @@
 from openram import debug
 from openram.base.vector import vector
 from openram.base.vector3d import vector3d
-from openram import OPTS
-from .graph import graph
 from .graph_shape import graph_shape
 from .router import router
 
@@ -30,8 +28,8 @@ class signal_escape_router(router):
         """ Route the given pins to the perimeter. """
         debug.info(1, "Running signal escape router...")
 
-        # Prepare gdsMill to find pins and blockages
-        self.prepare_gds_reader()
+        # Collect the layout shapes to find pins and blockages
+        self.prepare_layout()
 
         # Find pins to be routed
         for name in pin_names:
@@ -53,29 +51,23 @@ class signal_escape_router(router):
         for pin in self.all_pins:
             self.blockages.append(self.inflate_shape(pin))
 
+        # Change fake pins' names so the graphs will treat them as routable
+        pairs = []
+        for source, target, _ in self.get_route_pairs(pin_names):
+            target.name = source.name
+            pairs.append((source, target))
+
         # Route vdd and gnd
         routed_count = 0
         routed_max = len(pin_names)
-        for source, target, _ in self.get_route_pairs(pin_names):
-            # Change fake pin's name so the graph will treat it as routable
-            target.name = source.name
-            # Create the graph
-            g = graph(self)
-            g.create_graph(source, target)
-            # Find the shortest path from source to target
-            path = g.find_shortest_path()
-            # If no path is found, throw an error
-            if path is None:
-                self.write_debug_gds(gds_name="{}error.gds".format(OPTS.openram_temp), g=g, source=source, target=target)
-                debug.error("Couldn't route from {} to {}.".format(source, target), -1)
-            # Create the path shapes on layout
-            new_wires, new_vias = self.add_path(path)
+        for source, target, new_wires, new_vias in self.iterate_routes(pairs):
             self.new_pins[source.name] = new_wires[-1]
             # Find the recently added shapes
             self.find_blockages(name, new_wires)
             self.find_vias(new_vias)
             routed_count += 1
             debug.info(2, "Routed {} of {} signal pins".format(routed_count, routed_max))
+        debug.info(2, "Expanded {} graph nodes to route signal pins".format(self.expanded_count))
         self.replace_layout_pins()
 
 
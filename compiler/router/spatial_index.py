@@ -0,0 +1,242 @@
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California, Santa Cruz
+# All rights reserved.
+#
+import math
+from openram import debug
+
+
+class spatial_index:
+    """
+    This class keeps shapes in the buckets of a uniform grid for each layer so
+    that the shapes around a region can be found without checking all shapes.
+
+    It also keeps the insertion order of the shapes so that routers can use it
+    in place of their lists of blockages and vias. Shapes are removed by
+    identity. Shapes that would fill more than `max_cells` buckets are kept in
+    a separate list for each layer and checked by every query.
+
+    The shapes inserted and removed since a log state are kept until the log
+    is trimmed, so that callers can find out what changed while they worked.
+    """
+
+    def __init__(self, cell_size, shapes=None, max_cells=64):
+
+        debug.check(cell_size > 0, "Spatial index cell size must be positive: {}".format(cell_size))
+        # Size of a grid cell
+        self.cell_size = cell_size
+        # Maximum number of buckets of a shape
+        self.max_cells = max_cells
+        # Current shapes in insertion order, keyed by their ids
+        self.shapes = {}
+        # Insertion numbers of the current shapes
+        self.order = {}
+        # Number of shapes that were ever inserted
+        self.insert_count = 0
+        # Shapes inserted and removed since the start of the logs, in order
+        self.inserted = []
+        self.removed = []
+        # Log state of the first entries of the logs
+        self.log_start = (0, 0)
+        # Buckets for each layer number, keyed by cell coordinates
+        self.buckets = {}
+        # Shapes in too many buckets for each layer number, keyed by their ids
+        self.large = {}
+        # Layer number and cells of each current shape (None if it is large)
+        self.cells = {}
+        # Range of the cells that have been used
+        self.bounds = None
+
+        if shapes:
+            self.extend(shapes)
+
+
+    def __len__(self):
+
+        return len(self.shapes)
+
+
+    def __iter__(self):
+
+        return iter(self.shapes.values())
+
+
+    def get_cell_range(self, ll, ur):
+        """ Return the range of cell coordinates that the rectangle overlaps. """
+
+        size = self.cell_size
+        return (math.floor(ll.x / size),
+                math.floor(ll.y / size),
+                math.floor(ur.x / size),
+                math.floor(ur.y / size))
+
+
+    def get_cells(self, cell_range):
+        """ Return the cell coordinates in the given range. """
+
+        min_i, min_j, max_i, max_j = cell_range
+        return [(i, j) for i in range(min_i, max_i + 1) for j in range(min_j, max_j + 1)]
+
+
+    def append(self, shape):
+        """ Insert a shape to the end of the index. """
+
+        key = id(shape)
+        layer = shape.lpp[0]
+        self.shapes[key] = shape
+        self.order[key] = self.insert_count
+        self.insert_count += 1
+        self.inserted.append(shape)
+        cell_range = self.get_cell_range(*shape.rect)
+        if (cell_range[2] - cell_range[0] + 1) * (cell_range[3] - cell_range[1] + 1) > self.max_cells:
+            self.cells[key] = (layer, None)
+            self.large.setdefault(layer, {})[key] = shape
+            return
+        cells = self.get_cells(cell_range)
+        # Expand the range of used cells
+        if self.bounds is None:
+            self.bounds = cell_range
+        else:
+            self.bounds = (min(self.bounds[0], cell_range[0]),
+                           min(self.bounds[1], cell_range[1]),
+                           max(self.bounds[2], cell_range[2]),
+                           max(self.bounds[3], cell_range[3]))
+        self.cells[key] = (layer, cells)
+        buckets = self.buckets.setdefault(layer, {})
+        for cell in cells:
+            buckets.setdefault(cell, {})[key] = shape
+
+
+    def extend(self, shapes):
+        """ Insert shapes to the end of the index. """
+
+        for shape in shapes:
+            self.append(shape)
+
+
+    def remove(self, shape):
+        """ Remove a shape from the index. """
+
+        key = id(shape)
+        if key not in self.shapes:
+            raise ValueError("Shape {} is not in the index.".format(shape))
+        layer, cells = self.cells.pop(key)
+        if cells is None:
+            del self.large[layer][key]
+        else:
+            buckets = self.buckets[layer]
+            for cell in cells:
+                del buckets[cell][key]
+        del self.shapes[key]
+        del self.order[key]
+        self.removed.append(shape)
+
+
+    def get_log_state(self):
+        """ Return the numbers of shapes inserted and removed so far. """
+
+        return (self.log_start[0] + len(self.inserted),
+                self.log_start[1] + len(self.removed))
+
+
+    def get_changes(self, state):
+        """
+        Return the shapes inserted and removed since the log state or None if
+        the log was trimmed after it.
+        """
+
+        if state[0] < self.log_start[0] or state[1] < self.log_start[1]:
+            return None
+        return (self.inserted[state[0] - self.log_start[0]:],
+                self.removed[state[1] - self.log_start[1]:])
+
+
+    def trim_log(self, state=None):
+        """
+        Drop the inserted and removed shapes before the log state or all of
+        them if the state isn't given.
+        """
+
+        if state is None:
+            state = self.get_log_state()
+        state = (max(state[0], self.log_start[0]), max(state[1], self.log_start[1]))
+        del self.inserted[:state[0] - self.log_start[0]]
+        del self.removed[:state[1] - self.log_start[1]]
+        self.log_start = state
+
+
+    def contains_shape(self, shape):
+        """ Return if this exact shape object is in the index. """
+
+        return id(shape) in self.shapes
+
+
+    def get_order(self, shape):
+        """ Return the insertion number of a shape in the index. """
+
+        return self.order[id(shape)]
+
+
+    def overlapping(self, query, layer=None, ordered=True):
+        """
+        Return the shapes whose bounding boxes overlap the query shape in
+        insertion order. If the layer number is given, only the shapes on that
+        layer are returned.
+        """
+
+        ll, ur = query.rect
+        return self.overlapping_rect(ll, ur, layer, ordered)
+
+
+    def overlapping_point(self, point, layer=None, ordered=True):
+        """
+        Return the shapes whose bounding boxes contain the point in insertion
+        order.
+        """
+
+        return self.overlapping_rect(point, point, layer, ordered)
+
+
+    def overlapping_rect(self, ll, ur, layer=None, ordered=True):
+        """
+        Return the shapes whose bounding boxes overlap the rectangle in
+        insertion order. Shapes are returned in any order if they don't need
+        to be ordered, which is faster.
+        """
+
+        if layer is None:
+            layers = self.buckets.values()
+            large = self.large.values()
+        else:
+            layers = [self.buckets[layer]] if layer in self.buckets else []
+            large = [self.large[layer]] if layer in self.large else []
+        found = {}
+        for shapes in large:
+            found.update(shapes)
+        if self.bounds is not None:
+            # Don't search the cells that have never been used
+            cell_range = self.get_cell_range(ll, ur)
+            cell_range = (max(self.bounds[0], cell_range[0]),
+                          max(self.bounds[1], cell_range[1]),
+                          min(self.bounds[2], cell_range[2]),
+                          min(self.bounds[3], cell_range[3]))
+            cells = self.get_cells(cell_range)
+            for buckets in layers:
+                for cell in cells:
+                    if cell in buckets:
+                        found.update(buckets[cell])
+        if not ordered:
+            shapes = []
+            for shape in found.values():
+                sll, sur = shape.rect
+                if sll.x <= ur.x and ll.x <= sur.x and sll.y <= ur.y and ll.y <= sur.y:
+                    shapes.append(shape)
+            return shapes
+        shapes = []
+        for key, shape in found.items():
+            sll, sur = shape.rect
+            if sll.x <= ur.x and ll.x <= sur.x and sll.y <= ur.y and ll.y <= sur.y:
+                shapes.append((self.order[key], shape))
+        shapes.sort(key=lambda x: x[0])
+        return [x[1] for x in shapes]
@@ -5,10 +5,9 @@
 #
 from openram import debug
 from openram.base.vector import vector
-from openram import OPTS
-from .graph import graph
 from .graph_shape import graph_shape
 from .router import router
+from .routing_grid import routing_grid
 
 
 class supply_router(router):
@@ -36,8 +35,8 @@ class supply_router(router):
         self.vdd_name = vdd_name
         self.gnd_name = gnd_name
 
-        # Prepare gdsMill to find pins and blockages
-        self.prepare_gds_reader()
+        # Collect the layout shapes to find pins and blockages
+        self.prepare_layout()
 
         # Find pins to be routed
         self.find_pins(vdd_name)
@@ -66,30 +65,26 @@ class supply_router(router):
         for pin in self.all_pins:
             self.blockages.append(self.inflate_shape(pin))
 
+        # Build the routing grid once and find all paths on it
+        self.grid = routing_grid(self)
+
+        # Route closest pins according to the minimum spanning trees of vdd
+        # and gnd
+        pairs = []
+        for pin_name in [vdd_name, gnd_name]:
+            pairs.extend(self.get_mst_pairs(list(self.pins[pin_name])))
+
         # Route vdd and gnd
         routed_count = 0
         routed_max = len(self.pins[vdd_name]) + len(self.pins[gnd_name])
-        for pin_name in [vdd_name, gnd_name]:
-            pins = self.pins[pin_name]
-            # Route closest pins according to the minimum spanning tree
-            for source, target in self.get_mst_pairs(list(pins)):
-                # Create the graph
-                g = graph(self)
-                g.create_graph(source, target)
-                # Find the shortest path from source to target
-                path = g.find_shortest_path()
-                # If no path is found, throw an error
-                if path is None:
-                    self.write_debug_gds(gds_name="{}error.gds".format(OPTS.openram_temp), g=g, source=source, target=target)
-                    debug.error("Couldn't route from {} to {}.".format(source, target), -1)
-                # Create the path shapes on layout
-                new_wires, new_vias = self.add_path(path)
-                # Find the recently added shapes
-                self.find_blockages(pin_name, new_wires)
-                self.find_vias(new_vias)
-                # Report routed count
-                routed_count += 1
-                debug.info(2, "Routed {} of {} supply pins".format(routed_count, routed_max))
+        for source, target, new_wires, new_vias in self.iterate_routes(pairs):
+            # Find the recently added shapes
+            self.find_blockages(source.name, new_wires)
+            self.find_vias(new_vias)
+            # Report routed count
+            routed_count += 1
+            debug.info(2, "Routed {} of {} supply pins".format(routed_count, routed_max))
+        debug.info(2, "Expanded {} graph nodes to route supply pins".format(self.expanded_count))
 
 
     def add_side_pin(self, pin_name, side, num_vias=3, num_fake_pins=4):
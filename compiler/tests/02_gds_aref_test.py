@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import sys, os, re
+import unittest
+from testutils import *
+
+import openram
+from openram import debug
+from openram import OPTS
+
+
+class gds_aref_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        openram.init_openram(config_file, is_unit_test=True)
+        from openram.gdsMill import gdsMill
+        from openram.tech import GDS
+
+        def read(name):
+            layout = gdsMill.VlsiLayout(units=GDS["unit"])
+            gdsMill.Gds2reader(layout).loadFromFile(name)
+            return layout
+
+        def get_shapes(layout):
+            shapes = {}
+            for layer in layout.layerNumbersInUse:
+                shapes[layer] = sorted(layout.getAllShapes((layer, None)))
+            return shapes
+
+        gds_dir = OPTS.openram_tech + "/gds_lib"
+        gds_files = [os.path.join(gds_dir, x) for x in sorted(os.listdir(gds_dir)) if re.search("\.gds$", x, re.IGNORECASE)]
+        cell = read(gds_files[0])
+        cell_name = cell.rootStructureName
+
+        (columns, rows) = (3, 2)
+        pitch = (2.5, 4.0)
+        offset = (1.0, -3.0)
+        for mirror in ["R0", "MX", "MY", "XY"]:
+            # One array reference
+            array_layout = gdsMill.VlsiLayout(name="array", units=GDS["unit"])
+            array_layout.addArrayInstance(cell, cell_name, offset, columns, rows, pitch, mirror=mirror)
+            array_name = "{0}gds_aref_{1}.gds".format(OPTS.openram_temp, mirror)
+            gdsMill.Gds2writer(array_layout).writeToFile(array_name)
+
+            # The same array as structure references
+            sref_layout = gdsMill.VlsiLayout(name="array", units=GDS["unit"])
+            for row in range(rows):
+                for column in range(columns):
+                    sref_layout.addInstance(cell,
+                                            cell_name,
+                                            offsetInMicrons=(offset[0] + column * pitch[0],
+                                                             offset[1] + row * pitch[1]),
+                                            mirror=mirror)
+            sref_name = "{0}gds_sref_{1}.gds".format(OPTS.openram_temp, mirror)
+            gdsMill.Gds2writer(sref_layout).writeToFile(sref_name)
+
+            # The array reference is read back with its size and lattice
+            array_read = read(array_name)
+            (aref, ) = array_read.structures[array_read.rootStructureName].arefs
+            self.assertEqual(aref.aName, cell_name)
+            self.assertEqual((aref.columns, aref.rows), (columns, rows))
+            self.assertEqual(aref.coordinates, [(array_layout.userUnits(x), array_layout.userUnits(y))
+                                                for (x, y) in [offset,
+                                                               (offset[0] + columns * pitch[0], offset[1]),
+                                                               (offset[0], offset[1] + rows * pitch[1])]])
+            elements = gdsMill.getArrayElements(aref)
+            sref_read = read(sref_name)
+            srefs = sref_read.structures[sref_read.rootStructureName].srefs
+            self.assertEqual([(x.coordinates, x.transFlags, x.rotateAngle) for x in elements],
+                             [(x.coordinates, x.transFlags, x.rotateAngle) for x in srefs])
+
+            # Both files have the same shapes and pins
+            self.assertEqual(len(array_read.xyTree), columns * rows + 1)
+            self.assertEqual(get_shapes(array_read), get_shapes(sref_read))
+            self.assertEqual(array_read.pins.keys(), sref_read.pins.keys())
+
+        openram.end_openram()
+
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = openram.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import sys, os, re
+import shutil
+import pickle
+import unittest
+from testutils import *
+
+import openram
+from openram import debug
+from openram import OPTS
+
+
+class gds_cache_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        openram.init_openram(config_file, is_unit_test=True)
+        from openram.gdsMill import gdsMill
+        from openram.base import utils
+        from openram.base.gds_cache import gds_cache
+        from openram.tech import GDS
+
+        def get_content(layout):
+            structures = {}
+            for name, structure in layout.structures.items():
+                content = dict(vars(structure))
+                for key in ["boundaries", "paths", "srefs", "arefs", "texts", "nodes", "boxes"]:
+                    content[key] = [vars(x) for x in content[key]]
+                structures[name] = content
+            return (layout.rootStructureName, layout.layerNumbersInUse, structures, layout.pins)
+
+        path = OPTS.openram_temp + "gds_cache"
+        shutil.rmtree(path, ignore_errors=True)
+        OPTS.gds_cache_path = path
+        cache = gds_cache(path)
+
+        gds_dir = OPTS.openram_tech + "/gds_lib"
+        gds_files = [os.path.join(gds_dir, x) for x in sorted(os.listdir(gds_dir)) if re.search("\.gds$", x, re.IGNORECASE)]
+
+        # Cached layouts are the same as parsed layouts and are new objects
+        for name in gds_files:
+            layout = gdsMill.VlsiLayout(units=GDS["unit"])
+            gdsMill.Gds2reader(layout).loadFromFile(name, utils.special_purposes)
+            key = cache.get_key(OPTS.tech_name, name, GDS["unit"], utils.special_purposes)
+            self.assertEqual(cache.load(key), None)
+            stored_layout = utils.read_gds_layout(name, GDS["unit"])
+            self.assertTrue(os.path.isfile(cache.get_file_name(key)))
+            cached_layout = utils.read_gds_layout(name, GDS["unit"])
+            self.assertIsNot(cached_layout, stored_layout)
+            self.assertEqual(get_content(cached_layout), get_content(layout))
+            self.assertEqual(get_content(stored_layout), get_content(layout))
+
+        # Keys change with the file contents, the parameters and the version
+        gds_name = OPTS.openram_temp + "gds_cache.gds"
+        shutil.copy(gds_files[0], gds_name)
+        key = cache.get_key(OPTS.tech_name, gds_name, GDS["unit"], {})
+        self.assertNotEqual(key, cache.get_key("other", gds_name, GDS["unit"], {}))
+        self.assertNotEqual(key, cache.get_key(OPTS.tech_name, gds_name, (0.001, 1e-9), {}))
+        self.assertNotEqual(key, cache.get_key(OPTS.tech_name, gds_name, GDS["unit"], {1: [2]}))
+        cache.version += 1
+        self.assertNotEqual(key, cache.get_key(OPTS.tech_name, gds_name, GDS["unit"], {}))
+        cache.version -= 1
+        source_hash = gds_cache.get_source_hash()
+        gds_cache.source_hash = "other"
+        self.assertNotEqual(key, cache.get_key(OPTS.tech_name, gds_name, GDS["unit"], {}))
+        gds_cache.source_hash = source_hash
+        with open(gds_name, "ab") as f:
+            f.write(bytes(2))
+        self.assertNotEqual(key, cache.get_key(OPTS.tech_name, gds_name, GDS["unit"], {}))
+
+        # Broken entries are read again and replaced
+        key = cache.get_key(OPTS.tech_name, gds_files[0], GDS["unit"], utils.special_purposes)
+        with open(cache.get_file_name(key), "wb") as f:
+            f.write(b"broken")
+        self.assertEqual(cache.load(key), None)
+        layout = utils.read_gds_layout(gds_files[0], GDS["unit"])
+        self.assertEqual(get_content(cache.load(key)), get_content(layout))
+
+        # Entries only make layout objects
+        with open(cache.get_file_name(key), "wb") as f:
+            pickle.dump(os.getcwd, f)
+        self.assertEqual(cache.load(key), None)
+        with open(cache.get_file_name(key), "wb") as f:
+            pickle.dump({"structures": []}, f)
+        self.assertEqual(cache.load(key), None)
+
+        # The directory must be private
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o700)
+        os.chmod(path, 0o770)
+        with self.assertRaises(AssertionError):
+            gds_cache(path)
+        os.chmod(path, 0o700)
+
+        OPTS.gds_cache_path = None
+        openram.end_openram()
+
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = openram.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
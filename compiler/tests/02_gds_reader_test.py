@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import sys, os, re
+import time
+import unittest
+from testutils import *
+
+import openram
+from openram import debug
+from openram import OPTS
+
+
+class gds_reader_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        openram.init_openram(config_file, is_unit_test=True)
+        from openram.gdsMill import gdsMill
+
+        def read_all(use_mmap):
+            layouts = {}
+            start_time = time.time()
+            for name in gds_files:
+                layout = gdsMill.VlsiLayout(units=(0.001, 1e-9))
+                reader = gdsMill.Gds2reader(layout, useMmap=use_mmap)
+                reader.loadFromFile(name)
+                layouts[name] = layout
+            return layouts, time.time() - start_time
+
+        def get_content(layout):
+            structures = {}
+            for name, structure in layout.structures.items():
+                content = dict(vars(structure))
+                for key in ["boundaries", "paths", "srefs", "arefs", "texts", "nodes", "boxes"]:
+                    content[key] = [vars(x) for x in content[key]]
+                structures[name] = content
+            return (layout.info, layout.layerNumbersInUse, structures)
+
+        gds_dir = OPTS.openram_tech + "/gds_lib"
+        gds_files = [os.path.join(gds_dir, x) for x in sorted(os.listdir(gds_dir)) if re.search("\.gds$", x, re.IGNORECASE)]
+
+        # Both readers create the same structures
+        mmap_layouts, mmap_time = read_all(True)
+        stream_layouts, stream_time = read_all(False)
+        debug.info(1, "Read {0} GDS files: mmap {1:.3f}s, stream {2:.3f}s".format(len(gds_files),
+                                                                              mmap_time,
+                                                                              stream_time))
+        for name in gds_files:
+            self.assertEqual(get_content(mmap_layouts[name]), get_content(stream_layouts[name]))
+
+        # Put all cells in one library and load them one at a time
+        library = gdsMill.VlsiLayout(units=(0.001, 1e-9))
+        for layout in mmap_layouts.values():
+            library.structures.update(layout.structures)
+        library_name = OPTS.openram_temp + "library.gds"
+        gdsMill.Gds2writer(library).writeToFile(library_name)
+        if os.path.isfile(library_name + ".idx"):
+            os.remove(library_name + ".idx")
+        # Load the cells without the index, then save it and use it again
+        for use_index in [False, True, True]:
+            for name in gds_files:
+                full_layout = mmap_layouts[name]
+                cell_layout = gdsMill.VlsiLayout(units=(0.001, 1e-9))
+                reader = gdsMill.Gds2reader(cell_layout)
+                self.assertTrue(reader.loadStructure(library_name, full_layout.rootStructureName, cacheIndex=use_index))
+                self.assertEqual(get_content(cell_layout)[2], get_content(full_layout)[2])
+                self.assertEqual(cell_layout.pins.keys(), full_layout.pins.keys())
+            # The index is only saved next to the library if it is cached
+            self.assertEqual(os.path.isfile(library_name + ".idx"), use_index)
+
+        # Layouts of the flow only decode their cell from a library
+        from openram.base import utils
+        for name in gds_files:
+            full_layout = mmap_layouts[name]
+            cell_name = full_layout.rootStructureName.rstrip("\x00")
+            cell_layout = utils.read_gds_layout(library_name, (0.001, 1e-9), cell_name)
+            self.assertEqual(cell_layout.rootStructureName, full_layout.rootStructureName)
+            self.assertEqual(get_content(cell_layout)[2], get_content(full_layout)[2])
+            self.assertEqual(cell_layout.pins.keys(), utils.read_gds_layout(name, (0.001, 1e-9)).pins.keys())
+            # Files with one cell are read as before
+            self.assertEqual(get_content(utils.read_gds_layout(name, (0.001, 1e-9), cell_name)),
+                             get_content(utils.read_gds_layout(name, (0.001, 1e-9))))
+
+        openram.end_openram()
+
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = openram.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
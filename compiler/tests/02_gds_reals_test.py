@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import sys, os
+import math
+import random
+import struct
+import unittest
+from testutils import *
+
+import openram
+from openram import debug
+from openram import OPTS
+
+
+def loop_ieee_from_ibm(ibm_data):
+    """ The bit by bit IBM to IEEE conversion that gdsMill used before. """
+    data = struct.unpack(">Q", ibm_data)[0]
+    sign = data >> 63
+    exponent = (data >> 56) & 0x7f
+    mantissa = (data << 8) & 0xffffffffffffffff
+    if mantissa == 0:
+        return 0.0
+    exponent = ((exponent - 64) * 4) + 1023
+    while mantissa & 0x8000000000000000 == 0:
+        mantissa <<= 1
+        exponent -= 1
+    mantissa <<= 1
+    exponent -= 1
+    new_float = (sign << 63) | (exponent << 52) | ((mantissa >> 12) & 0xfffffffffffff)
+    return struct.unpack(">d", struct.pack(">Q", new_float))[0]
+
+
+def loop_ibm_from_ieee(ieee_double):
+    """ The bit by bit IEEE to IBM conversion that gdsMill used before. """
+    data = struct.unpack(">Q", struct.pack(">d", ieee_double))[0]
+    sign = data >> 63
+    exponent = ((data >> 52) & 0x7ff) - 1023
+    mantissa = data << 12
+    if ieee_double == 0:
+        return bytes(8)
+    mantissa >>= 1
+    mantissa = mantissa | 0x8000000000000000
+    exponent += 1
+    for index in range(0, -exponent & 3):
+        mantissa >>= 1
+        mantissa = mantissa & 0x7fffffffffffffff
+    exponent = (exponent + 3) >> 2
+    exponent += 64
+    return struct.pack(">Q", (sign << 63) | (exponent << 56) | ((mantissa >> 8) & 0xffffffffffffff))
+
+
+class gds_reals_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        openram.init_openram(config_file, is_unit_test=True)
+        from openram.gdsMill import gdsMill
+
+        random.seed(0)
+
+        # Every exponent and sign with every mantissa length and single bit
+        ibm_reals = []
+        for exponent in range(128):
+            mantissas = [1 << x for x in range(56)]
+            mantissas += [(1 << x) - 1 for x in range(1, 57)]
+            mantissas += [random.getrandbits(56) | 1 for x in range(20)]
+            for sign in [0, 1]:
+                for mantissa in mantissas:
+                    ibm_reals.append(struct.pack(">Q", (sign << 63) | (exponent << 56) | mantissa))
+        ibm_reals.append(bytes(8))
+        ieee_doubles = gdsMill.ieeeDoublesFromIbmData(b"".join(ibm_reals)).tolist()
+        for (ibm_data, ieee_double) in zip(ibm_reals, ieee_doubles):
+            expected = loop_ieee_from_ibm(ibm_data)
+            self.assertEqual(struct.pack(">d", gdsMill.ieeeDoubleFromIbmData(ibm_data)), struct.pack(">d", expected))
+            self.assertEqual(struct.pack(">d", ieee_double), struct.pack(">d", expected))
+
+        # Doubles over the whole range of IBM reals
+        values = [0.0, 1e-3, 1e-9, 0.5, 1.0, 90.0, 180.0, 270.0, 1 / 3]
+        for exponent in range(-255, 252):
+            values += [math.ldexp(random.uniform(0.5, 1), exponent) for x in range(4)]
+            values += [math.ldexp(0.5, exponent), math.ldexp(1 - 2**-53, exponent)]
+        values += [-x for x in values]
+        ibm_data = gdsMill.ibmDataFromIeeeDoubles(values)
+        for (index, value) in enumerate(values):
+            expected = loop_ibm_from_ieee(value)
+            self.assertEqual(gdsMill.ibmDataFromIeeeDouble(value), expected)
+            self.assertEqual(ibm_data[8 * index:8 * index + 8], expected)
+            # Doubles fit in the IBM mantissa, so they read back exactly
+            self.assertEqual(gdsMill.ieeeDoubleFromIbmData(expected), value)
+        self.assertEqual(gdsMill.ieeeDoublesFromIbmData(ibm_data).tolist(), values)
+
+        openram.end_openram()
+
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = openram.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
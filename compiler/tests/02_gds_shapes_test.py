@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import sys, os, re
+import random
+import unittest
+from testutils import *
+
+import openram
+from openram import debug
+from openram import OPTS
+
+
+class gds_shapes_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        openram.init_openram(config_file, is_unit_test=True)
+        from openram.gdsMill import gdsMill
+        from openram.tech import GDS
+
+        def get_instance_shapes(layout, lpp):
+            boundaries = set()
+            for tree_unit in layout.xyTree:
+                boundaries.update(layout.getShapesInStructure(lpp, tree_unit))
+            return [[x * layout.units[0] for x in boundary] for boundary in boundaries]
+
+        gds_dir = OPTS.openram_tech + "/gds_lib"
+        gds_files = [os.path.join(gds_dir, x) for x in sorted(os.listdir(gds_dir)) if re.search("\.gds$", x, re.IGNORECASE)]
+
+        for name in gds_files:
+            layout = gdsMill.VlsiLayout(units=GDS["unit"])
+            gdsMill.Gds2reader(layout).loadFromFile(name)
+            for layer in layout.layerNumbersInUse:
+                for lpp in [(layer, None), (layer, 0), (layer, [0, 20])]:
+                    # Cached and transformed shapes are the same as transforming
+                    # every instance one by one, including the order
+                    shapes = layout.getAllShapes(lpp)
+                    self.assertEqual(shapes, get_instance_shapes(layout, lpp))
+                    self.assertEqual(layout.getAllShapes(lpp), shapes)
+                    # Arrays have the same rectangles and polygons
+                    (rects, polygons) = layout.getAllShapes(lpp, asArray=True)
+                    self.assertEqual(rects.tolist(), [x for x in shapes if len(x) == 4])
+                    self.assertEqual([x.flatten().tolist() for x in polygons], [x for x in shapes if len(x) != 4])
+
+            # Pins are the same as checking every shape for every label
+            pins = {}
+            for layer in layout.layerNumbersInUse:
+                lpp = (layer, None)
+                shapes = layout.getAllShapes(lpp)
+                for label in layout.getTexts(lpp):
+                    coordinate = [x * layout.units[0] for x in label.coordinates[0]]
+                    pin_shapes = [(lpp, x) for x in shapes if layout.labelInRectangle(coordinate, x)]
+                    pins.setdefault(label.textString.rstrip("\x00"), []).append(pin_shapes)
+            self.assertEqual(layout.pins, pins)
+
+        # The grid finds the same shapes as checking all of them, including
+        # polygons whose first corner isn't the lower left
+        random.seed(0)
+        shapes = []
+        for i in range(2000):
+            (x, y) = (random.uniform(0, 100), random.uniform(0, 100))
+            (w, h) = (random.choice([0.1, 1, 10, 80]), random.choice([0.1, 1, 10, 80]))
+            if i % 10:
+                shapes.append([x, y, x + w, y + h])
+            else:
+                shapes.append([x + w, y, x, y + h, x, y])
+        grid = gdsMill.RectangleGrid(shapes)
+        points = [x[0:2] for x in shapes[:100]] + [x[2:4] for x in shapes[:100]]
+        points += [[random.uniform(-10, 110), random.uniform(-10, 110)] for i in range(200)]
+        for point in points:
+            self.assertEqual(grid.findEnclosing(point),
+                             [i for i, x in enumerate(shapes) if layout.labelInRectangle(point, x)])
+
+        # Shapes added after the first query are found
+        layout = gdsMill.VlsiLayout(name="shapes", units=GDS["unit"])
+        layout.populateCoordinateMap()
+        self.assertEqual(layout.getAllShapes((1, 0)), [])
+        layout.addBox(1, 0, (1, 2), 3, 4)
+        self.assertEqual(layout.getAllShapes((1, 0)), get_instance_shapes(layout, (1, 0)))
+        self.assertEqual(len(layout.getAllShapes((1, 0))), 1)
+
+        openram.end_openram()
+
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = openram.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
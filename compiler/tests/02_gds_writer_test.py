@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import sys, os, re
+import struct
+import time
+import unittest
+from testutils import *
+
+import openram
+from openram import debug
+from openram import OPTS
+
+
+class gds_writer_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        openram.init_openram(config_file, is_unit_test=True)
+        from openram.gdsMill import gdsMill
+
+        def write(layout, buffer_size):
+            gds_name = "{0}gds_writer_{1}.gds".format(OPTS.openram_temp, buffer_size)
+            start_time = time.time()
+            gdsMill.Gds2writer(layout, bufferSize=buffer_size).writeToFile(gds_name)
+            write_time = time.time() - start_time
+            with open(gds_name, "rb") as f:
+                return f.read(), write_time
+
+        gds_dir = OPTS.openram_tech + "/gds_lib"
+        gds_files = [os.path.join(gds_dir, x) for x in sorted(os.listdir(gds_dir)) if re.search("\.gds$", x, re.IGNORECASE)]
+
+        # The buffered writer writes the same bytes as the direct writer
+        buffered_time = 0
+        direct_time = 0
+        for name in gds_files:
+            layout = gdsMill.VlsiLayout(units=(0.001, 1e-9))
+            gdsMill.Gds2reader(layout).loadFromFile(name)
+            buffered_data, write_time = write(layout, 1 << 22)
+            buffered_time += write_time
+            direct_data, write_time = write(layout, 0)
+            direct_time += write_time
+            self.assertEqual(buffered_data, direct_data)
+            # Writing the structures one at a time to a stream is the same
+            stream_name = OPTS.openram_temp + "gds_writer_stream.gds"
+            writer = gdsMill.Gds2writer(layout)
+            writer.openStream(stream_name)
+            for structure_name, structure in layout.structures.items():
+                writer.writeStructure(structure_name, structure)
+            self.assertEqual(writer.structureNames, set(layout.structures.keys()))
+            writer.closeStream()
+            with open(stream_name, "rb") as f:
+                self.assertEqual(f.read(), buffered_data)
+        debug.info(1, "Wrote {0} GDS files: buffered {1:.3f}s, direct {2:.3f}s".format(len(gds_files),
+                                                                                   buffered_time,
+                                                                                   direct_time))
+
+        # Copies of a cell are merged and their references point to the
+        # first one, which leaves the same shapes
+        from openram.tech import GDS
+        cell = gdsMill.VlsiLayout(units=GDS["unit"])
+        gdsMill.Gds2reader(cell).loadFromFile(gds_files[0])
+        cell_structure = cell.structures[cell.rootStructureName]
+        layout = gdsMill.VlsiLayout(name="merge", units=GDS["unit"])
+        for i in range(3):
+            copy = gdsMill.VlsiLayout(name="copy{}".format(i), units=GDS["unit"])
+            copy_structure = copy.structures[copy.rootStructureName]
+            for key in ["boundaries", "paths", "srefs", "arefs", "texts", "nodes", "boxes"]:
+                # Reverse the elements of one copy since the order doesn't matter
+                elements = getattr(cell_structure, key)
+                setattr(copy_structure, key, elements[::-1] if i == 1 else list(elements))
+            layout.addInstance(copy, offsetInMicrons=(i * 10, 0), mirror="R0")
+        layout.addInstance(cell, offsetInMicrons=(0, 10), mirror="MX")
+        layouts = {}
+        for merge in [False, True]:
+            gds_name = "{0}gds_writer_merge_{1}.gds".format(OPTS.openram_temp, merge)
+            gdsMill.Gds2writer(layout, mergeStructures=merge).writeToFile(gds_name)
+            layouts[merge] = gdsMill.VlsiLayout(units=GDS["unit"])
+            gdsMill.Gds2reader(layouts[merge]).loadFromFile(gds_name)
+        self.assertEqual(len(layouts[True].structures), len(layouts[False].structures) - 3)
+        self.assertEqual(layouts[True].rootStructureName, layouts[False].rootStructureName)
+        for layer in layouts[False].layerNumbersInUse:
+            self.assertEqual(sorted(layouts[True].getAllShapes((layer, None))),
+                             sorted(layouts[False].getAllShapes((layer, None))))
+
+        # Long coordinate lists are packed as arrays and truncated like int()
+        writer = gdsMill.Gds2writer(None)
+        for coordinates in [[(i, -i) for i in range(100)],
+                            [(i * 1.7, -i * 2.3) for i in range(100)],
+                            [(1.5, -2.5), (3, 4)]]:
+            values = [int(x) for coordinate in coordinates for x in coordinate]
+            self.assertEqual(writer.packCoordinates(coordinates),
+                             struct.pack(">{}i".format(len(values)), *values))
+        with self.assertRaises(struct.error):
+            writer.packCoordinates([(2**31, 0)] * 100)
+
+        openram.end_openram()
+
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = openram.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
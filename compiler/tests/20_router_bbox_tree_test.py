@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import sys, os
+import random
+import time
+import unittest
+from testutils import *
+
+import openram
+from openram import debug
+from openram import OPTS
+
+
+class router_bbox_tree_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        openram.init_openram(config_file, is_unit_test=True)
+        from openram.base.vector import vector
+        from openram.router.bbox_tree import bbox_tree
+        from openram.router.graph_shape import graph_shape
+
+        # Synthetic shapes on two layers
+        random.seed(0)
+        size = 1000
+        shapes = []
+        layers = []
+        for i in range(20000):
+            ll = vector(random.randint(0, size), random.randint(0, size))
+            ur = ll + vector(random.randint(1, 20), random.randint(1, 20))
+            shapes.append(graph_shape("blockage", [ll, ur], "m3"))
+            layers.append(i % 2)
+
+        start_time = time.time()
+        tree = bbox_tree(shapes, layers)
+        load_time = time.time() - start_time
+
+        def linear_search(ll, ur, layer=None):
+            found = []
+            for shape, shape_layer in zip(shapes, layers):
+                sll, sur = shape.rect
+                if layer is not None and shape_layer != layer:
+                    continue
+                if sll.x <= ur.x and ll.x <= sur.x and sll.y <= ur.y and ll.y <= sur.y:
+                    found.append(shape)
+            return found
+
+        # Single shape queries
+        for i in range(20):
+            ll = vector(random.randint(0, size), random.randint(0, size))
+            ur = ll + vector(random.randint(1, 100), random.randint(1, 100))
+            query = graph_shape("region", [ll, ur], "m3")
+            self.assertEqual(tree.query_shape(query), linear_search(ll, ur))
+
+        # Batched point queries with layers
+        points = [vector(random.randint(0, size), random.randint(0, size)) for i in range(500)]
+        point_layers = [i % 2 for i in range(len(points))]
+        start_time = time.time()
+        found = dict(tree.query_points(points, point_layers))
+        query_time = time.time() - start_time
+        for i, point in enumerate(points):
+            expected = linear_search(point, point, point_layers[i])
+            self.assertEqual(found.get(i, []), expected)
+            self.assertEqual(tree.query_point(point, point_layers[i]), expected)
+
+        debug.info(1, "Bulk load: {0:.3f}s, batched point queries: {1:.3f}s".format(load_time, query_time))
+
+        # Empty trees don't find anything
+        self.assertEqual(bbox_tree([]).query_points(points), [])
+
+        openram.end_openram()
+
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = openram.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
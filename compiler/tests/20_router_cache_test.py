@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import sys, os
+import shutil
+import unittest
+from testutils import *
+
+import openram
+from openram import debug
+from openram import OPTS
+
+
+class router_cache_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        openram.init_openram(config_file, is_unit_test=True)
+        from openram.router.route_cache import route_cache
+
+        path = OPTS.openram_temp + "route_cache"
+        shutil.rmtree(path, ignore_errors=True)
+        cache = route_cache(path, 2048)
+
+        # Keys only depend on the content
+        content = {"blockages": [["vdd", [1, 0], 0.0, 0.0, 1.5, 2.25]]}
+        key = cache.get_key(content)
+        self.assertEqual(key, cache.get_key({"blockages": [["vdd", [1, 0], 0.0, 0.0, 1.5, 2.25]]}))
+        self.assertNotEqual(key, cache.get_key({"blockages": [["gnd", [1, 0], 0.0, 0.0, 1.5, 2.25]]}))
+
+        # Stored routes are loaded back exactly
+        self.assertEqual(cache.load(key), None)
+        routes = [[[0.1, 0.2, 0], [0.1, 3.3, 1]]]
+        cache.store(key, routes)
+        self.assertEqual(cache.load(key), routes)
+        os.utime(cache.get_file_name(key), (1, 1))
+
+        # Least recently used entries are evicted when the cache is full
+        keys = []
+        for i in range(10):
+            keys.append(cache.get_key([i]))
+            cache.store(keys[-1], [[[float(i), 0.0, 0]]] * 50)
+            os.utime(cache.get_file_name(keys[-1]), (i + 10, i + 10))
+        self.assertEqual(cache.load(key), None)
+        self.assertEqual(cache.load(keys[-1]), [[[9.0, 0.0, 0]]] * 50)
+        size = sum(os.path.getsize(os.path.join(path, x)) for x in os.listdir(path))
+        self.assertLessEqual(size, 2048)
+
+        openram.end_openram()
+
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = openram.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import sys, os
+import unittest
+from testutils import *
+
+import openram
+from openram import debug
+from openram.sram_factory import factory
+from openram import OPTS
+
+
+class router_grid_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        openram.init_openram(config_file, is_unit_test=True)
+        from openram import sram_config
+        from openram.router import supply_router
+        from openram.router.graph import graph
+        from openram.router.routing_grid import routing_grid
+
+        c = sram_config(word_size=4,
+                        num_words=16,
+                        num_banks=1)
+
+        c.words_per_row=1
+        c.recompute_sizes()
+        debug.info(1, "Routing grid test for sram "
+                   "with {} bit words, {} words".format(c.word_size,
+                                                        c.num_words))
+        # Route the supplies in the test
+        OPTS.route_supplies = False
+        a = factory.create(module_type="sram", sram_config=c)
+        design = a.s
+        for pin_name in ["vdd", "gnd"]:
+            for inst in design.insts:
+                design.copy_power_pins(inst, pin_name, design.ext_supply[pin_name])
+
+        rtr = supply_router(layers=design.supply_stack, design=design, bbox=design.get_bbox())
+        rtr.prepare_layout()
+        rtr.find_pins("vdd")
+        rtr.find_pins("gnd")
+        rtr.find_blockages()
+        rtr.find_vias()
+        rtr.convert_vias()
+        rtr.convert_blockages()
+        for pin in rtr.all_pins:
+            rtr.blockages.append(rtr.inflate_shape(pin))
+        grid = routing_grid(rtr)
+
+        # Windows of the grid must find the same paths as the graphs of the
+        # pairs, also after the earlier routes are added to the layout
+        pairs = []
+        for pin_name in ["vdd", "gnd"]:
+            pairs.extend(rtr.get_mst_pairs(list(rtr.pins[pin_name])))
+        self.assertGreater(len(pairs), 0)
+        for source, target in pairs:
+            g = graph(rtr)
+            g.create_graph(source, target)
+            graph_path = g.find_shortest_path()
+            grid.create_graph(source, target)
+            grid_path = grid.find_shortest_path()
+            self.assertEqual(g.stats["nodes"], grid.stats["nodes"])
+            self.assertNotEqual(grid_path, None)
+            self.assertEqual([x.center for x in graph_path],
+                             [x.center for x in grid_path])
+            new_wires, new_vias = rtr.add_route(rtr.prepare_path(grid_path))
+            rtr.find_blockages(source.name, new_wires)
+            rtr.find_vias(new_vias)
+
+        openram.end_openram()
+
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = openram.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
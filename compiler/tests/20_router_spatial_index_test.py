@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import sys, os
+import random
+import time
+import unittest
+from testutils import *
+
+import openram
+from openram import debug
+from openram import OPTS
+
+
+class router_spatial_index_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        openram.init_openram(config_file, is_unit_test=True)
+        from openram.base.vector import vector
+        from openram.router.graph_shape import graph_shape
+        from openram.router.spatial_index import spatial_index
+
+        # Synthetic layers with 100k shapes
+        random.seed(0)
+        num_shapes = 100000
+        size = 2000
+        shapes = []
+        for i in range(num_shapes):
+            ll = vector(random.randint(0, size), random.randint(0, size))
+            ur = ll + vector(random.randint(1, 20), random.randint(1, 20))
+            layer = "m3" if i % 2 else "m4"
+            shapes.append(graph_shape("blockage", [ll, ur], layer))
+
+        start_time = time.time()
+        index = spatial_index(size / 64, shapes)
+        load_time = time.time() - start_time
+
+        queries = []
+        for i in range(100):
+            ll = vector(random.randint(0, size), random.randint(0, size))
+            ur = ll + vector(random.randint(1, 100), random.randint(1, 100))
+            queries.append(graph_shape("region", [ll, ur], "m3"))
+
+        start_time = time.time()
+        index_results = [index.overlapping(x) for x in queries]
+        index_time = time.time() - start_time
+
+        def linear_search(query):
+            qll, qur = query.rect
+            found = []
+            for shape in shapes:
+                ll, ur = shape.rect
+                if ll.x <= qur.x and qll.x <= ur.x and ll.y <= qur.y and qll.y <= ur.y:
+                    found.append(shape)
+            return found
+
+        start_time = time.time()
+        linear_results = [linear_search(x) for x in queries]
+        linear_time = time.time() - start_time
+
+        debug.info(1, "Bulk load: {0:.2f}s, index queries: {1:.3f}s, linear queries: {2:.2f}s".format(load_time,
+                                                                                                  index_time,
+                                                                                                  linear_time))
+        self.assertEqual(index_results, linear_results)
+
+        # Layer queries only return the shapes on that layer
+        layer = queries[0].lpp[0]
+        self.assertEqual(index.overlapping(queries[0], layer),
+                         [x for x in linear_results[0] if x.lpp[0] == layer])
+
+        # Removed shapes aren't found and new shapes come last
+        query, found = next((x, y) for x, y in zip(queries, linear_results) if len(y) > 1)
+        for shape in found:
+            index.remove(shape)
+        self.assertEqual(index.overlapping(query), [])
+        index.append(found[1])
+        index.append(found[0])
+        self.assertEqual(index.overlapping(query), [found[1], found[0]])
+        self.assertEqual(len(index), num_shapes - len(found) + 2)
+
+        # Large shapes aren't put in the buckets but they are still found
+        large = graph_shape("blockage", [vector(-size, -size), vector(2 * size, 2 * size)], "m3")
+        bucket_count = sum(len(x) for x in index.buckets.values())
+        index.append(large)
+        self.assertEqual(sum(len(x) for x in index.buckets.values()), bucket_count)
+        self.assertEqual(index.overlapping(query), [found[1], found[0], large])
+        layer = large.lpp[0]
+        self.assertEqual(index.overlapping(query, layer), [x for x in [found[1], found[0], large] if x.lpp[0] == layer])
+        index.remove(large)
+        self.assertEqual(index.overlapping(query), [found[1], found[0]])
+
+        # Changes are logged until the log is trimmed
+        state = index.get_log_state()
+        index.append(large)
+        index.remove(found[0])
+        self.assertEqual(index.get_changes(state), ([large], [found[0]]))
+        index.trim_log(state)
+        self.assertEqual(index.get_changes(state), ([large], [found[0]]))
+        index.trim_log()
+        self.assertEqual(index.get_changes(state), None)
+        self.assertEqual(index.get_changes(index.get_log_state()), ([], []))
+        self.assertEqual((index.inserted, index.removed), ([], []))
+
+        openram.end_openram()
+
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = openram.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
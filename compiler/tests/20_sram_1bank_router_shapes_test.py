@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import sys, os
+import time
+import unittest
+from testutils import *
+
+import openram
+from openram import debug
+from openram.sram_factory import factory
+from openram import OPTS
+
+
+class sram_1bank_router_shapes_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        openram.init_openram(config_file, is_unit_test=True)
+        from openram import sram_config
+        from openram.router import supply_router
+
+        c = sram_config(word_size=4,
+                        num_words=16,
+                        num_banks=1)
+
+        c.words_per_row=1
+        c.recompute_sizes()
+        debug.info(1, "Router shape extraction test for sram "
+                   "with {} bit words, {} words".format(c.word_size,
+                                                        c.num_words))
+        a = factory.create(module_type="sram", sram_config=c)
+        design = a.s
+
+        # Find the pins, blockages, and vias from a temporary GDSII file
+        gds_router = supply_router(layers=design.supply_stack, design=design)
+        start_time = time.time()
+        gds_router.prepare_gds_reader()
+        gds_shapes = self.find_shapes(gds_router)
+        gds_time = time.time() - start_time
+
+        # Find the same shapes in memory
+        mem_router = supply_router(layers=design.supply_stack, design=design)
+        start_time = time.time()
+        mem_router.prepare_layout()
+        mem_shapes = self.find_shapes(mem_router)
+        mem_time = time.time() - start_time
+
+        debug.info(1, "GDSII file shapes: {0:.2f}s, in-memory shapes: {1:.2f}s".format(gds_time,
+                                                                                      mem_time))
+        self.assertEqual(gds_shapes, mem_shapes)
+
+        openram.end_openram()
+
+    def find_shapes(self, rtr):
+        """ Return the pins, blockages, and vias found by a router. """
+        rtr.find_pins("vdd")
+        rtr.find_pins("gnd")
+        rtr.find_blockages()
+        rtr.find_vias()
+        pins = [repr(x) for x in rtr.pins["vdd"]] + [repr(x) for x in rtr.pins["gnd"]]
+        blockages = [repr(x) for x in rtr.blockages]
+        vias = [repr(x) for x in rtr.vias]
+        return (pins, blockages, vias)
+
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = openram.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import sys, os
+import unittest
+from testutils import *
+
+import openram
+from openram import debug
+from openram.sram_factory import factory
+from openram import OPTS
+
+
+class timing_sram_parallel_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        openram.init_openram(config_file, is_unit_test=True)
+        OPTS.spice_name="ngspice"
+        OPTS.analytical_delay = False
+        OPTS.netlist_only = True
+
+        # This is a hack to reload the characterizer __init__ with the spice version
+        from importlib import reload
+        from openram import characterizer
+        reload(characterizer)
+        from openram.characterizer import delay
+        from openram import sram_config
+        c = sram_config(word_size=4,
+                        num_words=16,
+                        num_banks=1)
+        c.words_per_row=1
+        c.recompute_sizes()
+        debug.info(1, "Testing parallel load/slew timing for sample 4bit, 16words SRAM with 1 bank")
+        s = factory.create(module_type="sram", sram_config=c)
+
+        tempspice = OPTS.openram_temp + "temp.sp"
+        s.sp_write(tempspice)
+
+        probe_address = "1" * s.s.addr_size
+        probe_data = s.s.word_size - 1
+
+        corner = (OPTS.process_corners[0], OPTS.supply_voltages[0], OPTS.temperatures[0])
+        from openram import tech
+        loads = [tech.spice["dff_in_cap"]*4, tech.spice["dff_in_cap"]*8]
+        slews = [tech.spice["rise_time"]*2, tech.spice["rise_time"]*4]
+        load_slews = []
+        for slew in slews:
+            for load in loads:
+                load_slews.append((load, slew))
+
+        # Simulate the table one pair at a time, in worker processes, and
+        # after searching the minimum period with several periods at a time
+        results = []
+        for (num_sim_jobs, parallel_period_search) in [(1, False), (2, False), (3, True)]:
+            OPTS.num_sim_jobs = num_sim_jobs
+            OPTS.parallel_period_search = parallel_period_search
+            d = delay(s.s, tempspice, corner)
+            data, port_data = d.analyze(probe_address, probe_data, load_slews)
+            data.update(port_data[0])
+            results.append(data)
+        OPTS.num_sim_jobs = 1
+        OPTS.parallel_period_search = False
+
+        # The table points are in the same order with the same values
+        self.assertEqual(sorted(results[0].keys()), sorted(results[1].keys()))
+        self.assertEqual(len(results[1]["delay_hl"]), len(load_slews))
+        self.assertTrue(self.check_golden_data(results[1], results[0], 1e-6))
+
+        # The k-section search converges to the same tolerance as the binary search
+        self.assertTrue(self.isclose("min_period", results[2]["min_period"], results[0]["min_period"], 0.1))
+
+        openram.end_openram()
+
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = openram.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import sys, os
+import shutil
+import time
+import unittest
+from testutils import *
+
+import openram
+from openram import debug
+from openram import OPTS
+
+
+class sim_cache_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        openram.init_openram(config_file, is_unit_test=True)
+        from openram.characterizer import charutils
+        from openram.characterizer.stimuli import stimuli
+        from openram.characterizer.sim_cache import sim_cache
+
+        def write_deck(path, measures):
+            """ Write a deck that includes models, a netlist, and measures in path. """
+            os.makedirs(path + "models", exist_ok=True)
+            with open(path + "models/nmos.inc", "w") as f:
+                f.write(".model nmos_vtg nmos level=54\n")
+            with open(path + "models.sp", "w") as f:
+                f.write(".lib tt\n.include 'models/nmos.inc'\n.endl tt\n.lib \"{0}models.sp\" tt\n".format(path))
+            with open(path + "sram.sp", "w") as f:
+                f.write(".SUBCKT sram din0 dout0\n.ENDS sram\n")
+            with open(path + "meas.sp", "w") as f:
+                f.write(measures)
+            with open(path + "stim.sp", "w") as f:
+                f.write(".lib \"{0}models.sp\" tt\n.include \"{0}sram.sp\"\n".format(path))
+                # The measures are included without a new line like the delay deck
+                f.write(".include {0}meas.sp.TEMP 25\n.TRAN 10p 5n 0n 10p UIC\n.end\n".format(path))
+            return path + "stim.sp"
+
+        cache_path = OPTS.openram_temp + "sim_cache"
+        shutil.rmtree(cache_path, ignore_errors=True)
+        cache = sim_cache(cache_path)
+        OPTS.spice_name = "ngspice"
+        OPTS.spice_exe = sys.executable
+
+        # Decks with the same contents in other directories have the same key
+        stim = write_deck(OPTS.openram_temp + "deck1/", ".meas tran delay_hl0 trig v(clk0) val=0.5\n")
+        key = cache.get_key(stim)
+        OPTS.openram_temp += "deck2/"
+        other_stim = write_deck(OPTS.openram_temp, ".meas tran delay_hl0 trig v(clk0) val=0.5\n")
+        self.assertEqual(cache.get_key(other_stim), key)
+
+        # Keys change with the included files, the simulator, and the options
+        with open(OPTS.openram_temp + "meas.sp", "a") as f:
+            f.write(".meas tran delay_lh0 trig v(clk0) val=0.5\n")
+        other_key = cache.get_key(other_stim)
+        self.assertNotEqual(other_key, key)
+        time.sleep(0.01)
+        with open(OPTS.openram_temp + "models/nmos.inc", "w") as f:
+            f.write(".model nmos_vtg nmos level=14\n")
+        self.assertNotEqual(cache.get_key(other_stim), other_key)
+        other_key = cache.get_key(other_stim)
+        OPTS.spice_name = "xyce"
+        self.assertNotEqual(cache.get_key(other_stim), other_key)
+        OPTS.spice_name = "ngspice"
+        OPTS.use_pex = not OPTS.use_pex
+        self.assertNotEqual(cache.get_key(other_stim), other_key)
+        OPTS.use_pex = not OPTS.use_pex
+
+        # The output of a cached simulation is used without the simulator
+        contents = "delay_hl0 = 2.764415e-10 targ= 3.2e-09\nxread0_power0 = 3.7e-04\nmeas delay_lh0 failed!\n"
+        entry = {"contents": contents, "measures": {"delay_hl0": "2.764415e-10", "xread0_power0": "3.7e-04"}}
+        self.assertEqual(cache.load(other_key), None)
+        cache.store(other_key, entry)
+        self.assertEqual(cache.load(other_key), entry)
+        OPTS.sim_cache_path = cache_path
+        corner = (OPTS.process_corners[0], OPTS.supply_voltages[0], OPTS.temperatures[0])
+        stim_object = stimuli(None, None, corner)
+        stim_object.run_sim("stim.sp")
+        self.assertEqual(charutils.parse_spice_list("timing", "delay_hl0"), 2.764415e-10)
+        # Keys that aren't whole measure names are searched in the cached output
+        self.assertEqual(charutils.parse_spice_list("timing", "read0_power0"), 3.7e-04)
+        self.assertEqual(charutils.parse_spice_list("timing", "delay_lh0"), "Failed")
+        OPTS.sim_cache_path = None
+
+        # Entries without the output are misses
+        with open(cache.get_file_name(other_key), "w") as f:
+            f.write('{"delay_hl0": "2.764415e-10"}')
+        self.assertEqual(cache.load(other_key), None)
+        cache.store(other_key, entry)
+
+        # The least recently used entries are removed over the size limit
+        entry_size = os.path.getsize(cache.get_file_name(other_key))
+        cache.max_size = 3 * entry_size
+        keys = [other_key]
+        for i in range(4):
+            time.sleep(0.01)
+            keys.append("{0:064x}".format(i))
+            cache.store(keys[-1], entry)
+        self.assertEqual([x[0] for x in cache.entries()], keys[2:])
+        time.sleep(0.01)
+        cache.load(keys[2])
+        cache.store(keys[0], entry)
+        self.assertEqual([x[0] for x in cache.entries()], [keys[4], keys[2], keys[0]])
+
+        # Entries can be removed
+        cache.purge([keys[2]])
+        self.assertEqual([x[0] for x in cache.entries()], [keys[4], keys[0]])
+        cache.purge()
+        self.assertEqual(cache.entries(), [])
+
+        openram.end_openram()
+
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = openram.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import sys, os, re
+import random
+import time
+import unittest
+from testutils import *
+
+import openram
+from openram import debug
+from openram import OPTS
+
+
+def search_spice_list(full_filename, key):
+    """ The search of a single key that parse_spice_list used before. """
+    with open(full_filename, "r") as f:
+        contents = f.read().lower()
+    val = re.search(r"{0}\s*=\s*(-?\d+.?\d*[e]?[-+]?[0-9]*\S*)\s+.*".format(key.lower()), contents)
+    if val != None:
+        return val.group(1)
+    return "Failed"
+
+
+class spice_measures_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        openram.init_openram(config_file, is_unit_test=True)
+        from openram.characterizer import charutils
+
+        random.seed(0)
+
+        # The measures of a 200 cycle functional run of a 32 bit word
+        keys = []
+        values = []
+        for cycle in range(200):
+            for bit in range(32):
+                keys.append("vdout0_{0}ck{1}0".format(bit, cycle))
+                values.append(random.choice([0.0, 1.1, 0.000123]) + random.random() * 1e-3)
+        keys += ["delay_hl0", "slew_lh0", "read0_power0", "leakage_power"]
+        values += [2.764415e-10, -1.5e-11, 3.7e-4, 4.4e-5]
+        missing_keys = ["vdout0_0ck2000", "failed_meas0", "hl0", "dout0_0ck10", "power"]
+
+        formats = {"ngspice": "{0:<20}=  {1:e} targ=  3.276442e-09 trig=  3.000000e-09\n",
+                   "hspice": " {0}=  {1:.4E}  targ=  3.2764E-09   trig=  3.0000E-09\n",
+                   "xa": "{0} = {1:g}\n",
+                   "spectre": "{0} = {1:.6g}\n",
+                   "xyce": "{0} = {1:.16e}\n"}
+        spice_name = OPTS.spice_name
+        for (name, line_format) in formats.items():
+            OPTS.spice_name = name
+            full_filename = charutils.get_spice_output_file("timing")
+            with open(full_filename, "w") as f:
+                f.write("* Output of {0}\n.meas tran delay_hl0 trig v(clk0) val=0.5 rise=1\n".format(name))
+                for (key, value) in zip(keys, values):
+                    f.write(line_format.format(key.upper() if name == "xyce" else key, value))
+                f.write("meas failed_meas0 failed!\nFAILED_MEAS0 = FAILED\n")
+
+            start_time = time.time()
+            results = {key: charutils.parse_spice_list("timing", key) for key in keys + missing_keys}
+            parse_time = time.time() - start_time
+
+            # The measures are the same as searching the file for each key
+            for key in keys[::97] + keys[-4:] + missing_keys:
+                expected = search_spice_list(full_filename, key)
+                self.assertEqual(results[key], charutils.convert_to_float(expected) if expected != "Failed" else expected)
+            self.assertEqual(results["delay_hl0"], float(line_format.format("", 2.764415e-10).split("=")[1].split()[0]))
+
+            # Searching the file for each key reads the file once per key
+            if name == "ngspice":
+                start_time = time.time()
+                for key in keys:
+                    search_spice_list(full_filename, key)
+                search_time = time.time() - start_time
+                debug.info(1, "{0}: {1} measures in {2:.3f}s, {3:.3f}s with a search for each".format(name,
+                                                                                                     len(keys),
+                                                                                                     parse_time,
+                                                                                                     search_time))
+
+            # A changed file is parsed again
+            with open(full_filename, "a") as f:
+                f.write(line_format.format("vdout0_0ck2000", 0.5))
+            self.assertEqual(charutils.parse_spice_list("timing", "vdout0_0ck2000"), 0.5)
+
+        OPTS.spice_name = spice_name
+
+        openram.end_openram()
+
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = openram.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())
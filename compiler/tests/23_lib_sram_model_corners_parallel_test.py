@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# See LICENSE for licensing information.
+#
+# Copyright (c) 2016-2023 Regents of the University of California and The Board
+# of Regents for the Oklahoma Agricultural and Mechanical College
+# (acting for and on behalf of Oklahoma State University)
+# All rights reserved.
+#
+import sys, os, re
+import unittest
+from testutils import *
+
+import openram
+from openram import debug
+from openram import OPTS
+
+
+class lib_model_corners_parallel_test(openram_test):
+
+    def runTest(self):
+        config_file = "{}/tests/configs/config".format(os.getenv("OPENRAM_HOME"))
+        openram.init_openram(config_file, is_unit_test=True)
+        OPTS.nominal_corner_only = False
+        OPTS.netlist_only = True
+
+        from openram.characterizer import lib
+        from openram import sram
+        from openram import sram_config
+        c = sram_config(word_size=2,
+                        num_words=16,
+                        num_banks=1)
+        c.words_per_row=1
+        c.recompute_sizes()
+        debug.info(1, "Testing parallel corners for sample 2 bit, 16 words SRAM with 1 bank")
+
+        s = sram(c, name="sram_2_16_1_{0}".format(OPTS.tech_name))
+        tempspice = OPTS.openram_temp + "temp.sp"
+        s.sp_write(tempspice)
+
+        OPTS.process_corners = ["TT", "SS", "FF"]
+        OPTS.supply_voltages = [OPTS.supply_voltages[0]]
+        OPTS.temperatures = [25]
+
+        if OPTS.output_datasheet_info:
+            datasheet_path = OPTS.output_path
+        else:
+            datasheet_path = OPTS.openram_temp
+
+        # Characterize the corners serially and in worker processes
+        results = []
+        for num_threads in [1, 2]:
+            OPTS.num_threads = num_threads
+            out_dir = "{0}corners_{1}/".format(OPTS.openram_temp, num_threads)
+            os.makedirs(out_dir, exist_ok=True)
+            lib(out_dir=out_dir, sram=s.s, sp_file=tempspice, use_model=True)
+            lib_files = sorted(x for x in os.listdir(out_dir) if re.search("\.lib$", x, re.IGNORECASE))
+            self.assertEqual(len(lib_files), 3)
+            lib_contents = []
+            for filename in lib_files:
+                with open(out_dir + filename) as f:
+                    lib_contents.append(f.read())
+            with open(datasheet_path + "/datasheet.info") as f:
+                # The run times of the corners differ between runs
+                datasheet = re.sub("sim_time,[^,]*,", "", f.read().replace(out_dir, ""))
+            results.append((lib_files, lib_contents, datasheet))
+        OPTS.num_threads = 1
+
+        # The workers write the same lib files and the datasheet corners in the same order
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0][2].count("END\n"), 3)
+
+        openram.end_openram()
+
+# run the test from the command line
+if __name__ == "__main__":
+    (OPTS, args) = openram.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main(testRunner=debugTestRunner())